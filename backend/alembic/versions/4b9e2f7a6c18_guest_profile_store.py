@@ -0,0 +1,78 @@
+"""Guest profile store
+
+Revision ID: 4b9e2f7a6c18
+Revises: 7c3e5a91b2d4
+Create Date: 2026-10-17 14:03:51.508112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b9e2f7a6c18'
+down_revision: Union[str, Sequence[str], None] = '7c3e5a91b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Declared by the model but missing from the initial schema
+GUEST_COLUMNS = [
+    sa.Column('influence_score', sa.Integer(), nullable=True),
+    sa.Column('privacy_toggle', sa.Boolean(), nullable=True),
+    sa.Column('velocity_history', sa.JSON(), nullable=True),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('guests')}
+    for column in GUEST_COLUMNS:
+        if column.name not in existing:
+            op.add_column('guests', column)
+    op.add_column('guests', sa.Column('email_key', sa.String(), nullable=True))
+    op.add_column('guests', sa.Column('phone_key', sa.String(), nullable=True))
+    op.add_column('guests', sa.Column('name_key', sa.String(), nullable=True))
+    op.create_index(op.f('ix_guests_email_key'), 'guests', ['email_key'], unique=False)
+    op.create_index(op.f('ix_guests_phone_key'), 'guests', ['phone_key'], unique=False)
+    op.create_index(op.f('ix_guests_name_key'), 'guests', ['name_key'], unique=False)
+    op.create_table('guest_orders',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('guest_id', sa.String(), nullable=False),
+    sa.Column('version', sa.String(), nullable=False),
+    sa.Column('spend', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['guest_id'], ['guests.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    backfill_keys()
+
+
+def backfill_keys() -> None:
+    """Lookup keys of existing guests (same normalization as the reconciler)."""
+    from app.integrations.logic import normalize_email, normalize_name, normalize_phone
+    bind = op.get_bind()
+    guests = sa.table('guests', sa.column('id'), sa.column('name'), sa.column('email'), sa.column('phone'),
+                      sa.column('email_key'), sa.column('phone_key'), sa.column('name_key'))
+    rows = bind.execute(sa.select(guests.c.id, guests.c.name, guests.c.email, guests.c.phone)).all()
+    if rows:
+        bind.execute(
+            guests.update().where(guests.c.id == sa.bindparam('b_id')).values(
+                email_key=sa.bindparam('b_email'), phone_key=sa.bindparam('b_phone'),
+                name_key=sa.bindparam('b_name'),
+            ),
+            [{'b_id': id, 'b_email': normalize_email(email), 'b_phone': normalize_phone(phone),
+              'b_name': normalize_name(name) or None} for id, name, email, phone in rows],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('guest_orders')
+    op.drop_index(op.f('ix_guests_name_key'), table_name='guests')
+    op.drop_index(op.f('ix_guests_phone_key'), table_name='guests')
+    op.drop_index(op.f('ix_guests_email_key'), table_name='guests')
+    op.drop_column('guests', 'name_key')
+    op.drop_column('guests', 'phone_key')
+    op.drop_column('guests', 'email_key')
@@ -0,0 +1,51 @@
+"""Venue scoped order ids
+
+Revision ID: 5f1a8c3e7b90
+Revises: 9d1c6e3f5a27
+Create Date: 2026-10-17 21:40:03.512964
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1a8c3e7b90'
+down_revision: Union[str, Sequence[str], None] = '9d1c6e3f5a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Columns of the orders table at this revision
+ORDER_COLUMNS = "guest_id, table_number, guest_count, total_amount, status, created_at, venue_key, source, server"
+
+
+def rekey_orders(new_id: str, old_rows: str) -> None:
+    """
+    Copies the `old_rows` orders under `new_id`, moves their items over and
+    deletes the old rows, so order_items.order_id (a non-deferrable foreign
+    key) never points at a missing order.
+    """
+    op.execute(f"INSERT INTO orders (id, {ORDER_COLUMNS}) SELECT {new_id}, {ORDER_COLUMNS} FROM orders WHERE {old_rows}")
+    op.execute(f"""
+        UPDATE order_items
+        SET id = (SELECT {new_id} FROM orders WHERE orders.id = order_items.order_id)
+                 || substr(id, length(order_id) + 1),
+            order_id = (SELECT {new_id} FROM orders WHERE orders.id = order_items.order_id)
+        WHERE order_id IN (SELECT id FROM orders WHERE {old_rows})
+    """)
+    op.execute(f"DELETE FROM orders WHERE {old_rows}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Order rows become "<venue_key>:<order id>" (item rows follow their order)
+    rekey_orders("venue_key || ':' || id",
+                 "venue_key IS NOT NULL AND substr(id, 1, length(venue_key) + 1) != venue_key || ':'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    rekey_orders("substr(id, length(venue_key) + 2)",
+                 "venue_key IS NOT NULL AND substr(id, 1, length(venue_key) + 1) = venue_key || ':'")
@@ -0,0 +1,55 @@
+"""Live state persistence
+
+Revision ID: 7c3e5a91b2d4
+Revises: d02d1493fa22
+Create Date: 2026-10-17 09:12:44.120371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e5a91b2d4'
+down_revision: Union[str, Sequence[str], None] = 'd02d1493fa22'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('venue_key', sa.String(), nullable=True))
+    op.add_column('orders', sa.Column('source', sa.String(), nullable=True))
+    op.add_column('orders', sa.Column('server', sa.String(), nullable=True))
+    op.create_index(op.f('ix_orders_venue_key'), 'orders', ['venue_key'], unique=False)
+    op.add_column('order_items', sa.Column('item_id', sa.String(), nullable=True))
+    op.add_column('order_items', sa.Column('station', sa.String(), nullable=True))
+    op.add_column('order_items', sa.Column('course', sa.String(), nullable=True))
+    op.add_column('visits', sa.Column('venue_key', sa.String(), nullable=True))
+    op.create_index(op.f('ix_visits_venue_key'), 'visits', ['venue_key'], unique=False)
+    op.create_table('floor_tables',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('venue_key', sa.String(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=True),
+    sa.Column('state', sa.JSON(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_floor_tables_venue_key'), 'floor_tables', ['venue_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_floor_tables_venue_key'), table_name='floor_tables')
+    op.drop_table('floor_tables')
+    op.drop_index(op.f('ix_visits_venue_key'), table_name='visits')
+    op.drop_column('visits', 'venue_key')
+    op.drop_column('order_items', 'course')
+    op.drop_column('order_items', 'station')
+    op.drop_column('order_items', 'item_id')
+    op.drop_index(op.f('ix_orders_venue_key'), table_name='orders')
+    op.drop_column('orders', 'server')
+    op.drop_column('orders', 'source')
+    op.drop_column('orders', 'venue_key')
@@ -0,0 +1,43 @@
+"""Guest merges
+
+Revision ID: 9d1c6e3f5a27
+Revises: 4b9e2f7a6c18
+Create Date: 2026-10-17 19:05:12.877310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d1c6e3f5a27'
+down_revision: Union[str, Sequence[str], None] = '4b9e2f7a6c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('guest_merges',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('survivor_id', sa.String(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.Column('merged_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_guest_merges_survivor_id'), 'guest_merges', ['survivor_id'], unique=False)
+    # Merges repoint a guest's orders, visits and ledger rows
+    op.create_index(op.f('ix_orders_guest_id'), 'orders', ['guest_id'], unique=False)
+    op.create_index(op.f('ix_visits_guest_id'), 'visits', ['guest_id'], unique=False)
+    op.create_index(op.f('ix_guest_orders_guest_id'), 'guest_orders', ['guest_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_guest_orders_guest_id'), table_name='guest_orders')
+    op.drop_index(op.f('ix_visits_guest_id'), table_name='visits')
+    op.drop_index(op.f('ix_orders_guest_id'), table_name='orders')
+    op.drop_index(op.f('ix_guest_merges_survivor_id'), table_name='guest_merges')
+    op.drop_table('guest_merges')
@@ -0,0 +1,32 @@
+"""Guest merge snapshots
+
+Revision ID: c2d7e9f4a611
+Revises: 5f1a8c3e7b90
+Create Date: 2026-10-17 22:18:37.046112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d7e9f4a611'
+down_revision: Union[str, Sequence[str], None] = '5f1a8c3e7b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('guest_merges', sa.Column('snapshot', sa.JSON(), nullable=True))
+    op.add_column('guest_merges', sa.Column('survivor_snapshot', sa.JSON(), nullable=True))
+    op.add_column('guest_merges', sa.Column('moved', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('guest_merges', 'moved')
+    op.drop_column('guest_merges', 'survivor_snapshot')
+    op.drop_column('guest_merges', 'snapshot')
@@ -1,11 +1,16 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Hashable
 from datetime import datetime, timedelta
 import logging
+from app.integrations.sections import SectionMap, bar_sections
+from app.integrations.menu import menu_catalog
 
 logger = logging.getLogger("uvicorn")
 
 class KitchenOptimizer:
-    def __init__(self):
+    def __init__(self, sections: Optional[SectionMap] = None):
+        # Bartender sections used to route drinks to a bar station
+        self.sections = sections or bar_sections
+
         # Station capacities and capabilities
         self.stations = {
             "grill": {"capacity": 10, "current_load": 0},
@@ -15,20 +20,33 @@ class KitchenOptimizer:
             "pastry": {"capacity": 5, "current_load": 0}
         }
         
-        # Item metadata (prep times in minutes, station affinity)
-        # In a real app, this would come from a database
-        self.item_registry = {
-            "Ribeye 12oz": {"prep_time": 18, "station": "grill", "course": "main"},
-            "Risotto": {"prep_time": 20, "station": "saute", "course": "main"},
-            "Caesar Salad": {"prep_time": 5, "station": "garde_manger", "course": "appetizer"},
-            "Tuna Tartare": {"prep_time": 8, "station": "garde_manger", "course": "appetizer"},
-            "Fries": {"prep_time": 6, "station": "fry", "course": "side"},
-            "Chocolate Souffle": {"prep_time": 25, "station": "pastry", "course": "dessert"}
-        }
+        # Item metadata (prep times in minutes, station affinity, course)
+        # comes from the compiled menu catalog shared with the router
+        self.menu = menu_catalog
         self.completed_items = set()
 
+        # Cached optimization plans per order, computed once when the order
+        # arrives and patched in place on bumps (keeps fire times stable)
+        self.plans: Dict[str, Dict[str, Any]] = {}
+        self.plan_signatures: Dict[str, Hashable] = {}
+        self.item_orders: Dict[str, Set[str]] = {}
+
+    def reset(self):
+        """
+        Clears all kitchen state (completed items and cached plans).
+        """
+        self.completed_items.clear()
+        self.plans.clear()
+        self.plan_signatures.clear()
+        self.item_orders.clear()
+
     def mark_item_complete(self, item_id: str):
         self.completed_items.add(item_id)
+        # Drop the bumped item from every cached plan that contains it
+        for order_id in self.item_orders.pop(item_id, ()):
+            plan = self.plans.get(order_id)
+            if plan is not None:
+                plan.pop(item_id, None)
 
     def mark_order_complete(self, items: List[Dict[str, Any]]):
         """
@@ -37,18 +55,44 @@ class KitchenOptimizer:
         for item in items:
             self.mark_item_complete(str(item.get("item_id", "")))
 
+    def cached_plan(self, order_id: str, signature: Hashable) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached plan for an order, or None if the order is unknown
+        or its items changed since the plan was built.
+        """
+        if self.plan_signatures.get(order_id) != signature:
+            return None
+        return self.plans.get(order_id)
+
+    def plan_order(self, order_id: str, items: List[Dict[str, Any]], table_number: Optional[int] = None,
+                   signature: Hashable = None) -> Dict[str, Any]:
+        """
+        Optimizes an order and caches the plan under its id.
+        """
+        self.drop_plan(order_id)
+        plan = self.optimize_order(items, table_number)
+        self.plans[order_id] = plan
+        self.plan_signatures[order_id] = signature
+        for item_id in plan:
+            self.item_orders.setdefault(item_id, set()).add(order_id)
+        return plan
+
+    def drop_plan(self, order_id: str):
+        """
+        Forgets the cached plan of an order (delivered or replaced).
+        """
+        plan = self.plans.pop(order_id, None)
+        self.plan_signatures.pop(order_id, None)
+        for item_id in plan or ():
+            orders = self.item_orders.get(item_id)
+            if orders is not None:
+                orders.discard(order_id)
+                if not orders:
+                    del self.item_orders[item_id]
+
     def _get_bar_station(self, table_number: Optional[int]) -> str:
-        """Route drinks to specific bar based on table number."""
-        if table_number is None:
-            return "bar"
-        if table_number <= 10:
-            return "bar 1"
-        elif table_number <= 20:
-            return "bar 2"
-        elif table_number <= 30:
-            return "bar 3"
-        else:
-            return "bar 4"
+        """Route drinks to specific bar based on the bartender section map."""
+        return self.sections.station_for_table(table_number)
 
     def optimize_order(self, items: List[Dict[str, Any]], table_number: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -61,37 +105,14 @@ class KitchenOptimizer:
             if item["item_id"] in self.completed_items:
                 continue # Skip completed items
             
-            name = str(item.get("name", ""))
-            # Prefer item metadata over registry
-            prep_time = item.get("prep_time")
-            if prep_time is None:
-                meta = self.item_registry.get(name, {"prep_time": 10})
-                prep_time = meta.get("prep_time", 10)
-            
-            station = item.get("station")
-            if not station:
-                meta = self.item_registry.get(name, {"station": "grill"})
-                station = meta.get("station", "grill")
-
-            course = item.get("course")
-            if not course:
-                meta = self.item_registry.get(name, {"course": "main"})
-                course = meta.get("course", "main")
-
-            # Default to main if unknown course
-            course_str = str(course).lower()
-            if course_str in ["apps", "appetizers", "appetizer"]:
-                course_key = "appetizer"
-            elif course_str in ["sides", "side"]:
-                course_key = "side"
-            elif course_str in ["drinks", "drink", "beverage", "bar"]:
-                course_key = "drink"
-            elif course_str in ["desserts", "dessert"]:
-                course_key = "dessert"
-            elif course_str in ["mains", "main", "entree"]:
-                course_key = "main"
-            else:
-                 course_key = "main"
+            # Prefer item metadata over the menu catalog (unknown course -> main)
+            course_key, station, prep_time = self.menu.classify(
+                item.get("item_id"),
+                str(item.get("name", "")),
+                course=item.get("course"),
+                station=item.get("station"),
+                prep_time=item.get("prep_time"),
+            )
             
             courses[course_key].append({
                 **item, 
@@ -6,10 +6,17 @@ from app.db.base import Base
 from app.db.session import get_db
 from app.db.xs_models import XSSection, XSBottleItem, XSStaffAssignment, XSTable
 from app.db.models import Staff  # Import main Staff model to seed staff
+from app.integrations.response_cache import ResponseCache
 import uuid
 
 router = APIRouter()
 
+# Encoded bottle menu. Re-seeding bumps the version; the TTL bounds how long
+# another process's edits to the menu table can go unseen.
+menu_cache = ResponseCache()
+MENU_CACHE_TTL = 60.0
+menu_version = 0
+
 # --- Request Models ---
 class StaffAssignmentRequest(BaseModel):
     staff_id: str
@@ -129,6 +136,8 @@ def setup_xs_data(db: Session = Depends(get_db)):
                 db.add(new_staff)
 
         db.commit()
+        global menu_version
+        menu_version += 1
         return {"status": "initialized", "message": "XS Nightclub setup complete with Premium Research Data"}
     except Exception as e:
         print(f"Setup Error: {e}")
@@ -140,8 +149,10 @@ def get_bottle_menu(db: Session = Depends(get_db)):
     """
     Get the Bottle Service Menu.
     """
-    items = db.query(XSBottleItem).filter(XSBottleItem.is_available == True).all()
-    return [{"id": i.id, "name": i.name, "category": i.category, "price": i.price, "size": i.size} for i in items]
+    def build():
+        items = db.query(XSBottleItem).filter(XSBottleItem.is_available == True).all()
+        return [{"id": i.id, "name": i.name, "category": i.category, "price": i.price, "size": i.size} for i in items]
+    return menu_cache.serve("menu", menu_version, build, ttl=MENU_CACHE_TTL)
 
 @router.get("/layout")
 def get_floor_layout(db: Session = Depends(get_db)):
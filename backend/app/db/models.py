@@ -19,6 +19,10 @@ class Guest(Base):
     privacy_toggle = Column(Boolean, default=False) # h.wood Rolodex Privacy
     velocity_history = Column(JSON, default=[]) # List of past spend velocity [date, amount, venue]
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Normalized lookup keys (GuestReconciler): lowercased email, E.164 phone, casefolded name
+    email_key = Column(String, index=True, nullable=True)
+    phone_key = Column(String, index=True, nullable=True)
+    name_key = Column(String, index=True, nullable=True)
     
     orders = relationship("Order", back_populates="guest")
     visits = relationship("Visit", back_populates="guest")
@@ -36,12 +40,15 @@ class Staff(Base):
 class Order(Base):
     __tablename__ = "orders"
 
-    id = Column(String, primary_key=True) # External ID from Toast
-    guest_id = Column(String, ForeignKey("guests.id"), nullable=True)
+    id = Column(String, primary_key=True) # "<venue_key>:<order id>" (order id from the POS)
+    guest_id = Column(String, ForeignKey("guests.id"), index=True, nullable=True)
+    venue_key = Column(String, index=True, nullable=True)
     table_number = Column(Integer)
     guest_count = Column(Integer, default=1)
     total_amount = Column(Float, default=0.0)
     status = Column(String, default="open")
+    source = Column(String, nullable=True)
+    server = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     guest = relationship("Guest", back_populates="orders")
@@ -52,10 +59,13 @@ class OrderItem(Base):
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     order_id = Column(String, ForeignKey("orders.id"))
+    item_id = Column(String, nullable=True) # POS item id
     item_name = Column(String, nullable=False)
     quantity = Column(Integer, default=1)
     price = Column(Float, default=0.0)
     special_requests = Column(String, nullable=True)
+    station = Column(String, nullable=True)
+    course = Column(String, nullable=True)
 
     order = relationship("Order", back_populates="items")
 
@@ -63,7 +73,8 @@ class Visit(Base):
     __tablename__ = "visits"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    guest_id = Column(String, ForeignKey("guests.id"))
+    guest_id = Column(String, ForeignKey("guests.id"), index=True)
+    venue_key = Column(String, index=True, nullable=True)
     start_time = Column(DateTime, default=datetime.utcnow)
     end_time = Column(DateTime, nullable=True)
     table_number = Column(Integer)
@@ -71,3 +82,33 @@ class Visit(Base):
     tip_amount = Column(Float, nullable=True)
 
     guest = relationship("Guest", back_populates="visits")
+
+class FloorTable(Base):
+    __tablename__ = "floor_tables"
+
+    id = Column(String, primary_key=True) # "<venue_key>:<table_id>"
+    venue_key = Column(String, index=True, nullable=False)
+    position = Column(Integer, default=0) # Floor layout order
+    state = Column(JSON, nullable=False) # TableData as JSON
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class GuestOrder(Base):
+    __tablename__ = "guest_orders"
+
+    id = Column(String, primary_key=True) # "<venue_key>:<order_id>"
+    guest_id = Column(String, ForeignKey("guests.id"), index=True, nullable=False)
+    version = Column(String, nullable=False) # Order version last folded into the profile
+    spend = Column(Float, default=0.0) # Spend it contributed
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class GuestMerge(Base):
+    __tablename__ = "guest_merges"
+
+    id = Column(String, primary_key=True) # Merged-away guest id
+    survivor_id = Column(String, index=True, nullable=False) # Guest it was merged into
+    score = Column(Float, nullable=True) # Best match score that linked it
+    merged_at = Column(DateTime, default=datetime.utcnow)
+    # Undo data (see guest_dedup.unmerge_guest)
+    snapshot = Column(JSON, nullable=True) # The merged-away row as it was
+    survivor_snapshot = Column(JSON, nullable=True) # The survivor's row before the merge
+    moved = Column(JSON, nullable=True) # {table: [row ids]} repointed to the survivor
@@ -0,0 +1,94 @@
+import heapq
+import itertools
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+from app.integrations.models import Order
+from app.integrations.order_registry import CLOSED_STATUSES
+from app.integrations.sections import SectionMap
+
+class BarQueue:
+    """
+    Drink tickets bucketed per bartender, maintained as orders arrive.
+
+    Subscribed to the OrderRegistry, so `/bar/queue?bartender_id=...` reads a
+    single bucket instead of scanning every order. Tickets are pre-built
+    payloads; only their status is patched on transitions.
+    """
+
+    def __init__(self, sections: SectionMap):
+        self.sections = sections
+        self._buckets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._owner: Dict[str, str] = {}  # order_id -> bartender_id
+        self._seq: Dict[str, int] = {}    # order_id -> arrival sequence
+        self._counter = itertools.count()
+        self._lock = threading.RLock()
+
+    def on_order_event(self, event: str, order: Optional[Order]):
+        """OrderRegistry listener."""
+        with self._lock:
+            if event == "cleared" or order is None:
+                self.clear()
+            elif event == "removed" or order.status in CLOSED_STATUSES:
+                self._discard(order.id)
+            elif event == "status" and order.id in self._owner:
+                self._buckets[self._owner[order.id]][order.id]["status"] = order.status
+            else:
+                self._add(order)
+
+    def tickets(self, bartender_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Live drink tickets for one bartender, or all bartenders in arrival order."""
+        with self._lock:
+            if bartender_id is not None:
+                return list(self._buckets.get(bartender_id, {}).values())
+            return list(heapq.merge(*(b.values() for b in self._buckets.values()),
+                                    key=lambda t: self._seq[t["order_id"]]))
+
+    def rebuild(self, orders: Iterable[Order]):
+        """Re-bucket all live orders (after section assignments change)."""
+        with self._lock:
+            self.clear()
+            for order in orders:
+                if order.status not in CLOSED_STATUSES:
+                    self._add(order)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._owner.clear()
+            self._seq.clear()
+
+    def _add(self, order: Order):
+        self._discard(order.id)
+        drink_items = [
+            item for item in order.items
+            if item.station and item.station.lower() == "bar"
+        ]
+        if not drink_items:
+            return
+        bartender = self.sections.for_table(order.table_number)
+        self._buckets.setdefault(bartender["id"], {})[order.id] = {
+            "order_id": order.id,
+            "table": order.table_number,
+            "status": order.status,
+            "server": order.server,
+            "bartender": bartender["name"],
+            "bartender_id": bartender["id"],
+            "created_at": order.created_at.isoformat().replace("+00:00", "Z"),
+            "items": [
+                {
+                    "item_id": item.item_id,
+                    "name": item.name,
+                    "quantity": item.quantity,
+                    "station": item.station,
+                    "course": item.course
+                } for item in drink_items
+            ]
+        }
+        self._owner[order.id] = bartender["id"]
+        self._seq[order.id] = next(self._counter)
+
+    def _discard(self, order_id: str):
+        bartender_id = self._owner.pop(order_id, None)
+        if bartender_id is not None:
+            self._buckets[bartender_id].pop(order_id, None)
+            self._seq.pop(order_id, None)
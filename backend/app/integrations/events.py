@@ -0,0 +1,108 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Topics a client can subscribe to on the push channel
+TOPICS = ("tables", "waitlist", "kitchen", "bar", "system")
+
+class Subscription:
+    """
+    One connected client (WebSocket or SSE stream).
+
+    Messages are pre-encoded JSON strings. The queue is bounded: a slow client
+    drops its oldest pending events rather than growing without limit.
+    """
+
+    def __init__(self, topics: Iterable[str], loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.topics = frozenset(topics)
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def deliver(self, message: str):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def next(self) -> str:
+        return await self.queue.get()
+
+class EventBroker:
+    """
+    In-process fan-out of change events to subscribed clients.
+
+    `publish` may be called from sync handlers (threadpool) or async handlers.
+    Each event is serialized once and the same string is handed to every
+    subscriber of its topic; nothing is encoded when nobody is listening.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        self.queue_size = queue_size
+        self.sequence = 0
+        self._subscribers: Dict[str, Set[Subscription]] = {topic: set() for topic in TOPICS}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics: Optional[Iterable[str]] = None) -> Subscription:
+        """Registers a client. Must be called from the event loop that will consume it."""
+        wanted = [t for t in (topics or TOPICS) if t in self._subscribers]
+        subscription = Subscription(wanted, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].discard(subscription)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self._subscribers.get(topic))
+
+    def subscriber_count(self, topic: Optional[str] = None) -> int:
+        if topic is not None:
+            return len(self._subscribers.get(topic, ()))
+        return len(set().union(*self._subscribers.values()))
+
+    def publish(self, topic: str, event_type: str, data: Any = None) -> int:
+        """Broadcasts an event on a topic. Returns the event sequence number."""
+        with self._lock:
+            self.sequence += 1
+            sequence = self.sequence
+            subscribers = list(self._subscribers.get(topic, ()))
+        if not subscribers:
+            return sequence
+
+        message = json.dumps({
+            "seq": sequence,
+            "topic": topic,
+            "type": event_type,
+            "ts": time.time(),
+            "data": data,
+        }, default=str)
+
+        # Batch deliveries per event loop: one thread-safe wakeup per loop
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        for loop, batch in by_loop.items():
+            if loop is current_loop:
+                _deliver_all(batch, message)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(_deliver_all, batch, message)
+        return sequence
+
+def _deliver_all(subscriptions: List[Subscription], message: str):
+    for subscription in subscriptions:
+        subscription.deliver(message)
+
+event_broker = EventBroker()
@@ -0,0 +1,276 @@
+import heapq
+import itertools
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from app.integrations.models import TableData
+from app.integrations.locks import LockStripes
+
+TABLE_FIELDS: Tuple[str, ...] = tuple(TableData.model_fields)
+
+# Fields that move a table between indexes
+INDEXED_FIELDS = frozenset(("number", "status", "capacity"))
+
+class TableState:
+    """
+    Compact, mutable live state of one table (same fields as TableData).
+
+    FloorStore mutates these in place under the table's lock instead of
+    copying a pydantic model on every seat/order/clear. List values (items)
+    are never mutated in place, only replaced, so handed-out dicts stay
+    stable. `to_dict` is cached until the next change; TableData is only
+    built at the API edge.
+    """
+
+    __slots__ = TABLE_FIELDS + ("_gen", "_cache")
+
+    def __init__(self, **fields: Any):
+        for name, field in TableData.model_fields.items():
+            value = fields[name] if name in fields else field.get_default(call_default_factory=True)
+            setattr(self, name, list(value) if isinstance(value, list) else value)
+        self._gen = 0
+        self._cache: Optional[Tuple[int, Dict[str, Any]]] = None
+
+    @classmethod
+    def from_model(cls, table: TableData) -> "TableState":
+        return cls(**{name: getattr(table, name) for name in TABLE_FIELDS})
+
+    def apply(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Set fields in place; returns their previous values."""
+        before = {name: getattr(self, name) for name in changes}
+        for name, value in changes.items():
+            setattr(self, name, value)
+        self._gen += 1
+        return before
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready dict of the current state (shared: do not mutate)."""
+        gen, cache = self._gen, self._cache
+        if cache is not None and cache[0] == gen:
+            return cache[1]
+        data = {name: getattr(self, name) for name in TABLE_FIELDS}
+        # A concurrent writer bumps _gen, so a stale dict is never reused
+        self._cache = (gen, data)
+        return data
+
+    def to_model(self) -> TableData:
+        return TableData.model_construct(**self.to_dict())
+
+    def __repr__(self) -> str:
+        return f"TableState(id={self.id!r}, number={self.number}, status={self.status!r})"
+
+TableLike = Union[TableData, TableState]
+Listener = Callable[[Optional[Dict[str, Any]], TableState], None]
+
+class FloorStore:
+    """
+    Indexed in-memory store for the live floor plan.
+
+    Tables are keyed by id with secondary indexes on table number, status and
+    capacity, so lookups and mutations stay O(1) regardless of floor size.
+    Iteration preserves the original floor layout order.
+
+    Available tables are also kept in per-capacity heaps ordered by layout
+    position, so best-fit seating is O(log T). Heap entries are invalidated
+    lazily: an entry is skipped when its table is no longer available.
+
+    Thread-safe: writes to one table are serialized on that table's lock
+    stripe (see `locked`), and a short internal latch keeps the shared
+    indexes consistent. Writers to different tables never wait on each
+    other beyond the index update itself.
+
+    Tables are stored as TableState records and updated in place; only
+    writes that change number, status or capacity touch the indexes.
+
+    `version` changes on every write (for caching encoded responses).
+
+    Listeners registered with `subscribe` are called as (before, table)
+    after every write, in write order per table. `before` maps the changed
+    fields to their previous values (None for a newly added table).
+    """
+
+    def __init__(self, tables: Iterable[TableLike] = ()):
+        self._tables: Dict[str, TableState] = {}
+        self._position: Dict[str, int] = {}
+        self._by_number: Dict[int, str] = {}
+        self._by_status: Dict[str, Set[str]] = defaultdict(set)
+        self._by_capacity: Dict[int, Set[str]] = defaultdict(set)
+        self._available: Dict[int, List[Tuple[int, str]]] = {}
+        self._capacity_list: List[int] = []
+        self.locks = LockStripes()
+        self._latch = threading.Lock()
+        self._listeners: List[Listener] = []
+        self._clock = itertools.count(1)
+        self.version = 0
+        self.load(tables)
+
+    def load(self, tables: Iterable[TableLike]):
+        """Replace the whole floor with the given tables."""
+        with self._latch:
+            self._tables.clear()
+            self._position.clear()
+            self._by_number.clear()
+            self._by_status.clear()
+            self._by_capacity.clear()
+            self._available.clear()
+            self._capacity_list.clear()
+        self.version = next(self._clock)
+        for table in tables:
+            self.put(table)
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def __iter__(self) -> Iterator[TableState]:
+        return iter(list(self._tables.values()))
+
+    def __contains__(self, table_id: str) -> bool:
+        return table_id in self._tables
+
+    def all(self) -> List[TableState]:
+        return list(self._tables.values())
+
+    def get(self, table_id: str) -> Optional[TableState]:
+        return self._tables.get(table_id)
+
+    def get_by_number(self, number: Optional[int]) -> Optional[TableState]:
+        if number is None:
+            return None
+        with self._latch:
+            table_id = self._by_number.get(number)
+            return self._tables.get(table_id) if table_id else None
+
+    def position(self, table_id: str) -> int:
+        """Floor layout position of a table (used as a stable tie-break)."""
+        return self._position[table_id]
+
+    def subscribe(self, listener: Listener):
+        self._listeners.append(listener)
+
+    def locked(self, table_id: str) -> ContextManager[None]:
+        """Hold a table's lock across a read-modify-write (re-entrant)."""
+        return self.locks.hold(table_id)
+
+    def with_status(self, status: str) -> List[TableState]:
+        with self._latch:
+            ids = set(self._by_status.get(status, ()))
+        return [self._tables[i] for i in sorted(ids, key=self._position.__getitem__)]
+
+    def with_capacity(self, capacity: int, status: Optional[str] = None) -> List[TableState]:
+        with self._latch:
+            ids = set(self._by_capacity.get(capacity, ()))
+            if status is not None:
+                ids &= self._by_status.get(status, set())
+        return [self._tables[i] for i in sorted(ids, key=self._position.__getitem__)]
+
+    def capacities(self) -> List[int]:
+        with self._latch:
+            return sorted(c for c, ids in self._by_capacity.items() if ids)
+
+    def best_available(self, min_capacity: int) -> Optional[TableState]:
+        """
+        Best fit: an available table with the smallest capacity >= min_capacity
+        (first in layout order among equals). Callers that seat the table
+        should claim it with `update(..., expect_status="available")`.
+        """
+        with self._latch:
+            for capacity in self._capacity_list[bisect_left(self._capacity_list, min_capacity):]:
+                key = self._peek_available(capacity)
+                if key is not None:
+                    return self._tables[key]
+        return None
+
+    def available_by_capacity(self) -> Dict[int, List[TableState]]:
+        """Available tables grouped by capacity, each group in layout order."""
+        return {
+            capacity: tables
+            for capacity in list(self._capacity_list)
+            if (tables := self.with_capacity(capacity, status="available"))
+        }
+
+    def put(self, table: TableLike, table_id: Optional[str] = None) -> TableState:
+        """
+        Insert or replace a table. `table_id` defaults to `table.id`; passing it
+        explicitly keeps the slot of an existing table (PUT /tables/{id}).
+        """
+        key = table_id or table.id
+        state = TableState.from_model(table) if isinstance(table, TableData) else table
+        with self.locks.hold(key):
+            with self._latch:
+                previous = self._tables.get(key)
+                if previous is not None:
+                    self._unindex(key, previous)
+                else:
+                    self._position[key] = len(self._position)
+                self._tables[key] = state
+                self._index(key, state)
+                if state.status == "available" and not (
+                    previous is not None and previous.status == "available" and previous.capacity == state.capacity
+                ):
+                    self._push_available(key, state.capacity)
+            # Stamped after the write: a reader that saw the old version rebuilds
+            self.version = next(self._clock)
+            before = previous.to_dict() if previous is not None else None
+            for listener in self._listeners:
+                listener(before, state)
+        return state
+
+    def update(self, table_id: str, expect_status: Optional[str] = None, **changes) -> Optional[TableState]:
+        """
+        Apply field changes to a table atomically, in place. Returns None if
+        the table is unknown, or if `expect_status` is given and the table is
+        not in that status (compare-and-set, e.g. claiming an available table).
+        """
+        with self.locks.hold(table_id):
+            table = self._tables.get(table_id)
+            if table is None or (expect_status is not None and table.status != expect_status):
+                return None
+            if INDEXED_FIELDS.isdisjoint(changes):
+                before = table.apply(changes)
+            else:
+                with self._latch:
+                    was_available = table.status == "available"
+                    old_capacity = table.capacity
+                    self._unindex(table_id, table)
+                    before = table.apply(changes)
+                    self._index(table_id, table)
+                    if table.status == "available" and not (was_available and old_capacity == table.capacity):
+                        self._push_available(table_id, table.capacity)
+            self.version = next(self._clock)
+            for listener in self._listeners:
+                listener(before, table)
+            return table
+
+    def _index(self, key: str, table: TableState):
+        self._by_number[table.number] = key
+        self._by_status[table.status].add(key)
+        self._by_capacity[table.capacity].add(key)
+
+    def _unindex(self, key: str, table: TableState):
+        if self._by_number.get(table.number) == key:
+            del self._by_number[table.number]
+        self._by_status[table.status].discard(key)
+        self._by_capacity[table.capacity].discard(key)
+
+    def _push_available(self, key: str, capacity: int):
+        heap = self._available.get(capacity)
+        if heap is None:
+            heap = self._available[capacity] = []
+            insort(self._capacity_list, capacity)
+        heapq.heappush(heap, (self._position[key], key))
+        # Compact when stale entries pile up
+        if len(heap) > 2 * len(self._by_capacity[capacity]) + 16:
+            live = self._by_capacity[capacity] & self._by_status.get("available", set())
+            heap[:] = [(self._position[k], k) for k in live]
+            heapq.heapify(heap)
+
+    def _peek_available(self, capacity: int) -> Optional[str]:
+        heap = self._available.get(capacity)
+        while heap:
+            _, key = heap[0]
+            table = self._tables.get(key)
+            if table is not None and table.status == "available" and table.capacity == capacity:
+                return key
+            heapq.heappop(heap)
+        return None
@@ -0,0 +1,493 @@
+import array
+import json
+import os
+import sqlite3
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from app.integrations.logic import normalize_email, normalize_phone
+from app.integrations.matching import NameMatcher, name_tokens, similarity, sorted_name, stable_hash
+
+STAGES = ("snapshot", "score", "cluster", "apply")
+
+# Survivor columns written by apply (see merge_guests)
+MERGED_COLUMNS = ("email", "phone", "email_key", "phone_key", "lifetime_spend", "velocity_history",
+                  "preferences", "vip_status", "privacy_toggle", "influence_score")
+
+# Scratch state of a run (a SQLite file next to the job, not the app database)
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    stage TEXT PRIMARY KEY, position TEXT, done INTEGER NOT NULL DEFAULT 0,
+    rows INTEGER NOT NULL DEFAULT 0, seconds REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS rows (
+    ordinal INTEGER PRIMARY KEY, id TEXT NOT NULL, name TEXT, email TEXT, phone TEXT, created REAL
+);
+CREATE TABLE IF NOT EXISTS blocks (key INTEGER NOT NULL, ordinal INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS matches (
+    a INTEGER NOT NULL, b INTEGER NOT NULL, score REAL NOT NULL, exact INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clusters (ordinal INTEGER PRIMARY KEY, survivor INTEGER NOT NULL, score REAL);
+"""
+
+def merge_guests(rows: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Folds duplicate guest rows into the first one (the survivor, the
+    earliest created); the others are taken in creation order, so newer
+    preferences win. Returns the survivor's merged columns.
+    """
+    survivor, *duplicates = rows
+    ordered = [survivor, *sorted(duplicates, key=lambda r: r.get("created_at") or datetime.min)]
+    history, seen = [], set()
+    for row in ordered:
+        for entry in row.get("velocity_history") or []:
+            marker = json.dumps(entry, sort_keys=True, default=str)
+            if marker not in seen:
+                seen.add(marker)
+                history.append(entry)
+    # [date, amount, venue] entries, oldest first
+    history.sort(key=lambda e: str(e[0]) if isinstance(e, (list, tuple)) and e else "")
+    preferences: Dict[str, Any] = {}
+    for row in ordered:
+        preferences.update(row.get("preferences") or {})
+    email = next((r["email"] for r in ordered if r.get("email")), None)
+    phone = next((r["phone"] for r in ordered if r.get("phone")), None)
+    return {
+        "email": email,
+        "phone": phone,
+        "email_key": normalize_email(email),
+        "phone_key": normalize_phone(phone),
+        "lifetime_spend": sum(r.get("lifetime_spend") or 0.0 for r in ordered),
+        "velocity_history": history,
+        "preferences": preferences,
+        "vip_status": any(r.get("vip_status") for r in ordered),
+        "privacy_toggle": any(r.get("privacy_toggle") for r in ordered),
+        "influence_score": max(r.get("influence_score") or 0 for r in ordered),
+    }
+
+def unmerge_guest(engine, guest_id: str) -> bool:
+    """
+    Undoes the merge of `guest_id` (a wrong match): the guest row is put
+    back from its `guest_merges` snapshot, the orders, visits and ledger
+    rows the merge moved are pointed at it again, and the survivor loses
+    its spend. The survivor's other merged columns are rebuilt from its
+    pre-merge snapshot and the guests merged into it then or since. Returns
+    False if the guest was not merged. A survivor that was itself merged
+    away since must be unmerged first.
+    """
+    from sqlalchemy import delete, insert, select, update
+    from app.db.models import Guest, GuestMerge
+    guests, merges = Guest.__table__, GuestMerge.__table__
+    with engine.begin() as conn:
+        merge = conn.execute(select(merges).where(merges.c.id == guest_id)).mappings().first()
+        if merge is None:
+            return False
+        survivor = conn.execute(select(guests).where(guests.c.id == merge["survivor_id"])).mappings().first()
+        if survivor is None:
+            raise ValueError(f"Survivor {merge['survivor_id']} was merged too; unmerge it first")
+        guest = _restored(merge["snapshot"])
+        later = [_restored(row.snapshot) for row in conn.execute(
+            select(merges.c.snapshot).where(merges.c.survivor_id == survivor["id"], merges.c.id != guest_id,
+                                            merges.c.merged_at >= merge["merged_at"]))]
+        rebuilt = merge_guests([_restored(merge["survivor_snapshot"]), *later])
+        # Spend added since the merge stays with the survivor
+        rebuilt["lifetime_spend"] = (survivor["lifetime_spend"] or 0.0) - (guest.get("lifetime_spend") or 0.0)
+        # The survivor gives back the email first (it is unique); one still shared
+        # with a guest merged into it stays with the survivor
+        conn.execute(update(guests).where(guests.c.id == survivor["id"]).values(**rebuilt))
+        if guest.get("email") is not None and guest["email"] == rebuilt["email"]:
+            guest["email"] = None
+        conn.execute(insert(guests), [guest])
+        _repoint(conn, [{"b_from": survivor["id"], "b_to": guest_id}], merge["moved"] or {})
+        conn.execute(delete(merges).where(merges.c.id == guest_id))
+    return True
+
+def _repoint(conn, moves: List[Dict[str, str]],
+             only: Optional[Dict[str, List[str]]] = None) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Moves orders, visits and ledger rows from guest "b_from" to "b_to"
+    (only the row ids in `only`, by table, if given). Returns the ids moved
+    per source guest and table.
+    """
+    from sqlalchemy import bindparam, select, update
+    from app.db.models import GuestOrder, Order, Visit
+    moved: Dict[str, Dict[str, List[str]]] = {}
+    for model in (Order, Visit, GuestOrder):
+        table = model.__table__
+        if only is None:
+            sources = [m["b_from"] for m in moves]
+            for row_id, guest_id in conn.execute(select(table.c.id, table.c.guest_id)
+                                                 .where(table.c.guest_id.in_(sources))):
+                moved.setdefault(guest_id, {}).setdefault(table.name, []).append(row_id)
+            conn.execute(update(table).where(table.c.guest_id == bindparam("b_from"))
+                         .values(guest_id=bindparam("b_to")), moves)
+        elif only.get(table.name):
+            for move in moves:
+                conn.execute(update(table).where(table.c.id.in_(only[table.name]),
+                                                 table.c.guest_id == move["b_from"]).values(guest_id=move["b_to"]))
+    return moved
+
+def _snapshot(row: Dict[str, Any]) -> Dict[str, Any]:
+    """A guest row as JSON (datetimes as ISO strings)."""
+    return {column: value.isoformat() if isinstance(value, datetime) else value for column, value in row.items()}
+
+def _restored(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    row = dict(snapshot)
+    if row.get("created_at"):
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+# --- Pool workers (module level so they pickle) ---
+
+_worker: Dict[str, Any] = {}
+
+def _init_worker(state_path: str, settings: Dict[str, Any]):
+    _worker["state"] = sqlite3.connect(f"file:{state_path}?mode=ro", uri=True)
+    _worker["matcher"] = NameMatcher(threshold=settings["threshold"], max_block=settings["max_block"],
+                                     max_candidates=settings["max_candidates"], hasher=stable_hash)
+
+def _prepare_chunk(rows: List[Tuple[int, str, str, Optional[str], Optional[str], Optional[datetime]]]):
+    """Normalized rows and their name blocking keys."""
+    matcher = _worker["matcher"]
+    prepared, blocks = [], []
+    for ordinal, guest_id, name, email, phone, created_at in rows:
+        name = sorted_name(name_tokens(name or ""))
+        created = created_at.replace(tzinfo=timezone.utc).timestamp() if created_at else 0.0
+        prepared.append((ordinal, guest_id, name, normalize_email(email), normalize_phone(phone), created))
+        blocks.extend((key, ordinal) for key in set(matcher.keys(name)))
+    return prepared, blocks
+
+def _score_range(bounds: Tuple[int, int]) -> Tuple[int, List[Tuple[int, int, float, bool]]]:
+    """
+    Matches (a, b, score, exact) of every row in [start, end) with later
+    rows: same email or phone (exact, 1.0), or a similar name whose
+    email/phone do not conflict.
+    """
+    db, matcher = _worker["state"], _worker["matcher"]
+    start, end = bounds
+    max_block, threshold = matcher.max_block, matcher.threshold
+    pairs = []
+    for ordinal, name, email, phone in db.execute(
+            "SELECT ordinal, name, email, phone FROM rows WHERE ordinal >= ? AND ordinal < ?", bounds).fetchall():
+        exact = set()
+        for column, value in (("email", email), ("phone", phone)):
+            if value:
+                exact.update(other for (other,) in db.execute(
+                    f"SELECT ordinal FROM rows WHERE {column} = ? AND ordinal > ? LIMIT ?",
+                    (value, ordinal, max_block)))
+        found: Dict[int, float] = dict.fromkeys(exact, 1.0)
+        hits: Counter = Counter()
+        for key in matcher.keys(name):
+            members = db.execute("SELECT ordinal FROM blocks WHERE key = ? LIMIT ?", (key, max_block + 1)).fetchall()
+            if len(members) <= max_block:
+                hits.update(other for (other,) in members if other > ordinal and other not in found)
+        candidates = [other for other, _ in hits.most_common(matcher.max_candidates)]
+        if candidates:
+            marks = ",".join("?" * len(candidates))
+            for other, other_name, other_email, other_phone in db.execute(
+                    f"SELECT ordinal, name, email, phone FROM rows WHERE ordinal IN ({marks})", candidates):
+                if (email and other_email and email != other_email) or (phone and other_phone and phone != other_phone):
+                    continue
+                longest = max(len(name), len(other_name))
+                if abs(len(name) - len(other_name)) > (1 - threshold) * longest:
+                    continue
+                score = similarity(name, other_name)
+                if score >= threshold:
+                    found[other] = score
+        pairs.extend((ordinal, other, score, other in exact) for other, score in found.items())
+    return end, pairs
+
+class GuestDedup:
+    """
+    Offline dedup of the `guests` table, in four resumable stages:
+
+      snapshot  stream guests in id order (keyset pages of `chunk` rows),
+                normalize them and compute name blocking keys in the pool,
+                into a local SQLite state file
+      score     for each guest, candidates are guests sharing its email,
+                phone or a name blocking key (NameMatcher keys, oversized
+                blocks skipped); pairs are scored in the pool
+      cluster   union-find over the matches (email/phone matches first,
+                then names by score); a match that would put two different
+                emails or phones in one cluster is refused, and so is a
+                name match between two clusters that both have contact
+                details or involving a guest whose name matches several
+                others. Each cluster's earliest created guest survives
+      apply     per batch of clusters, one transaction: orders, visits and
+                ledger rows move to the survivor, duplicates are deleted
+                and recorded in `guest_merges` (with snapshots of both
+                rows and the ids moved, so `unmerge_guest` can undo a
+                wrong merge), and the survivor gets the merged spend,
+                velocity history and preferences
+
+    Every committed chunk moves its stage's checkpoint, so an interrupted
+    run picks up where it stopped. Apply skips guests already recorded in
+    `guest_merges`, so a batch that committed just before a crash is not
+    merged twice. Run it while the API is down (or accept that profiles it
+    has cached keep their old ids until their TTL runs out).
+    """
+
+    def __init__(self, engine, state_path: str = "dedup_state.db", workers: Optional[int] = None,
+                 chunk: int = 5000, batch: int = 500, threshold: float = 0.9, max_block: int = 64,
+                 max_candidates: int = 16, log: Callable[[str], None] = print):
+        self.engine = engine
+        self.state_path = state_path
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk = chunk
+        self.batch = batch
+        self.settings = {"threshold": threshold, "max_block": max_block, "max_candidates": max_candidates}
+        self.log = log
+        self.state = sqlite3.connect(state_path)
+        self.state.execute("PRAGMA journal_mode=WAL")
+        self.state.execute("PRAGMA synchronous=NORMAL")
+        self.state.executescript(STATE_SCHEMA)
+        self._pool = None
+        self._mark = time.perf_counter()
+
+    def run(self, until: str = "apply") -> Dict[str, Dict[str, float]]:
+        """Runs (or resumes) the stages up to `until`. Returns the throughput report."""
+        try:
+            for stage in STAGES[:STAGES.index(until) + 1]:
+                if not self._progress(stage)["done"]:
+                    self._mark = time.perf_counter()
+                    getattr(self, f"_{stage}")()
+        finally:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+        return self.report()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Rows, seconds and rows/s per stage, summed over resumed runs."""
+        report = {}
+        for stage in STAGES:
+            progress = self._progress(stage)
+            seconds = progress["seconds"]
+            report[stage] = {"rows": progress["rows"], "seconds": seconds,
+                             "rate": progress["rows"] / seconds if seconds else 0.0, "done": progress["done"]}
+        return report
+
+    def close(self):
+        self.state.close()
+
+    # --- Stages ---
+
+    def _snapshot(self):
+        from sqlalchemy import select
+        from app.db.models import Guest
+        position = self._progress("snapshot")["position"]
+        ordinal = self.state.execute("SELECT COALESCE(MAX(ordinal) + 1, 0) FROM rows").fetchone()[0]
+
+        def pages() -> Iterator[list]:
+            nonlocal ordinal
+            last = position
+            with self.engine.connect() as conn:
+                while True:
+                    query = select(Guest.id, Guest.name, Guest.email, Guest.phone, Guest.created_at) \
+                        .order_by(Guest.id).limit(self.chunk)
+                    if last is not None:
+                        query = query.where(Guest.id > last)
+                    rows = conn.execute(query).all()
+                    if not rows:
+                        return
+                    last = rows[-1][0]
+                    yield [(ordinal + i, *row) for i, row in enumerate(rows)]
+                    ordinal += len(rows)
+
+        for prepared, blocks in self._map(_prepare_chunk, pages()):
+            with self.state:
+                self.state.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?)", prepared)
+                self.state.executemany("INSERT INTO blocks VALUES (?, ?)", blocks)
+                self._advance("snapshot", prepared[-1][1], len(prepared))
+        self.log("snapshot: indexing blocks")
+        with self.state:
+            self.state.execute("CREATE INDEX IF NOT EXISTS ix_blocks_key ON blocks (key)")
+            self.state.execute("CREATE INDEX IF NOT EXISTS ix_rows_email ON rows (email)")
+            self.state.execute("CREATE INDEX IF NOT EXISTS ix_rows_phone ON rows (phone)")
+            self._advance("snapshot", None, 0, done=True)
+
+    def _score(self):
+        position = self._progress("score")["position"]
+        start = int(position) if position is not None else 0
+        total = self.state.execute("SELECT COALESCE(MAX(ordinal) + 1, 0) FROM rows").fetchone()[0]
+        ranges = ((low, min(low + self.chunk, total)) for low in range(start, total, self.chunk))
+        for end, pairs in self._map(_score_range, ranges):
+            with self.state:
+                self.state.executemany("INSERT INTO matches VALUES (?, ?, ?, ?)", pairs)
+                self._advance("score", str(end), end - start)
+            start = end
+        with self.state:
+            self._advance("score", str(total), 0, done=True)
+
+    def _cluster(self):
+        total = self.state.execute("SELECT COALESCE(MAX(ordinal) + 1, 0) FROM rows").fetchone()[0]
+        created = array.array("d", bytes(8 * total))
+        # Per cluster root: hash of the cluster's email and phone (0: none yet)
+        emails, phones = array.array("q", bytes(8 * total)), array.array("q", bytes(8 * total))
+        for ordinal, value, email, phone in self.state.execute("SELECT ordinal, created, email, phone FROM rows"):
+            created[ordinal] = value or 0.0
+            emails[ordinal] = stable_hash(email) if email else 0
+            phones[ordinal] = stable_hash(phone) if phone else 0
+        # Name-only matches per guest: a guest whose name matches several others is ambiguous
+        named = array.array("l", bytes(array.array("l").itemsize * total))
+        for a, b in self.state.execute("SELECT a, b FROM matches WHERE NOT exact"):
+            named[a] += 1
+            named[b] += 1
+        parent = array.array("q", range(total))
+        best = array.array("f", bytes(4 * total))
+
+        def find(x: int) -> int:
+            root = x
+            while parent[root] != root:
+                root = parent[root]
+            while parent[x] != root:
+                parent[x], x = root, parent[x]
+            return root
+
+        def conflict(a: array.array, ra: int, rb: int) -> bool:
+            return bool(a[ra] and a[rb] and a[ra] != a[rb])
+
+        def contact(root: int) -> bool:
+            return bool(emails[root] or phones[root])
+
+        matches = refused = 0
+        # Email/phone matches first, then names by score, so name links cannot bridge two known guests
+        for a, b, score, exact in self.state.execute(
+                "SELECT a, b, score, exact FROM matches ORDER BY exact DESC, score DESC"):
+            matches += 1
+            ra, rb = find(a), find(b)
+            if ra == rb:
+                best[a], best[b] = max(best[a], score), max(best[b], score)
+                continue
+            # A name match alone joins only two guests that match no one else by name, and not two
+            # clusters with contact details but none in common (else they would be one by now)
+            if conflict(emails, ra, rb) or conflict(phones, ra, rb) or not exact and (
+                    named[a] > 1 or named[b] > 1 or contact(ra) and contact(rb)):
+                refused += 1
+                continue
+            best[a], best[b] = max(best[a], score), max(best[b], score)
+            # The earliest created guest is the root (and the survivor)
+            if (created[rb], rb) < (created[ra], ra):
+                ra, rb = rb, ra
+            parent[rb] = ra
+            emails[ra] = emails[ra] or emails[rb]
+            phones[ra] = phones[ra] or phones[rb]
+        with self.state:
+            self.state.execute("DELETE FROM clusters")
+            self.state.executemany("INSERT INTO clusters VALUES (?, ?, ?)", (
+                (ordinal, root, best[ordinal])
+                for ordinal in range(total) if (root := find(ordinal)) != ordinal
+            ))
+            self.state.execute("CREATE INDEX IF NOT EXISTS ix_clusters_survivor ON clusters (survivor)")
+            self._advance("cluster", None, matches, done=True)
+        duplicates = self.state.execute("SELECT COUNT(*) FROM clusters").fetchone()[0]
+        self.log(f"cluster: {matches:,} matches ({refused:,} refused: would join guests with "
+                 f"different contact details) -> {duplicates:,} duplicates to merge")
+
+    def _apply(self):
+        position = self._progress("apply")["position"]
+        after = int(position) if position is not None else -1
+        clusters: Dict[int, List[Tuple[int, float]]] = {}
+        for survivor, ordinal, score in self.state.execute(
+                "SELECT survivor, ordinal, score FROM clusters WHERE survivor > ? ORDER BY survivor", (after,)):
+            if survivor not in clusters and len(clusters) == self.batch:
+                self._apply_batch(clusters)
+                clusters = {}
+            clusters.setdefault(survivor, []).append((ordinal, score))
+        if clusters:
+            self._apply_batch(clusters)
+        with self.state:
+            self._advance("apply", position, 0, done=True)
+
+    def _apply_batch(self, clusters: Dict[int, List[Tuple[int, float]]]):
+        from sqlalchemy import bindparam, delete, insert, select, update
+        from app.db.models import Guest, GuestMerge
+        ordinals = list(clusters) + [o for members in clusters.values() for o, _ in members]
+        ids = dict(self._select_in("SELECT ordinal, id FROM rows WHERE ordinal IN ({})", ordinals))
+        guests = Guest.__table__
+        merged_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        merged = 0
+        with self.engine.begin() as conn:
+            rows = {row["id"]: dict(row) for row in conn.execute(
+                select(guests).where(guests.c.id.in_(list(ids.values())))).mappings()}
+            done = {row[0] for row in conn.execute(
+                select(GuestMerge.id).where(GuestMerge.id.in_(list(ids.values()))))}
+            moves, merges, survivors = [], [], []
+            for survivor, members in clusters.items():
+                survivor_row = rows.get(ids[survivor])
+                duplicates = [(rows[ids[o]], score) for o, score in members if ids[o] in rows and ids[o] not in done]
+                if survivor_row is None or not duplicates:
+                    continue  # deleted since the snapshot, or merged by an earlier run
+                survivor_id = survivor_row["id"]
+                survivors.append({"b_id": survivor_id, **{
+                    f"b_{column}": value
+                    for column, value in merge_guests([survivor_row, *(row for row, _ in duplicates)]).items()}})
+                for row, score in duplicates:
+                    moves.append({"b_from": row["id"], "b_to": survivor_id})
+                    # Both rows as they were, so the merge can be undone (see unmerge_guest)
+                    merges.append({"id": row["id"], "survivor_id": survivor_id, "score": score,
+                                   "merged_at": merged_at, "snapshot": _snapshot(row),
+                                   "survivor_snapshot": _snapshot(survivor_row)})
+            if merges:
+                moved = _repoint(conn, moves)
+                for merge in merges:
+                    merge["moved"] = moved.get(merge["id"], {})
+                conn.execute(delete(guests).where(guests.c.id.in_([m["id"] for m in merges])))
+                conn.execute(insert(GuestMerge.__table__), merges)
+                # Duplicates are gone first: the survivor may take over their (unique) email
+                conn.execute(update(guests).where(guests.c.id == bindparam("b_id")).values(**{
+                    column: bindparam(f"b_{column}", type_=guests.c[column].type) for column in MERGED_COLUMNS
+                }), survivors)
+                merged = len(merges)
+        with self.state:
+            self._advance("apply", str(max(clusters)), merged)
+        self.log(f"apply: merged {merged:,} guests into {len(survivors):,} survivors")
+
+    # --- Plumbing ---
+
+    def _map(self, fn: Callable, tasks: Iterable) -> Iterator:
+        """Results of `fn` over `tasks` in order, a window of tasks at a time (bounded memory)."""
+        if self._pool is None and self.workers > 1:
+            self._pool = Pool(self.workers, _init_worker, (self.state_path, self.settings))
+        elif self.workers <= 1:
+            _init_worker(self.state_path, self.settings)
+        window, size = [], self.workers * 2
+        for task in tasks:
+            window.append(task)
+            if len(window) == size:
+                yield from self._pool.imap(fn, window) if self._pool is not None else map(fn, window)
+                window = []
+        if window:
+            yield from self._pool.imap(fn, window) if self._pool is not None else map(fn, window)
+
+    def _progress(self, stage: str) -> Dict[str, Any]:
+        row = self.state.execute("SELECT position, done, rows, seconds FROM progress WHERE stage = ?",
+                                 (stage,)).fetchone()
+        if row is None:
+            return {"position": None, "done": 0, "rows": 0, "seconds": 0.0}
+        return {"position": row[0], "done": row[1], "rows": row[2], "seconds": row[3]}
+
+    def _advance(self, stage: str, position: Optional[str], rows: int, done: bool = False):
+        """
+        Moves a stage's checkpoint and adds `rows` and the time since the
+        last checkpoint to its totals (call inside the transaction that
+        wrote its rows).
+        """
+        now = time.perf_counter()
+        seconds, self._mark = now - self._mark, now
+        progress = self._progress(stage)
+        total_rows, total_seconds = progress["rows"] + rows, progress["seconds"] + seconds
+        self.state.execute(
+            "INSERT OR REPLACE INTO progress VALUES (?, ?, ?, ?, ?)",
+            (stage, position if position is not None else progress["position"], int(done),
+             total_rows, total_seconds))
+        if rows and not done:
+            rate = total_rows / total_seconds if total_seconds else 0.0
+            self.log(f"{stage}: {total_rows:,} rows ({rate:,.0f} rows/s)")
+
+    def _select_in(self, sql: str, values: List[Any], size: int = 500) -> Iterator[tuple]:
+        for start in range(0, len(values), size):
+            part = values[start:start + size]
+            yield from self.state.execute(sql.format(",".join("?" * len(part))), part)
@@ -0,0 +1,296 @@
+import asyncio
+import functools
+import logging
+import threading
+import uuid
+from datetime import timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.integrations.models import GuestProfile
+from app.integrations.persistence import _chunks, _upsert, _utc
+
+logger = logging.getLogger("uvicorn")
+
+# GuestReconciler lookup kind -> guests column
+KEY_COLUMNS = {"email": "email_key", "phone": "phone_key", "name": "name_key"}
+
+# Columns a GuestProfile is read from
+PROFILE_COLUMNS = ("id", "name", "email", "phone", "vip_status", "lifetime_spend", "preferences", "created_at")
+
+class GuestStore:
+    """
+    Database backing of GuestReconciler: guest profiles in the `guests`
+    table and the order ledger (orders already folded into a profile) in
+    `guest_orders`.
+
+    Reads are single indexed lookups (`lookup` by the normalized email,
+    phone or name key columns, `get` by id, `ledger` by order key) made on
+    a cache miss. Writes are write-behind like live state: the reconciler
+    records new and changed profiles, `flush` upserts them in batches and
+    `run` flushes off the event loop. Spend is written as a delta
+    (`lifetime_spend = lifetime_spend + :delta`), so processes sharing the
+    table do not overwrite each other's spend.
+    """
+
+    def __init__(self, session_factory: Optional[Callable] = None, batch_size: int = 500,
+                 max_pending: int = 2000):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._new: Dict[str, Dict[str, Any]] = {}        # profile id -> full row (not inserted yet)
+        self._changed: Dict[str, Dict[str, Any]] = {}    # profile id -> columns + spend "delta"
+        self._ledger: Dict[str, Dict[str, Any]] = {}     # order key -> ledger row
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._new) + len(self._changed) + len(self._ledger)
+
+    def is_pending(self, profile_id: Any) -> bool:
+        """True while a profile has unwritten changes (its cached copy is the truth)."""
+        key = str(profile_id)
+        return key in self._new or key in self._changed
+
+    def _session(self):
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    # --- Reads (cache misses) ---
+
+    def lookup(self, keys: Dict[str, str]) -> Dict[str, Tuple[GuestProfile, float]]:
+        """
+        Earliest created profile per lookup key ({"email": key, ...}), as
+        (profile, created timestamp). Kinds without a match are left out.
+        One round trip: an index seek per key, combined with UNION ALL.
+        """
+        if not keys:
+            return {}
+        db = self._session()
+        try:
+            rows = db.execute(_lookup_statement(tuple(keys)), keys).all()
+        finally:
+            db.close()
+        return {row.kind: _profile_from_row(row) for row in rows}
+
+    def get(self, profile_id: Any) -> Optional[Tuple[GuestProfile, float]]:
+        from sqlalchemy import select
+        from app.db.models import Guest
+        db = self._session()
+        try:
+            row = db.execute(select(*_columns(Guest)).where(Guest.id == str(profile_id))).first()
+        finally:
+            db.close()
+        return _profile_from_row(row) if row is not None else None
+
+    def ledger(self, order_key: str) -> Optional[Tuple[str, str, float]]:
+        """(profile id, version, spend) an order was last applied with."""
+        from app.db.models import GuestOrder
+        if order_key in self._ledger:
+            row = self._ledger[order_key]
+            return _profile_id(row["guest_id"]), row["version"], row["spend"]
+        db = self._session()
+        try:
+            row = db.query(GuestOrder.guest_id, GuestOrder.version, GuestOrder.spend) \
+                .filter(GuestOrder.id == order_key).first()
+        finally:
+            db.close()
+        return (_profile_id(row[0]), row[1], row[2] or 0.0) if row is not None else None
+
+    # --- Change hooks (no I/O) ---
+
+    def created(self, profile: GuestProfile, keys: Dict[str, Optional[str]], created_at: float):
+        with self._lock:
+            self._new[str(profile.id)] = {
+                **_profile_row(profile, keys),
+                "lifetime_spend": profile.lifetime_spend,
+                "created_at": _utc(created_at),
+            }
+        self._maybe_wake()
+
+    def changed(self, profile: GuestProfile, keys: Dict[str, Optional[str]], spend: float = 0.0):
+        """A profile's fields changed and `spend` was added to its lifetime spend."""
+        profile_id = str(profile.id)
+        with self._lock:
+            row = self._new.get(profile_id)
+            if row is not None:
+                # Not inserted yet: the row is written whole
+                row.update(_profile_row(profile, keys), lifetime_spend=profile.lifetime_spend)
+            else:
+                delta = self._changed.get(profile_id, {}).get("delta", 0.0) + spend
+                self._changed[profile_id] = {**_profile_row(profile, keys), "delta": delta}
+        self._maybe_wake()
+
+    def applied(self, order_key: str, profile_id: Any, version: str, spend: float):
+        with self._lock:
+            self._ledger[order_key] = {
+                "id": order_key, "guest_id": str(profile_id), "version": version, "spend": spend,
+            }
+        self._maybe_wake()
+
+    def _maybe_wake(self):
+        if self._wakeup is not None and self.pending >= self.max_pending:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # --- Flushing ---
+
+    async def run(self, interval: float = 1.0):
+        """Background loop: flush on the interval or when the size threshold is hit."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                if self.pending:
+                    await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Guest profile flush failed: {e}")
+
+    def flush(self) -> int:
+        """
+        Writes all pending profiles and ledger rows in one transaction.
+        Returns the number of rows written. On failure the changes are
+        queued again, merged with any made meanwhile.
+        """
+        with self._flush_lock:
+            with self._lock:
+                new, self._new = self._new, {}
+                changed, self._changed = self._changed, {}
+                ledger, self._ledger = self._ledger, {}
+            try:
+                return self._write(list(new.values()), list(changed.values()), list(ledger.values()))
+            except Exception:
+                with self._lock:
+                    for profile_id, row in new.items():
+                        later = self._changed.pop(profile_id, None)
+                        if later is not None:
+                            spend = row["lifetime_spend"] + later.pop("delta")
+                            row = {**row, **later, "lifetime_spend": spend}
+                        self._new[profile_id] = row
+                    for profile_id, row in changed.items():
+                        later = self._changed.get(profile_id)
+                        if later is not None:
+                            later["delta"] += row["delta"]
+                        else:
+                            self._changed[profile_id] = row
+                    self._ledger = {**ledger, **self._ledger}
+                raise
+
+    def _write(self, new: List[Dict[str, Any]], changed: List[Dict[str, Any]],
+               ledger: List[Dict[str, Any]]) -> int:
+        from sqlalchemy import bindparam, func, insert, update
+        from app.db.models import Guest, GuestOrder
+        guests = Guest.__table__
+        set_changed = update(guests).where(guests.c.id == bindparam("b_id")).values(
+            name=bindparam("b_name"),
+            # A taken email is not written (the column is unique); the key still is
+            email=func.coalesce(bindparam("b_email", type_=guests.c.email.type), guests.c.email),
+            phone=bindparam("b_phone"),
+            vip_status=bindparam("b_vip_status"),
+            preferences=bindparam("b_preferences", type_=guests.c.preferences.type),
+            email_key=bindparam("b_email_key"),
+            phone_key=bindparam("b_phone_key"),
+            name_key=bindparam("b_name_key"),
+            lifetime_spend=func.coalesce(guests.c.lifetime_spend, 0.0) + bindparam("b_delta"),
+        )
+        now = _utc(None)
+        db = self._session()
+        try:
+            for batch in _chunks(new, self.batch_size):
+                db.execute(insert(guests), _free_emails(db, Guest, batch))
+            for batch in _chunks(changed, self.batch_size):
+                db.execute(set_changed, [
+                    {f"b_{column}": value for column, value in row.items()}
+                    for row in _free_emails(db, Guest, batch)
+                ])
+            for batch in _chunks(ledger, self.batch_size):
+                _upsert(db, GuestOrder, [{**row, "updated_at": now} for row in batch])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return len(new) + len(changed) + len(ledger)
+
+    # --- Startup ---
+
+    def schema_ready(self) -> bool:
+        """False if the database predates the guest lookup keys (run migrations)."""
+        from sqlalchemy import inspect
+        db = self._session()
+        try:
+            inspector = inspect(db.get_bind())
+            return inspector.has_table("guest_orders") and \
+                "email_key" in {c["name"] for c in inspector.get_columns("guests")}
+        finally:
+            db.close()
+
+def _columns(model) -> List[Any]:
+    return [getattr(model, column) for column in PROFILE_COLUMNS]
+
+@functools.lru_cache(maxsize=None)
+def _lookup_statement(kinds: Tuple[str, ...]):
+    """Per-kind index seeks for the earliest profile, built once per kind combination."""
+    from sqlalchemy import bindparam, literal, select, union_all
+    from app.db.models import Guest
+    seeks = [
+        select(literal(kind).label("kind"), *_columns(Guest))
+        .where(getattr(Guest, KEY_COLUMNS[kind]) == bindparam(kind))
+        .order_by(Guest.created_at, Guest.id).limit(1).subquery().select()
+        for kind in kinds
+    ]
+    return seeks[0] if len(seeks) == 1 else union_all(*seeks)
+
+def _profile_row(profile: GuestProfile, keys: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    return {
+        "id": str(profile.id),
+        "name": profile.name,
+        "email": profile.email,
+        "phone": profile.phone,
+        "vip_status": profile.vip_status,
+        "preferences": dict(profile.preferences),
+        **{KEY_COLUMNS[kind]: keys.get(kind) for kind in KEY_COLUMNS},
+    }
+
+def _profile_id(raw: str) -> Any:
+    """GuestProfile ids are UUIDs (rows written elsewhere may use other strings)."""
+    try:
+        return uuid.UUID(raw)
+    except ValueError:
+        return raw
+
+def _profile_from_row(row: Any) -> Tuple[GuestProfile, float]:
+    # Not validated: non-UUID ids are kept as they are
+    profile = GuestProfile.model_construct(
+        id=_profile_id(row.id),
+        name=row.name,
+        email=row.email,
+        phone=row.phone,
+        vip_status=bool(row.vip_status),
+        dietary_restrictions=[],
+        lifetime_spend=row.lifetime_spend or 0.0,
+        preferences=dict(row.preferences or {}),
+    )
+    created = row.created_at.replace(tzinfo=timezone.utc).timestamp() if row.created_at else 0.0
+    return profile, created
+
+def _free_emails(db, model, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drops emails another guest row already holds (the reconciler keys on email_key)."""
+    emails = [r["email"] for r in rows if r.get("email")]
+    if not emails:
+        return rows
+    taken = dict(db.query(model.email, model.id).filter(model.email.in_(emails)))
+    return [
+        {**r, "email": None} if r.get("email") in taken and taken[r["email"]] != r["id"] else r
+        for r in rows
+    ]
+
+guest_store = GuestStore()
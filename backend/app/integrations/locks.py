@@ -0,0 +1,30 @@
+import threading
+from contextlib import contextmanager
+from typing import Hashable, Iterator, List
+
+class LockStripes:
+    """
+    Fixed pool of re-entrant locks; a key always maps to the same stripe.
+
+    Used to serialize read-modify-write on one table or one order without a
+    store-wide lock: writers to different keys almost never contend, and
+    memory stays constant no matter how many keys there are. `hold` takes
+    several stripes in index order so multi-key writers cannot deadlock.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self._locks: List[threading.RLock] = [threading.RLock() for _ in range(stripes)]
+
+    def for_key(self, key: Hashable) -> threading.RLock:
+        return self._locks[hash(key) % len(self._locks)]
+
+    @contextmanager
+    def hold(self, *keys: Hashable) -> Iterator[None]:
+        indexes = sorted({hash(key) % len(self._locks) for key in keys})
+        for index in indexes:
+            self._locks[index].acquire()
+        try:
+            yield
+        finally:
+            for index in reversed(indexes):
+                self._locks[index].release()
@@ -1,24 +1,191 @@
-from typing import List, Optional
-from app.integrations.models import GuestProfile
+import asyncio
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+from app.integrations.models import GuestProfile, Order
+from app.integrations.matching import NameMatcher
 from uuid import uuid4
 
+if TYPE_CHECKING:
+    from app.integrations.guest_store import GuestStore
+
+logger = logging.getLogger("uvicorn")
+
+NON_DIGITS = re.compile(r"\D")
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email or None
+
+def normalize_phone(phone: Optional[str], default_country: str = "1") -> Optional[str]:
+    """
+    E.164 ("+15555550123"). Numbers without a country code get
+    `default_country` (10 digits, NANP); a leading "00" is an international
+    prefix.
+    """
+    if not phone:
+        return None
+    raw = str(phone).strip()
+    digits = NON_DIGITS.sub("", raw)
+    if not digits:
+        return None
+    if raw.startswith("+"):
+        return f"+{digits}"
+    if digits.startswith("00"):
+        return f"+{digits[2:]}"
+    if len(digits) == 10 and default_country:
+        return f"+{default_country}{digits}"
+    return f"+{digits}"
+
+def normalize_name(name: Optional[str]) -> str:
+    return " ".join((name or "").split()).casefold()
+
+def order_guest_data(order: Order) -> Dict[str, Any]:
+    """Guest data carried by an order (mocked: the POS has no guest yet)."""
+    return {
+        "name": f"Guest {order.table_number}",
+        "spend": 0.0 if order.status == "voided" else order.total_amount,
+        "preferences": {"last_order": [i.name for i in order.items]},
+    }
+
+def order_version(order: Order) -> Tuple:
+    """What reconciliation depends on: a change here re-applies the order."""
+    return (order.status == "voided", order.total_amount,
+            tuple((i.item_id, i.quantity) for i in order.items))
+
+class AppliedOrder(NamedTuple):
+    """An order already folded into a guest profile."""
+    profile_id: Any
+    version: str
+    spend: float
+
 class GuestReconciler:
-    def __init__(self):
-        # In memory store for now
-        self.profiles: List[GuestProfile] = []
+    """
+    Guest identity resolution: matches incoming guest data to a profile by
+    email, phone or name, merging into it or creating a new one.
+
+    Lookups go through hash indexes on normalized email (case-insensitive),
+    phone (E.164) and name (case- and whitespace-insensitive), so matching
+    is O(1) however many profiles exist. Precedence is that of the original
+    scan over `profiles`: the earliest created profile matching on any of
+    the three wins.
+
+    With a `matcher` (fuzzy mode), a guest with no exact match is matched
+    by name similarity instead ("Anderson, Robert" -> "Robert Anderson"),
+    unless the candidate's email or phone contradicts the incoming one.
+
+    Orders are folded in with `reconcile_order`, keyed by order id: an
+    order is applied once, and only its spend delta is applied again when
+    its total changes (POS polls and webhook retries are no-ops).
+
+    Once `attach`ed to a GuestStore, profiles and the order ledger live in
+    the database and this object is a bounded cache of them: at most
+    `max_profiles` profiles (the least recently used, i.e. not the guests
+    currently seated or arriving, are evicted first), and a lookup key is
+    trusted for `ttl` seconds before the store is asked again. A cold
+    lookup is one indexed query per key; changes are handed to the store,
+    which writes them in batches. Fuzzy matching then only considers
+    profiles this process has seen.
+
+    Store-backed reconciliation can hit the database, so order events
+    (`on_order_event`, called under the OrderRegistry lock) only queue the
+    order's latest state; `run` applies the queue off the event loop.
+    """
+
+    def __init__(self, default_country: str = "1", matcher: Optional[NameMatcher] = None,
+                 max_orders: int = 200_000, max_profiles: int = 50_000, ttl: float = 300.0):
+        self.default_country = default_country
+        self.matcher = matcher
+        self.max_orders = max_orders
+        self.max_profiles = max_profiles
+        self.ttl = ttl
+        self.store: Optional["GuestStore"] = None
+        self._profiles: "OrderedDict[Any, GuestProfile]" = OrderedDict()  # id -> profile, least recently used first
+        self._rank: Dict[Any, Tuple[float, int]] = {}  # profile id -> (created at, sequence)
+        self._sequence = itertools.count()
+        self._applied: "OrderedDict[str, AppliedOrder]" = OrderedDict()  # "<venue>:<order id>" -> applied
+        self._by_email: Dict[str, List[GuestProfile]] = {}
+        self._by_phone: Dict[str, List[GuestProfile]] = {}
+        self._by_name: Dict[str, List[GuestProfile]] = {}
+        self._indexes = {"email": self._by_email, "phone": self._by_phone, "name": self._by_name}
+        self._resolved: "OrderedDict[Tuple[str, str], float]" = OrderedDict()  # (kind, key) -> store last asked
+        self._entries: Dict[int, Any] = {}  # matcher entry -> profile id
+        self._entry_of: Dict[Any, Tuple[int, str]] = {}  # profile id -> (matcher entry, name indexed)
+        self._entry_ids = itertools.count()
+        self._lock = threading.RLock()
+        self._queued: "OrderedDict[str, Tuple[str, Order]]" = OrderedDict()  # "<venue>:<order id>" -> latest
+        self._queue_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def profiles(self) -> List[GuestProfile]:
+        """Profiles held in memory (all of them without a store)."""
+        with self._lock:
+            return list(self._profiles.values())
+
+    def attach(self, store: "GuestStore"):
+        """Back profiles and the order ledger with `store` (what is already in memory is written to it)."""
+        with self._lock:
+            if store is self.store:
+                return
+            self.store = store
+            for profile in self._profiles.values():
+                store.created(profile, self._keys(profile), self._rank[profile.id][0])
+            for key, applied in self._applied.items():
+                store.applied(key, *applied)
+            self._evict()
+
+    def add(self, profile: GuestProfile, created: Optional[float] = None) -> GuestProfile:
+        """Register an existing profile (e.g. loaded from storage)."""
+        with self._lock:
+            if profile.id in self._profiles:
+                self._drop(self._profiles[profile.id])
+            self._rank[profile.id] = (time.time() if created is None else created, next(self._sequence))
+            self._profiles[profile.id] = profile
+            for kind, key in self._keys(profile).items():
+                self._index(self._indexes[kind], key, profile)
+            self._match_index(profile)
+        return profile
+
+    def load(self, profiles: Iterable[GuestProfile]):
+        for profile in profiles:
+            self.add(profile)
 
     def find_profile(self, name: str, email: Optional[str] = None, phone: Optional[str] = None) -> Optional[GuestProfile]:
         """
-        Finds a profile based on email, phone, or name similarity.
+        Finds a profile based on email, phone, or name.
         """
-        for profile in self.profiles:
-            if email and profile.email == email:
-                return profile
-            if phone and profile.phone == phone:
-                return profile
-            # simplistic name match
-            if profile.name.lower() == name.lower():
-                return profile
+        keys = {"email": normalize_email(email), "phone": self._phone_key(phone), "name": normalize_name(name)}
+        keys = {kind: key for kind, key in keys.items() if key}
+        with self._lock:
+            if self.store is not None:
+                self._resolve(keys)
+            candidates = [hits[0] for kind, key in keys.items() if (hits := self._indexes[kind].get(key))]
+            if candidates:
+                return self._touch(min(candidates, key=lambda p: self._rank[p.id]))
+            if self.matcher is not None:
+                return self.fuzzy_match(name, email, phone)
+            return None
+
+    def fuzzy_match(self, name: str, email: Optional[str] = None, phone: Optional[str] = None) -> Optional[GuestProfile]:
+        """Most similar profile by name whose email/phone do not conflict."""
+        email, phone = normalize_email(email), self._phone_key(phone)
+        with self._lock:
+            for entry, _ in self.matcher.match(name, self._entry_name):
+                profile = self._profiles.get(self._entries.get(entry))
+                if profile is None:
+                    continue  # evicted
+                if email and profile.email and normalize_email(profile.email) != email:
+                    continue
+                if phone and profile.phone and self._phone_key(profile.phone) != phone:
+                    continue
+                return self._touch(profile)
         return None
 
     def reconcile(self, incoming_data: dict) -> GuestProfile:
@@ -28,35 +195,261 @@ class GuestReconciler:
         name = incoming_data.get("name", "Unknown Guest")
         email = incoming_data.get("email")
         phone = incoming_data.get("phone")
-        
+
         # Ensure name is a string for find_profile
         if not isinstance(name, str):
             name = "Unknown Guest"
-        
-        profile = self.find_profile(name, email, phone)
-        
-        if not profile:
-            # Create new
-            profile = GuestProfile(
-                id=uuid4(),
-                name=name,
-                email=email,
-                phone=phone,
-                vip_status=incoming_data.get("vip_status", False),
-                preferences=incoming_data.get("preferences", {})
-            )
-            self.profiles.append(profile)
-        else:
-            # Update existing
-            if email: profile.email = email
-            if phone: profile.phone = phone
-            # Merge preferences
-            if "preferences" in incoming_data:
-                profile.preferences.update(incoming_data["preferences"])
-            # Update spend
-            if "spend" in incoming_data:
-                profile.lifetime_spend += incoming_data["spend"]
-                
+
+        with self._lock:
+            profile = self.find_profile(name, email, phone)
+
+            if not profile:
+                # Create new
+                profile = self.add(GuestProfile(
+                    id=uuid4(),
+                    name=name,
+                    email=email,
+                    phone=phone,
+                    vip_status=incoming_data.get("vip_status", False),
+                    lifetime_spend=incoming_data.get("spend", 0.0),
+                    preferences=incoming_data.get("preferences", {})
+                ))
+                if self.store is not None:
+                    self.store.created(profile, self._keys(profile), self._rank[profile.id][0])
+                    self._evict()
+            else:
+                # Update existing (and move it in the indexes)
+                before = self._keys(profile)
+                if email:
+                    profile.email = email
+                if phone:
+                    profile.phone = phone
+                keys = self._keys(profile)
+                self._reindex("email", before["email"], keys["email"], profile)
+                self._reindex("phone", before["phone"], keys["phone"], profile)
+                # Merge preferences
+                if "preferences" in incoming_data:
+                    profile.preferences.update(incoming_data["preferences"])
+                # Update spend
+                if "spend" in incoming_data:
+                    profile.lifetime_spend += incoming_data["spend"]
+                if self.store is not None:
+                    self.store.changed(profile, keys, incoming_data.get("spend", 0.0))
+
         return profile
 
-reconciler = GuestReconciler()
+    def reconcile_order(self, order: Order, venue_key: str = "") -> Optional[GuestProfile]:
+        """
+        Folds an order into its guest's profile, idempotently. Returns the
+        profile if anything changed, None if this version was already applied.
+        """
+        key = f"{venue_key}:{order.id}"
+        version = repr(order_version(order))
+        with self._lock:
+            applied = self._applied.get(key)
+            if applied is None and self.store is not None:
+                found = self.store.ledger(key)
+                applied = AppliedOrder(*found) if found is not None else None
+            if applied is not None and applied.version == version:
+                self._remember(key, applied)
+                return None
+            data = order_guest_data(order)
+            profile = self._get(applied.profile_id) if applied is not None else None
+            if profile is None:
+                profile = self.reconcile(data)
+            else:
+                # Same guest as before; only the difference is new spend
+                delta = data["spend"] - applied.spend
+                profile.lifetime_spend += delta
+                profile.preferences.update(data["preferences"])
+                if self.store is not None:
+                    self.store.changed(profile, self._keys(profile), delta)
+            self._remember(key, AppliedOrder(profile.id, version, data["spend"]))
+            if self.store is not None:
+                self.store.applied(key, profile.id, version, data["spend"])
+        return profile
+
+    def on_order_event(self, venue_key: str, event: str, order: Optional[Order]):
+        """
+        OrderRegistry listener: new, re-fetched and voided orders are
+        reconciled. Without a store that is in-memory work done right away;
+        with one, the order is queued for `run` (no I/O under the registry
+        lock or on the event loop).
+        """
+        if event not in ("added", "status"):
+            return
+        if self.store is None:
+            self.reconcile_order(order, venue_key)
+            return
+        key = f"{venue_key}:{order.id}"
+        with self._queue_lock:
+            wake = not self._queued
+            self._queued[key] = (venue_key, order)
+        if wake and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    @property
+    def queued(self) -> int:
+        return len(self._queued)
+
+    def drain(self) -> int:
+        """
+        Reconciles every queued order (latest state of each). Returns the
+        number reconciled. Safe to call from a worker thread.
+        """
+        with self._queue_lock:
+            queued, self._queued = self._queued, OrderedDict()
+        for venue_key, order in queued.values():
+            try:
+                self.reconcile_order(order, venue_key)
+            except Exception as e:
+                logger.error(f"Guest reconciliation failed for order {order.id}: {e}")
+        return len(queued)
+
+    async def run(self, interval: float = 1.0):
+        """Background loop: reconciles queued orders off the event loop as they arrive."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                if self._queued:
+                    await asyncio.to_thread(self.drain)
+        finally:
+            self._wakeup = None
+
+    def _remember(self, key: str, applied: AppliedOrder):
+        self._applied[key] = applied
+        self._applied.move_to_end(key)
+        # Orders this old have long left the POS feed (a store still has them)
+        while len(self._applied) > self.max_orders:
+            self._applied.popitem(last=False)
+
+    def _phone_key(self, phone: Optional[str]) -> Optional[str]:
+        return normalize_phone(phone, self.default_country)
+
+    def _keys(self, profile: GuestProfile) -> Dict[str, Optional[str]]:
+        return {
+            "email": normalize_email(profile.email),
+            "phone": self._phone_key(profile.phone),
+            "name": normalize_name(profile.name) or None,
+        }
+
+    def _entry_name(self, entry: int) -> str:
+        profile = self._profiles.get(self._entries.get(entry))
+        return profile.name if profile is not None else ""
+
+    def _match_index(self, profile: GuestProfile):
+        if self.matcher is None or profile.id in self._entry_of:
+            return
+        entry = next(self._entry_ids)
+        self.matcher.add(entry, profile.name)
+        self._entries[entry] = profile.id
+        self._entry_of[profile.id] = (entry, profile.name)
+
+    def _match_unindex(self, profile_id: Any):
+        found = self._entry_of.pop(profile_id, None)
+        if found is not None:
+            entry, name = found
+            self.matcher.remove(entry, name)
+            del self._entries[entry]
+
+    def _index(self, index: Dict[str, List[GuestProfile]], key: Optional[str], profile: GuestProfile):
+        if not key:
+            return
+        hits = index.setdefault(key, [])
+        # Keep creation order so hits[0] is the profile the scan would find first
+        rank = self._rank[profile.id]
+        at = len(hits)
+        while at and self._rank[hits[at - 1].id] > rank:
+            at -= 1
+        hits.insert(at, profile)
+
+    def _unindex(self, kind: str, key: Optional[str], profile: GuestProfile):
+        index = self._indexes[kind]
+        if key and (hits := index.get(key)):
+            hits[:] = [p for p in hits if p is not profile]
+            if not hits:
+                del index[key]
+        # The earliest profile for this key is no longer known
+        self._resolved.pop((kind, key), None)
+
+    def _reindex(self, kind: str, old: Optional[str], new: Optional[str], profile: GuestProfile):
+        if old == new:
+            return
+        self._unindex(kind, old, profile)
+        self._index(self._indexes[kind], new, profile)
+
+    # --- Store-backed cache ---
+
+    def _resolve(self, keys: Dict[str, str]):
+        """Asks the store about lookup keys not checked within `ttl`."""
+        now = time.monotonic()
+        stale = {kind: key for kind, key in keys.items()
+                 if (at := self._resolved.get((kind, key))) is None or now - at >= self.ttl}
+        if not stale:
+            return
+        for profile, created in self.store.lookup(stale).values():
+            cached = self._profiles.get(profile.id)
+            if cached is None:
+                self.add(profile, created)
+            elif not self.store.is_pending(profile.id):
+                self._refresh(cached, profile)
+        for kind, key in stale.items():
+            self._resolved[(kind, key)] = now
+            self._resolved.move_to_end((kind, key))
+        while len(self._resolved) > 3 * self.max_profiles:
+            self._resolved.popitem(last=False)
+        self._evict()
+
+    def _refresh(self, cached: GuestProfile, fresh: GuestProfile):
+        """Updates a cached profile in place from its stored row."""
+        before = self._keys(cached)
+        for field in GuestProfile.model_fields:
+            setattr(cached, field, getattr(fresh, field))
+        for kind, key in self._keys(cached).items():
+            self._reindex(kind, before[kind], key, cached)
+        if cached.id in self._entry_of and self._entry_of[cached.id][1] != cached.name:
+            self._match_unindex(cached.id)
+            self._match_index(cached)
+
+    def _get(self, profile_id: Any) -> Optional[GuestProfile]:
+        profile = self._profiles.get(profile_id)
+        if profile is not None or self.store is None:
+            return profile
+        found = self.store.get(profile_id)
+        if found is None:
+            return None
+        profile = self.add(*found)
+        self._evict()
+        return profile
+
+    def _touch(self, profile: GuestProfile) -> GuestProfile:
+        if self.store is not None:
+            self._profiles.move_to_end(profile.id)
+        return profile
+
+    def _evict(self):
+        if self.store is None:
+            return
+        for _ in range(len(self._profiles) - self.max_profiles):
+            profile_id, profile = next(iter(self._profiles.items()))
+            if self.store.is_pending(profile_id):
+                self._profiles.move_to_end(profile_id)  # kept until written
+            else:
+                self._drop(profile)
+
+    def _drop(self, profile: GuestProfile):
+        for kind, key in self._keys(profile).items():
+            self._unindex(kind, key, profile)
+        self._match_unindex(profile.id)
+        del self._profiles[profile.id]
+        del self._rank[profile.id]
+
+reconciler = GuestReconciler(
+    matcher=NameMatcher() if os.getenv("GUEST_FUZZY_MATCHING", "").lower() in ("1", "true", "yes") else None
+)
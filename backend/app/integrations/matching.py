@@ -0,0 +1,213 @@
+import hashlib
+import re
+from collections import Counter
+from typing import Callable, Dict, FrozenSet, Hashable, List, Optional, Sequence, Tuple, Union
+
+# Letter runs and digit runs ("Guest 12", "Guest12" -> "guest", "12")
+NAME_TOKENS = re.compile(r"[^\W\d_]+|\d+")
+NUMBERS = re.compile(r"\d+")
+
+# Soundex digit per letter (vowels, h, w, y: none)
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+# Empty MinHash bin (no trigram hashed into it)
+EMPTY_BIN = 1 << 64
+
+def name_tokens(name: str) -> List[str]:
+    """Lowercase letter and digit runs: "Anderson, Robert" -> ["anderson", "robert"]."""
+    return NAME_TOKENS.findall(name.casefold())
+
+def soundex(token: str) -> str:
+    """
+    Soundex, except that the first letter is coded too (so "Cason" and
+    "Kason", "Phil" and "Fil" agree).
+    """
+    if not token:
+        return ""
+    previous = SOUNDEX_CODES.get(token[0], "")
+    code = previous or token[0].upper()
+    for char in token[1:]:
+        digit = SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+def trigrams(tokens: Sequence[str]) -> FrozenSet[str]:
+    """Padded character trigrams of every token (word order does not matter)."""
+    grams = set()
+    for token in tokens:
+        padded = f"${token}$"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+def sorted_name(tokens: Sequence[str]) -> str:
+    return " ".join(sorted(tokens))
+
+def stable_hash(value: Hashable) -> int:
+    """Signed 64-bit hash of a str or tuple of str/int, the same in every process and run."""
+    return int.from_bytes(hashlib.blake2b(repr(value).encode(), digest_size=8).digest(), "big", signed=True)
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance (bit-parallel, Myers/Hyyro): O(len(a)) integer operations."""
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if not m:
+        return len(a)
+    peq: Dict[str, int] = {}
+    for i, char in enumerate(b):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    mask, last = (1 << m) - 1, 1 << (m - 1)
+    pv, mv, distance = mask, 0, m
+    for char in a:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & mask
+        mh = pv & xh
+        if ph & last:
+            distance += 1
+        elif mh & last:
+            distance -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return distance
+
+def similarity(a: str, b: str) -> float:
+    """
+    1 - normalized edit distance of two token-sorted names (1.0 = same).
+    Names whose numbers differ ("guest 5", "guest 7") score 0.0: one edit
+    apart, but different guests.
+    """
+    if not a or not b or NUMBERS.findall(a) != NUMBERS.findall(b):
+        return 0.0
+    return 1 - levenshtein(a, b) / max(len(a), len(b))
+
+class NameMatcher:
+    """
+    Fuzzy name matching over a large, growing set of names.
+
+    Comparing an incoming name against every profile does not scale, so
+    each name is filed under a few blocking keys and only names sharing a
+    key are scored:
+      - the token-sorted name ("anderson robert"): reordered names
+      - the sorted Soundex codes of its tokens: spelling variants
+      - each token with the Soundex code, and separately the initial, of
+        the other tokens: a typo confined to one token
+      - MinHash LSH bands over its trigrams: typos
+    Candidates are ranked by how many keys they share, at most
+    `max_candidates` are scored (normalized edit distance of the
+    token-sorted names), and those at or above `threshold` are returned
+    best first. Blocks larger than `max_block` (very common names) are
+    skipped as uninformative.
+
+    Entries are ids chosen by the caller (e.g. positions in a profile
+    list); `name_of` maps them back to names for scoring, so names are not
+    stored twice.
+
+    Keys come from `hasher` (built-in `hash` by default). Keys that are
+    stored or shared between processes need a stable one (`stable_hash`).
+    """
+
+    def __init__(self, threshold: float = 0.85, bands: int = 5, rows: int = 3,
+                 max_block: int = 64, max_candidates: int = 32,
+                 hasher: Callable[[Hashable], int] = hash):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.max_block = max_block
+        self.max_candidates = max_candidates
+        self.hasher = hasher
+        # Blocking key hash -> id, or list of ids once shared (most keys hold one)
+        self._blocks: Dict[int, Union[int, List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def keys(self, name: str) -> List[int]:
+        tokens = sorted(name_tokens(name))
+        if not tokens:
+            return []
+        hasher = self.hasher
+        codes = [soundex(t) for t in tokens]
+        keys = [hasher(("sorted", *tokens)), hasher(("soundex", *sorted(codes)))]
+        if len(tokens) > 1:
+            for i, token in enumerate(tokens):
+                others = [j for j in range(len(tokens)) if j != i]
+                keys.append(hasher(("token", token, *sorted(codes[j] for j in others))))
+                keys.append(hasher(("initial", token, *sorted(tokens[j][0] for j in others))))
+        # One-permutation MinHash: each trigram hash lands in one bin, a bin
+        # keeps its minimum, and every `rows` bins form one band key
+        bins = self.bands * self.rows
+        signature = [EMPTY_BIN] * bins
+        for gram in trigrams(tokens):
+            h = hasher(gram) & 0xFFFFFFFFFFFFFFFF
+            slot = h % bins
+            if h < signature[slot]:
+                signature[slot] = h
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            if EMPTY_BIN not in rows:
+                keys.append(hasher(("band", band, *rows)))
+        return keys
+
+    def add(self, entry_id: int, name: str):
+        for key in self.keys(name):
+            held = self._blocks.get(key)
+            if held is None:
+                self._blocks[key] = entry_id
+            elif isinstance(held, list):
+                held.append(entry_id)
+            elif held != entry_id:
+                self._blocks[key] = [held, entry_id]
+
+    def remove(self, entry_id: int, name: str):
+        """Forgets an entry (`name` as it was added)."""
+        for key in self.keys(name):
+            held = self._blocks.get(key)
+            if held == entry_id:
+                del self._blocks[key]
+            elif isinstance(held, list) and entry_id in held:
+                held.remove(entry_id)
+                if len(held) == 1:
+                    self._blocks[key] = held[0]
+
+    def candidates(self, name: str) -> List[int]:
+        """Ids sharing a blocking key with `name`, most shared keys first."""
+        hits: Counter = Counter()
+        for key in self.keys(name):
+            held = self._blocks.get(key)
+            if held is None:
+                continue
+            if isinstance(held, list):
+                if len(held) <= self.max_block:
+                    hits.update(held)
+            else:
+                hits[held] += 1
+        return [entry_id for entry_id, _ in hits.most_common(self.max_candidates)]
+
+    def match(self, name: str, name_of: Callable[[int], str],
+              threshold: Optional[float] = None) -> List[Tuple[int, float]]:
+        """(id, score) of candidates scoring at least `threshold`, best first."""
+        threshold = self.threshold if threshold is None else threshold
+        wanted = sorted_name(name_tokens(name))
+        scored = []
+        for entry_id in self.candidates(name):
+            other = sorted_name(name_tokens(name_of(entry_id)))
+            # Edit distance is at least the length difference
+            if abs(len(wanted) - len(other)) > (1 - threshold) * max(len(wanted), len(other)):
+                continue
+            score = similarity(wanted, other)
+            if score >= threshold:
+                scored.append((entry_id, score))
+        scored.sort(key=lambda pair: (-pair[1], pair[0]))
+        return scored
@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+logger = logging.getLogger("uvicorn")
+
+DEFAULT_MENU_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "menu.json")
+
+# Every course spelling seen from the tablet, simulator and Toast -> canonical course
+COURSE_ALIASES: Dict[str, str] = {
+    "app": "appetizer", "apps": "appetizer", "appetizer": "appetizer", "appetizers": "appetizer",
+    "side": "side", "sides": "side",
+    "drink": "drink", "drinks": "drink", "beverage": "drink", "bar": "drink",
+    "dessert": "dessert", "desserts": "dessert",
+    "main": "main", "mains": "main", "entree": "main",
+}
+
+class MenuEntry(NamedTuple):
+    item_id: str
+    name: str
+    course: str
+    station: str
+    prep_time: int
+    price: float = 0.0
+
+class ItemProfile(NamedTuple):
+    """Resolved kitchen metadata for one ordered item."""
+    course: str
+    station: str
+    prep_time: int
+
+class MenuCatalog:
+    """
+    Compiled menu keyed by item id (and normalized name as a fallback), so
+    course, station and prep time are O(1) lookups on the ordering hot path.
+    Loaded once from the menu file; `load` replaces it (e.g. from the POS).
+    """
+
+    def __init__(self, items: Iterable[Dict[str, Any]] = ()):
+        self._by_id: Dict[str, MenuEntry] = {}
+        self._by_name: Dict[str, MenuEntry] = {}
+        self.load(items)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_MENU_FILE) -> "MenuCatalog":
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load menu from {path}: {e}. Using an empty catalog.")
+            return cls()
+
+    def load(self, items: Iterable[Dict[str, Any]]):
+        by_id: Dict[str, MenuEntry] = {}
+        by_name: Dict[str, MenuEntry] = {}
+        for item in items:
+            entry = MenuEntry(
+                item_id=str(item["id"]),
+                name=item["name"],
+                course=normalize_course(item.get("course")),
+                station=str(item.get("station") or "grill").lower(),
+                prep_time=int(item.get("prep_time", 10)),
+                price=float(item.get("price", 0.0)),
+            )
+            by_id[entry.item_id] = entry
+            by_name[_name_key(entry.name)] = entry
+        self._by_id = by_id
+        self._by_name = by_name
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, item_id: Optional[str]) -> Optional[MenuEntry]:
+        return self._by_id.get(item_id) if item_id is not None else None
+
+    def lookup(self, item_id: Optional[str], name: Optional[str] = None) -> Optional[MenuEntry]:
+        """Menu entry by item id, falling back to the item name."""
+        entry = self._by_id.get(item_id) if item_id is not None else None
+        if entry is None and name:
+            entry = self._by_name.get(_name_key(name))
+        return entry
+
+    def classify(self, item_id: Optional[str], name: Optional[str] = None, course: Optional[str] = None,
+                 station: Optional[str] = None, prep_time: Optional[int] = None) -> ItemProfile:
+        """
+        Resolves course/station/prep time for an ordered item. Values sent with
+        the item win over the catalog; unknown items default to a 10 min main
+        on the grill.
+        """
+        entry = self.lookup(item_id, name)
+        if course:
+            course_key = normalize_course(course)
+        else:
+            course_key = entry.course if entry else "main"
+        if not station:
+            station = entry.station if entry else "grill"
+        if prep_time is None:
+            prep_time = entry.prep_time if entry else 10
+        return ItemProfile(course_key, station, prep_time)
+
+    def known_course(self, item_id: Optional[str], name: Optional[str] = None,
+                     course: Optional[str] = None) -> Optional[str]:
+        """
+        Course of an item sent with a recognized course or found on the menu;
+        None for anything else (no "main" default, unlike `classify`).
+        """
+        if course and str(course).lower() in COURSE_ALIASES:
+            return COURSE_ALIASES[str(course).lower()]
+        entry = self.lookup(item_id, name)
+        return entry.course if entry else None
+
+def normalize_course(course: Optional[str]) -> str:
+    """Canonical course key (appetizer/main/side/dessert/drink); unknown -> main."""
+    if not course:
+        return "main"
+    return COURSE_ALIASES.get(str(course).lower(), "main")
+
+def _name_key(name: str) -> str:
+    return name.strip().lower()
+
+menu_catalog = MenuCatalog.from_file(os.getenv("MENU_FILE", DEFAULT_MENU_FILE))
@@ -58,3 +58,4 @@ class GuestToSeat(BaseModel):
     isVip: bool
     notes: Optional[str] = None
     source: str  # reservation, waitlist, walkin
+    arrivedAt: Optional[float] = None  # epoch ms, stamped when queued
@@ -0,0 +1,198 @@
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from app.integrations.models import Order
+
+logger = logging.getLogger("uvicorn")
+
+class ArchivedOrder(NamedTuple):
+    """Compact, immutable record of a finished order."""
+    closed_at: float  # epoch seconds
+    id: str
+    status: str
+    table_number: Optional[int]
+    guest_count: int
+    total_amount: float
+    created_at: float  # epoch seconds
+    server: Optional[str]
+    source: str
+    # (item_id, name, qty, price, requests, station, course)
+    items: Tuple[Tuple[str, str, int, float, Tuple[str, ...], Optional[str], Optional[str]], ...]
+
+    @classmethod
+    def from_order(cls, order: Order, closed_at: float) -> "ArchivedOrder":
+        return cls(
+            closed_at=closed_at,
+            id=order.id,
+            status=order.status,
+            table_number=order.table_number,
+            guest_count=order.guest_count,
+            total_amount=order.total_amount,
+            created_at=order.created_at.timestamp(),
+            server=order.server,
+            source=order.source,
+            items=tuple((i.item_id, i.name, i.quantity, i.price, tuple(i.special_requests), i.station, i.course)
+                        for i in order.items),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "source": self.source,
+            "status": self.status,
+            "table_number": self.table_number,
+            "guest_count": self.guest_count,
+            "total_amount": self.total_amount,
+            "server": self.server,
+            "created_at": _iso(self.created_at),
+            "closed_at": _iso(self.closed_at),
+            "items": [
+                {"item_id": item_id, "name": name, "quantity": quantity, "price": price,
+                 "special_requests": list(requests), "station": station, "course": course}
+                for item_id, name, quantity, price, requests, station, course in self.items
+            ],
+        }
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+class OrderArchive:
+    """
+    Append-only, time-indexed archive of finished orders for the shift.
+
+    Records are appended in close-time order, so time range queries are a
+    bisect over `_times`. Records are upserted into the `orders`/`order_items`
+    tables in batches (the archived state is final); once flushed, the oldest records are trimmed from
+    memory beyond `max_records`. Rows are keyed by the owning venue
+    (`venue_key`, set by its VenueState) like the live state's rows.
+    """
+
+    def __init__(self, max_records: int = 50000, batch_size: int = 500, venue_key: Optional[str] = None):
+        self.max_records = max_records
+        self.batch_size = batch_size
+        self.venue_key = venue_key
+        self._records: List[ArchivedOrder] = []
+        self._times: List[float] = []
+        self._ids: Set[str] = set()
+        self._flushed = 0  # number of leading records already persisted
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._ids
+
+    @property
+    def pending(self) -> int:
+        return len(self._records) - self._flushed
+
+    def append(self, order: Order, closed_at: float) -> ArchivedOrder:
+        record = ArchivedOrder.from_order(order, closed_at)
+        with self._lock:
+            # Keep the time index sorted even if close times arrive slightly out of order
+            if self._times and closed_at < self._times[-1]:
+                record = record._replace(closed_at=self._times[-1])
+            self._records.append(record)
+            self._times.append(record.closed_at)
+            self._ids.add(record.id)
+        return record
+
+    def history(self, limit: int = 50, offset: int = 0, since: Optional[float] = None,
+                until: Optional[float] = None) -> Tuple[int, List[ArchivedOrder]]:
+        """
+        Archived orders closed in [since, until], newest first.
+        Returns (total matching, page).
+        """
+        with self._lock:
+            lo = bisect_left(self._times, since) if since is not None else 0
+            hi = bisect_right(self._times, until) if until is not None else len(self._times)
+            total = max(hi - lo, 0)
+            end = max(hi - offset, lo)
+            start = max(end - limit, lo)
+            page = self._records[start:end][::-1]
+        return total, page
+
+    def flush(self, session_factory: Optional[Callable] = None) -> int:
+        """
+        Persists pending records in batches. Returns the number written.
+        Safe to call from a worker thread.
+        """
+        if session_factory is None:
+            from app.db.session import SessionLocal
+            session_factory = SessionLocal
+        written = 0
+        while True:
+            with self._lock:
+                batch = self._records[self._flushed:self._flushed + self.batch_size]
+            if not batch:
+                break
+            self._write_batch(session_factory, batch)
+            with self._lock:
+                self._flushed += len(batch)
+                self._trim()
+            written += len(batch)
+        return written
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._times.clear()
+            self._ids.clear()
+            self._flushed = 0
+
+    def _write_batch(self, session_factory: Callable, batch: List[ArchivedOrder]):
+        from app.db.models import Order as OrderRow, OrderItem as OrderItemRow
+        from app.integrations.persistence import _upsert, order_row_id
+        db = session_factory()
+        try:
+            rows = {order_row_id(self.venue_key, r.id): r for r in batch}
+            # Upserted: the final status and total win over what live state wrote earlier
+            _upsert(db, OrderRow, [
+                {
+                    "id": row_id,
+                    "venue_key": self.venue_key,
+                    "table_number": r.table_number,
+                    "guest_count": r.guest_count,
+                    "total_amount": r.total_amount,
+                    "status": r.status,
+                    "source": r.source,
+                    "server": r.server,
+                    "created_at": datetime.fromtimestamp(r.created_at, timezone.utc).replace(tzinfo=None),
+                }
+                for row_id, r in rows.items()
+            ])
+            db.query(OrderItemRow).filter(OrderItemRow.order_id.in_(list(rows))).delete(synchronize_session=False)
+            db.bulk_insert_mappings(OrderItemRow, [
+                {
+                    "id": f"{row_id}:{index}",
+                    "order_id": row_id,
+                    "item_id": item_id,
+                    "item_name": name,
+                    "quantity": quantity,
+                    "price": price,
+                    "special_requests": ", ".join(requests) or None,
+                    "station": station,
+                    "course": course,
+                }
+                for row_id, r in rows.items()
+                for index, (item_id, name, quantity, price, requests, station, course) in enumerate(r.items)
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _trim(self):
+        excess = len(self._records) - self.max_records
+        drop = min(excess, self._flushed)
+        if drop > 0:
+            for record in self._records[:drop]:
+                self._ids.discard(record.id)
+            del self._records[:drop]
+            del self._times[:drop]
+            self._flushed -= drop
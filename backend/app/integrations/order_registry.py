@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.integrations.models import Order
+from app.integrations.locks import LockStripes
+
+# Orders in these states are finished and never shown on KDS/bar screens
+CLOSED_STATUSES = {"delivered", "closed", "voided"}
+
+class OrderRegistry:
+    """
+    In-memory order store with an id index and per-status buckets.
+
+    Status transitions are O(1) and the live (in-flight) orders are kept in
+    their own arrival-ordered map, so queue endpoints never walk the closed
+    history. Always change status through `set_status` so the buckets stay
+    consistent. `version` increases on every mutation.
+
+    Closed orders are also tracked in close-time order so they can be swept
+    into the shift archive after a grace period (see `closed_before`).
+
+    Derived views (e.g. the bar queue) register with `subscribe` and are
+    told about every change as ("added" | "status" | "removed" | "cleared", order).
+
+    Thread-safe: writes to one order hold that order's lock stripe (see
+    `locked`) and the indexes are updated under a short internal latch, which
+    also delivers listener events in mutation order.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._by_id: Dict[str, Order] = {}
+        self._by_status: Dict[str, Dict[str, Order]] = defaultdict(dict)
+        self._live: Dict[str, Order] = {}
+        self._closed_at: Dict[str, float] = {}
+        self._listeners: List[Callable[[str, Optional[Order]], None]] = []
+        self.locks = LockStripes()
+        self._latch = threading.RLock()
+
+    def subscribe(self, listener: Callable[[str, Optional[Order]], None]):
+        self._listeners.append(listener)
+
+    def _notify(self, event: str, order: Optional[Order]):
+        for listener in self._listeners:
+            listener(event, order)
+
+    def locked(self, order_id: str) -> ContextManager[None]:
+        """Hold an order's lock across a read-modify-write (re-entrant)."""
+        return self.locks.hold(order_id)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Order]:
+        return iter(list(self._by_id.values()))
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._by_id
+
+    def all(self) -> List[Order]:
+        return list(self._by_id.values())
+
+    def get(self, order_id: str) -> Optional[Order]:
+        return self._by_id.get(order_id)
+
+    def live(self) -> List[Order]:
+        """Orders that are still in flight, in arrival order."""
+        return list(self._live.values())
+
+    def with_status(self, status: str) -> List[Order]:
+        return list(self._by_status.get(status, {}).values())
+
+    def add(self, order: Order) -> Order:
+        """Insert an order, replacing any existing order with the same id."""
+        with self.locks.hold(order.id), self._latch:
+            self.remove(order.id)
+            self.version += 1
+            self._by_id[order.id] = order
+            self._by_status[order.status][order.id] = order
+            if order.status not in CLOSED_STATUSES:
+                self._live[order.id] = order
+            else:
+                self._closed_at[order.id] = time.time()
+            self._notify("added", order)
+        return order
+
+    def upsert_many(self, orders: Iterable[Order]):
+        """
+        Merge orders fetched from the POS. Known orders keep their local
+        workflow status (bumped/delivered) unless the POS voided them.
+        """
+        for order in orders:
+            with self.locks.hold(order.id):
+                existing = self._by_id.get(order.id)
+                if existing is not None and order.status != "voided":
+                    order.status = existing.status
+                self.add(order)
+
+    def set_status(self, order_id: str, status: str) -> Optional[Order]:
+        """Move an order to a new status bucket. Returns None if unknown."""
+        with self.locks.hold(order_id), self._latch:
+            order = self._by_id.get(order_id)
+            if order is None:
+                return None
+            self.version += 1
+            self._by_status[order.status].pop(order_id, None)
+            order.status = status
+            self._by_status[status][order_id] = order
+            if status in CLOSED_STATUSES:
+                self._live.pop(order_id, None)
+                self._closed_at.pop(order_id, None)
+                self._closed_at[order_id] = time.time()
+            else:
+                self._closed_at.pop(order_id, None)
+                if order_id not in self._live:
+                    self._live[order_id] = order
+            self._notify("status", order)
+        return order
+
+    def closed_before(self, cutoff: float) -> List[Tuple[Order, float]]:
+        """Closed orders (with close time) that were closed at or before `cutoff`."""
+        expired = []
+        with self._latch:
+            for order_id, closed_at in self._closed_at.items():
+                if closed_at > cutoff:
+                    break
+                expired.append((self._by_id[order_id], closed_at))
+        return expired
+
+    def remove(self, order_id: str) -> Optional[Order]:
+        with self.locks.hold(order_id), self._latch:
+            order = self._by_id.pop(order_id, None)
+            if order is not None:
+                self.version += 1
+                self._by_status[order.status].pop(order_id, None)
+                self._live.pop(order_id, None)
+                self._closed_at.pop(order_id, None)
+                self._notify("removed", order)
+        return order
+
+    def clear(self):
+        with self._latch:
+            self.version += 1
+            self._by_id.clear()
+            self._by_status.clear()
+            self._live.clear()
+            self._closed_at.clear()
+            self._notify("cleared", None)
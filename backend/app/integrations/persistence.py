@@ -0,0 +1,317 @@
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+from app.integrations.models import Order, OrderItem, TableData
+from app.integrations.floor_state import TableState
+from app.integrations.order_registry import CLOSED_STATUSES
+
+if TYPE_CHECKING:
+    from app.integrations.venues import VenueState
+
+logger = logging.getLogger("uvicorn")
+
+class WriteBehind:
+    """
+    Write-behind persistence for live venue state.
+
+    Order, table and visit changes are only recorded in memory (the latest
+    state per key wins, so a table touched 50 times between flushes is
+    written once). `flush` writes them to the orders/order_items,
+    floor_tables and visits tables in bulk; `run` calls it off the event loop
+    every `interval` seconds, or as soon as `max_pending` changes are
+    waiting. Request handlers never wait on the database.
+
+    `restore` rebuilds a venue's floor, live orders and open visits from the
+    database on startup.
+    """
+
+    def __init__(self, session_factory: Optional[Callable] = None, batch_size: int = 500,
+                 max_pending: int = 2000):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._orders: Dict[str, Tuple[str, Order]] = {}              # row id -> (venue, order)
+        self._tables: Dict[str, Tuple[str, int, TableState]] = {}    # row id -> (venue, position, table)
+        self._visits: Dict[str, Dict[str, Any]] = {}                 # visit id -> changed columns
+        self._cleared: Set[str] = set()                              # venues reset since last flush
+        self._open_visits: Dict[str, str] = {}                       # "<venue>:<table id>" -> visit id
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._orders) + len(self._tables) + len(self._visits) + len(self._cleared)
+
+    def _session(self):
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    # --- Change hooks (request path: O(1), no I/O) ---
+
+    def attach(self, venue: "VenueState"):
+        """Record every order and table change of a venue from now on."""
+        key = venue.key
+        venue.toast.orders.subscribe(lambda event, order: self.order_changed(key, event, order))
+        venue.floor.subscribe(lambda before, table: self.table_changed(venue, before, table))
+
+    def order_changed(self, venue_key: str, event: str, order: Optional[Order]):
+        with self._lock:
+            if event == "cleared":
+                # Shift reset: orders still open in the database get closed
+                self._orders = {k: v for k, v in self._orders.items() if v[0] != venue_key}
+                self._cleared.add(venue_key)
+            elif event in ("added", "status"):
+                self._orders[order_row_id(venue_key, order.id)] = (venue_key, order)
+            # "removed" (archived): the last persisted state stands
+        self._maybe_wake()
+
+    def table_changed(self, venue: "VenueState", before: Optional[Dict[str, Any]], table: TableState):
+        key = f"{venue.key}:{table.id}"
+        # `before` only holds the fields that changed (None: table added)
+        if before is None:
+            was_seated, reseated = False, False
+        else:
+            was_seated = before.get("status", table.status) == "occupied"
+            reseated = before.get("seatedAt", table.seatedAt) != table.seatedAt
+        seated = table.status == "occupied"
+        with self._lock:
+            # The live record is stored; its latest state is written at flush
+            self._tables[key] = (venue.key, venue.floor.position(table.id), table)
+            if was_seated and (not seated or reseated):
+                self._end_visit(key)
+            if seated and (not was_seated or reseated):
+                visit_id = str(uuid.uuid4())
+                self._open_visits[key] = visit_id
+                self._visits[visit_id] = {
+                    "id": visit_id,
+                    "venue_key": venue.key,
+                    "table_number": table.number,
+                    "server_name": table.server,
+                    "start_time": _utc(table.seatedAt / 1000 if table.seatedAt else None),
+                    "end_time": None,
+                }
+        self._maybe_wake()
+
+    def _end_visit(self, key: str):
+        visit_id = self._open_visits.pop(key, None)
+        if visit_id is not None:
+            self._visits.setdefault(visit_id, {"id": visit_id})["end_time"] = _utc(None)
+
+    def _maybe_wake(self):
+        if self._wakeup is not None and self.pending >= self.max_pending:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # --- Flushing ---
+
+    async def run(self, interval: float = 1.0):
+        """Background loop: flush on the interval or when the size threshold is hit."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                if self.pending:
+                    await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Live state flush failed: {e}")
+
+    def flush(self) -> int:
+        """
+        Writes all pending changes in one transaction. Returns the number of
+        rows upserted. On failure the changes are queued again (unless newer
+        ones arrived meanwhile). Safe to call from a worker thread.
+        """
+        with self._flush_lock:
+            with self._lock:
+                orders, self._orders = self._orders, {}
+                tables, self._tables = self._tables, {}
+                visits, self._visits = self._visits, {}
+                cleared, self._cleared = self._cleared, set()
+            try:
+                return self._write(cleared, list(orders.values()), list(tables.items()), list(visits.values()))
+            except Exception:
+                with self._lock:
+                    self._orders = {**orders, **self._orders}
+                    self._tables = {**tables, **self._tables}
+                    for visit_id, row in visits.items():
+                        self._visits[visit_id] = {**row, **self._visits.get(visit_id, {})}
+                    self._cleared |= cleared
+                raise
+
+    def _write(self, cleared: Set[str], orders: List[Tuple[str, Order]],
+               tables: List[Tuple[str, Tuple[str, int, TableState]]], visits: List[Dict[str, Any]]) -> int:
+        from app.db.models import FloorTable, Order as OrderRow, OrderItem as OrderItemRow, Visit
+        db = self._session()
+        try:
+            if cleared:
+                db.query(OrderRow).filter(
+                    OrderRow.venue_key.in_(cleared), OrderRow.status.notin_(CLOSED_STATUSES)
+                ).update({"status": "closed"}, synchronize_session=False)
+            for batch in _chunks(orders, self.batch_size):
+                _upsert(db, OrderRow, [_order_row(venue_key, order) for venue_key, order in batch])
+                # Items are replaced wholesale (the POS may have changed them)
+                ids = [order_row_id(venue_key, order.id) for venue_key, order in batch]
+                db.query(OrderItemRow).filter(OrderItemRow.order_id.in_(ids)).delete(synchronize_session=False)
+                db.bulk_insert_mappings(OrderItemRow, [
+                    _item_row(order_row_id(venue_key, order.id), index, item)
+                    for venue_key, order in batch for index, item in enumerate(order.items)
+                ])
+            now = _utc(None)
+            for batch in _chunks(tables, self.batch_size):
+                _upsert(db, FloorTable, [
+                    {"id": row_id, "venue_key": venue_key, "position": position,
+                     "state": table.to_dict(), "updated_at": now}
+                    for row_id, (venue_key, position, table) in batch
+                ])
+            for batch in _chunks(visits, self.batch_size):
+                _upsert(db, Visit, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return len(orders) + len(tables) + len(visits)
+
+    # --- Startup ---
+
+    def schema_ready(self) -> bool:
+        """False if the database predates the live state columns (run migrations)."""
+        from sqlalchemy import inspect
+        db = self._session()
+        try:
+            inspector = inspect(db.get_bind())
+            return inspector.has_table("floor_tables") and \
+                "venue_key" in {c["name"] for c in inspector.get_columns("orders")}
+        finally:
+            db.close()
+
+    def restore(self, venue: "VenueState") -> Tuple[int, int]:
+        """
+        Loads a venue's persisted floor, live orders and open visits. Call
+        before `attach`. Returns (tables, orders) restored.
+        """
+        from app.db.models import FloorTable, Order as OrderRow, OrderItem as OrderItemRow, Visit
+        db = self._session()
+        try:
+            table_rows = db.query(FloorTable).filter(FloorTable.venue_key == venue.key) \
+                .order_by(FloorTable.position).all()
+            order_rows = db.query(OrderRow).filter(
+                OrderRow.venue_key == venue.key, OrderRow.status.notin_(CLOSED_STATUSES)
+            ).order_by(OrderRow.created_at).all()
+            item_rows: Dict[str, List[Any]] = {}
+            for batch in _chunks([row.id for row in order_rows], self.batch_size):
+                for item in db.query(OrderItemRow).filter(OrderItemRow.order_id.in_(batch)):
+                    item_rows.setdefault(item.order_id, []).append(item)
+            open_visits = db.query(Visit.id, Visit.table_number).filter(
+                Visit.venue_key == venue.key, Visit.end_time.is_(None)
+            ).all()
+        finally:
+            db.close()
+
+        # Persisted tables replace their layout defaults (unknown ones are added)
+        for row in table_rows:
+            venue.floor.put(TableData(**row.state))
+        prefix = f"{venue.key}:"
+        venue.toast.orders.upsert_many(
+            _order_from_rows(row, item_rows.get(row.id, []), row.id.removeprefix(prefix)) for row in order_rows
+        )
+        with self._lock:
+            for visit_id, table_number in open_visits:
+                table = venue.floor.get_by_number(table_number)
+                if table is not None:
+                    self._open_visits[f"{venue.key}:{table.id}"] = visit_id
+        return len(table_rows), len(order_rows)
+
+def _utc(ts: Optional[float]) -> datetime:
+    """Naive UTC datetime (the DateTime columns are timezone-less)."""
+    moment = datetime.fromtimestamp(ts, timezone.utc) if ts is not None else datetime.now(timezone.utc)
+    return moment.replace(tzinfo=None)
+
+def _chunks(rows: List[Any], size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+def _upsert(db, model, rows: List[Dict[str, Any]]):
+    """Portable bulk upsert: one SELECT for existing ids, then bulk UPDATE + INSERT."""
+    if not rows:
+        return
+    existing = {row[0] for row in db.query(model.id).filter(model.id.in_([r["id"] for r in rows]))}
+    db.bulk_update_mappings(model, [r for r in rows if r["id"] in existing])
+    db.bulk_insert_mappings(model, [r for r in rows if r["id"] not in existing])
+
+def order_row_id(venue_key: Optional[str], order_id: str) -> str:
+    """
+    `orders` row id: "<venue_key>:<order id>", so two venues that happen to
+    see the same POS order id keep separate rows (bare id without a venue).
+    """
+    return f"{venue_key}:{order_id}" if venue_key else order_id
+
+def _order_row(venue_key: str, order: Order) -> Dict[str, Any]:
+    return {
+        "id": order_row_id(venue_key, order.id),
+        "venue_key": venue_key,
+        "table_number": order.table_number,
+        "guest_count": order.guest_count,
+        "total_amount": order.total_amount,
+        "status": order.status,
+        "source": order.source,
+        "server": order.server,
+        "created_at": order.created_at.astimezone(timezone.utc).replace(tzinfo=None),
+    }
+
+def _item_row(row_id: str, index: int, item: OrderItem) -> Dict[str, Any]:
+    return {
+        # Same row id scheme as the order archive
+        "id": f"{row_id}:{index}",
+        "order_id": row_id,
+        "item_id": item.item_id,
+        "item_name": item.name,
+        "quantity": item.quantity,
+        "price": item.price,
+        "special_requests": ", ".join(item.special_requests) or None,
+        "station": item.station,
+        "course": item.course,
+    }
+
+def _order_from_rows(row: Any, items: List[Any], order_id: str) -> Order:
+    items = sorted(items, key=_item_index)
+    return Order(
+        id=order_id,
+        source=row.source or "toast",
+        table_number=row.table_number,
+        guest_count=row.guest_count or 1,
+        total_amount=row.total_amount or 0.0,
+        status=row.status or "open",
+        server=row.server,
+        created_at=(row.created_at or datetime.utcnow()).replace(tzinfo=timezone.utc),
+        items=[
+            OrderItem(
+                item_id=item.item_id or item.id,
+                name=item.item_name,
+                quantity=item.quantity or 1,
+                price=item.price or 0.0,
+                special_requests=item.special_requests.split(", ") if item.special_requests else [],
+                station=item.station,
+                course=item.course,
+            ) for item in items
+        ],
+    )
+
+def _item_index(item: Any) -> int:
+    """Position of an item row within its order ("<order id>:<index>")."""
+    suffix = item.id.rsplit(":", 1)[-1]
+    return int(suffix) if suffix.isdigit() else 0
+
+write_behind = WriteBehind()
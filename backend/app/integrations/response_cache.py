@@ -0,0 +1,65 @@
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used without it
+    orjson = None
+
+def dumps(data: Any) -> bytes:
+    """Encodes JSON-ready data (dicts, lists, str, numbers, None) to bytes."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+
+class ResponseCache:
+    """
+    Pre-encoded bodies of hot GET endpoints.
+
+    Each entry is keyed by endpoint and tagged with the version of the state
+    it was built from (e.g. `FloorStore.version`). While the version is
+    unchanged the same bytes are served as a raw Response, skipping
+    response_model validation and JSON encoding; any write to the state
+    moves its version and the next request rebuilds the body.
+
+    `ttl` additionally bounds the age of entries whose state can change
+    outside this process (database-backed endpoints).
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Hashable, float, bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def body(self, key: Hashable, version: Hashable, build: Callable[[], Any],
+             ttl: Optional[float] = None) -> bytes:
+        """
+        Returns the encoded body for `key` at `version`, calling `build` for
+        the JSON-ready data on a miss. Read the version before building, so
+        a write that lands mid-build leaves the entry already stale.
+        """
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and entry[0] == version and (ttl is None or now - entry[1] < ttl):
+            self.hits += 1
+            return entry[2]
+        body = dumps(build())
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (version, now, body)
+        return body
+
+    def serve(self, key: Hashable, version: Hashable, build: Callable[[], Any],
+              ttl: Optional[float] = None) -> Response:
+        return Response(content=self.body(key, version, build, ttl), media_type="application/json")
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -1,101 +1,179 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import Header, Response
+from starlette.requests import HTTPConnection
+from fastapi.responses import StreamingResponse, JSONResponse
 from typing import List, Dict, Any, Optional
 from uuid import UUID, uuid4
+import os
 import time
 from app.integrations.models import Order, GuestProfile, TableData, GuestToSeat
-from app.integrations.logic import reconciler
 from app.ai.engine import ai_engine
-from app.integrations.toast_client import toast_client
-from app.ai.kitchen import kitchen_optimizer
+from app.integrations.order_registry import CLOSED_STATUSES
+from app.integrations.events import TOPICS
+from app.integrations.snapshot import SECTIONS
+from app.integrations.seating import seating_engine
+from app.integrations.menu import menu_catalog
+from app.integrations.floor_state import TableState
+from app.integrations.venues import venues, VenueState, DEFAULT_VENUE, CLEARED_TABLE_FIELDS
+from app.integrations.webhook_queue import WebhookIngest
 
 router = APIRouter()
 
 # Mocked Data Store (in-memory for now)
-orders_db: List[Order] = []
 guests_db: List[GuestProfile] = []
 
-@router.post("/webhook/toast", response_model=Order)
-def receive_toast_order(order: Order):
+# --- Venue Selection ---
+# All floor, waitlist, order, kitchen and bar state is partitioned per venue.
+# The venue comes from the /venues/{venue_key}/... prefix, then the
+# X-Venue-Key header, and defaults to the default venue.
+
+def get_venue(connection: HTTPConnection, x_venue_key: Optional[str] = Header(None)) -> VenueState:
+    key = connection.path_params.get("venue_key") or x_venue_key or DEFAULT_VENUE
+    venue = venues.get(key)
+    if venue is None:
+        raise HTTPException(status_code=404, detail=f"Unknown venue: {key}")
+    return venue
+
+@router.get("/venues")
+def list_venues():
+    return [{"key": v.key, "name": v.name, "tables": len(v.floor), "waitlist": len(v.waitlist),
+             "running": v.system_running} for v in venues]
+
+# --- Change Tracking Helpers ---
+# Every mutation goes through one of these: they bump the snapshot state
+# version and push the change to subscribed screens.
+
+def publish_table(venue: VenueState, table: Optional[TableState]):
+    """Record a table change and push it (skips encoding if nobody listens)."""
+    if not table:
+        return
+    venue.versions.touch("tables", [table.id])
+    if venue.events.has_subscribers("tables"):
+        venue.events.publish("tables", "table.updated", table.to_dict())
+
+def publish_waitlist(venue: VenueState, event_type: str, data: Any):
+    venue.versions.touch("waitlist")
+    venue.events.publish("waitlist", event_type, data)
+
+def publish_system(venue: VenueState):
+    venue.versions.touch("system")
+    venue.events.publish("system", "system.status", {"running": venue.system_running})
+
+# Order changes are pushed by the venue's OrderRegistry listener
+# (VenueState.on_order_event), whichever path wrote them.
+
+def apply_toast_orders(venue: VenueState, orders: List[Order]):
+    """Webhook orders into the venue's registry (screens and guest profiles follow its events)."""
+    # Like a sync page: late or retried webhooks for archived orders stay out of the hot set
+    archive = venue.toast.archive
+    venue.toast.orders.upsert_many([order for order in orders if order.id not in archive])
+
+# Started with the app (see main.lifespan); applies webhook orders in micro-batches
+toast_webhooks = WebhookIngest(
+    apply_toast_orders,
+    maxsize=int(os.getenv("TOAST_WEBHOOK_QUEUE_SIZE", "10000")),
+    workers=int(os.getenv("TOAST_WEBHOOK_WORKERS", "4")),
+    batch_size=int(os.getenv("TOAST_WEBHOOK_BATCH", "100")),
+)
+
+@router.post("/webhook/toast", status_code=202)
+async def receive_toast_order(order: Order, venue: VenueState = Depends(get_venue)):
     """
     Webhook endpoint to receive orders from Toast POS.
-    Normalization happens here.
+    Validated here and queued; retries and repeated updates of an order
+    version are applied once. A full queue answers 503 so Toast retries.
     """
-    # Simulate extracting guest info from order (mocked)
-    guest_data = {
-        "name": f"Guest {order.table_number}", 
-        "spend": order.total_amount,
-        "preferences": {"last_order": [i.name for i in order.items]}
-    }
-    reconciler.reconcile(guest_data)
-    
-    orders_db.append(order)
-    return order
+    if not toast_webhooks.running:
+        # No workers (app not started): apply in the request
+        toast_webhooks.apply_now(venue, [order])
+        return {"status": "applied", "order_id": order.id}
+    if not toast_webhooks.submit(venue, order):
+        raise HTTPException(status_code=503, detail="Webhook queue full", headers={"Retry-After": "1"})
+    return {"status": "queued", "order_id": order.id}
+
+@router.get("/webhook/toast/metrics")
+def get_webhook_metrics():
+    """Webhook queue depth, lag and counters (all venues)."""
+    return toast_webhooks.metrics()
 
 @router.post("/orders", response_model=Order)
-async def create_manual_order(order: Order):
+async def create_manual_order(order: Order, venue: VenueState = Depends(get_venue)):
     """
     Manually create an order (Server Tablet).
     """
-    # Normalize guest data immediately
-    guest_data = {
-        "name": f"Guest {order.table_number}", 
-        "spend": order.total_amount,
-        "preferences": {"last_order": [i.name for i in order.items]}
-    }
-    reconciler.reconcile(guest_data)
+    # Add to "Toast" (mock); the guest profile is reconciled from the order event
+    venue.toast.add_order(order)
     
-    # Add to "Toast" (mock)
-    toast_client.add_order(order)
+    # Plan the order once on arrival; queue reads reuse the cached plan
+    get_kitchen_plan(venue, order)
     
     # Sync with Table Data (for frontend display)
-    if order.table_number:
-        for i, t in enumerate(tables_db):
-            if t.number == order.table_number:
-                # Update table
-                updated_items = t.items + [item.name for item in order.items]
-                updated_total = (t.orderTotal or 0.0) + order.total_amount
-                
-                # Determine course based on items
-                current_course = t.currentCourse
-                item_names = [i.name.lower() for i in order.items]
-                if any('dessert' in n or 'cake' in n for n in item_names):
-                    current_course = 'dessert'
-                elif any('steak' in n or 'main' in n for n in item_names):
-                    current_course = 'mains'
-                elif any('salad' in n or 'app' in n for n in item_names):
-                    current_course = 'apps'
-                elif any('drink' in n or 'wine' in n for n in item_names) and current_course == 'seated':
-                    current_course = 'drinks'
-
-                tables_db[i] = t.copy(update={
-                    "items": updated_items,
-                    "orderTotal": updated_total,
-                    "currentCourse": current_course
-                })
-                break
+    t = venue.floor.get_by_number(order.table_number)
+    if t:
+        publish_table(venue, add_order_to_table(venue, t.id, order))
 
     return order
 
+def add_order_to_table(venue: VenueState, table_id: str, order: Order) -> Optional[TableState]:
+    """
+    Append an order's items and total to its table. Runs under the table's
+    lock, so concurrent orders and seat/clear calls on the same table never
+    lose each other's changes.
+    """
+    with venue.floor.locked(table_id):
+        t = venue.floor.get(table_id)
+        if t:
+            # Update table
+            updated_items = t.items + [item.name for item in order.items]
+            updated_total = (t.orderTotal or 0.0) + order.total_amount
+        
+            # Determine course based on items (menu catalog, same as the kitchen);
+            # off-menu items without a course do not move it
+            current_course = t.currentCourse
+            courses = {menu_catalog.known_course(i.item_id, i.name, i.course) for i in order.items}
+            if 'dessert' in courses:
+                current_course = 'dessert'
+            elif 'main' in courses:
+                current_course = 'mains'
+            elif 'appetizer' in courses:
+                current_course = 'apps'
+            elif 'drink' in courses and current_course == 'seated':
+                current_course = 'drinks'
+
+            return venue.floor.update(t.id,
+                items=updated_items,
+                orderTotal=updated_total,
+                currentCourse=current_course
+            )
+        return None
+
 
 @router.get("/orders", response_model=List[Order])
-async def get_recent_orders():
+async def get_recent_orders(venue: VenueState = Depends(get_venue)):
     """
     Get all active orders (for Kitchen Display or Manager Dash).
-    Fetches fresh data from Toast.
+    Served from the local registry, which the background Toast poller keeps fresh.
     """
-    # specific logic to fetch from toast
-    toast_orders = await toast_client.get_orders()
-    
-    # Reconcile all fetched orders
-    for order in toast_orders:
-        guest_data = {
-            "name": f"Guest {order.table_number}", 
-            "spend": order.total_amount,
-            "preferences": {"last_order": [i.name for i in order.items]}
-        }
-        reconciler.reconcile(guest_data)
-        
-    return toast_orders
+    # New or changed orders reach the guest profiles through registry
+    # events; reads reconcile nothing
+    return await venue.toast.get_orders()
+
+@router.get("/orders/history")
+def get_order_history(limit: int = 50, offset: int = 0, since: Optional[float] = None,
+                      until: Optional[float] = None, venue: VenueState = Depends(get_venue)):
+    """
+    Paginated history of archived (delivered/closed) orders, newest first.
+    `since`/`until` filter on close time (epoch seconds).
+    """
+    limit = max(1, min(limit, 500))
+    total, page = venue.toast.archive.history(limit=limit, offset=max(offset, 0), since=since, until=until)
+    return {
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "orders": [record.to_dict() for record in page],
+    }
 
 @router.get("/insights")
 async def get_dashboard_insights():
@@ -118,23 +196,14 @@ def get_guest_profile(guest_id: str):
     )
 
 
-@router.get("/kitchen/queue")
-async def get_kitchen_queue():
+def get_kitchen_plan(venue: VenueState, order: Order) -> Dict[str, Any]:
     """
-    Get the optimized kitchen queue (KDS View).
-    Returns orders with 'fire_at' times and station assignments.
+    Returns the cached optimization plan for an order, building it on first
+    sight or when the order's items changed upstream.
     """
-    # 1. Fetch active orders
-    toast_orders: List[Order] = await toast_client.get_orders()
-    print(f"DEBUG: Fetched {len(toast_orders)} orders from ToastClient")
-
-    kitchen_queue = []
-    
-    for order in toast_orders:
-        if order.status == "delivered":
-            continue # Skip delivered orders
-            
-        print(f"DEBUG: Processing Order {order.id} with {len(order.items)} items")
+    signature = tuple((i.item_id, i.quantity) for i in order.items)
+    plan = venue.kitchen.cached_plan(order.id, signature)
+    if plan is None:
         # Convert OrderItems to dict for optimizer
         items_dict = [
             {
@@ -145,9 +214,28 @@ async def get_kitchen_queue():
                 "course": i.course
             } for i in order.items
         ]
-        
-        # 2. Run Optimization
-        optimization_plan = kitchen_optimizer.optimize_order(items_dict, order.table_number)
+        plan = venue.kitchen.plan_order(order.id, items_dict, order.table_number, signature)
+    return plan
+
+@router.get("/kitchen/queue")
+async def get_kitchen_queue(venue: VenueState = Depends(get_venue)):
+    """
+    Get the optimized kitchen queue (KDS View).
+    Returns orders with 'fire_at' times and station assignments.
+    """
+    # 1. Fetch in-flight orders (delivered orders are never visited)
+    toast_orders: List[Order] = await venue.toast.get_live_orders()
+    return build_kitchen_queue(venue, toast_orders)
+
+def build_kitchen_queue(venue: VenueState, toast_orders: List[Order]) -> List[Dict[str, Any]]:
+    """
+    Merge cached plans of in-flight orders into the KDS queue payload.
+    """
+    kitchen_queue = []
+    
+    for order in toast_orders:
+        # 2. Merge the cached plan (copied, since ready items are added below)
+        optimization_plan = dict(get_kitchen_plan(venue, order))
         
         # If order is marked ready (kitchen bumped), ensure items show as ready
         if order.status == 'ready':
@@ -176,363 +264,354 @@ async def get_kitchen_queue():
     return kitchen_queue
 
 @router.post("/kitchen/bump/{item_id}")
-async def bump_item(item_id: str):
+async def bump_item(item_id: str, venue: VenueState = Depends(get_venue)):
     """
     Mark an item as complete (Bump).
     """
-    kitchen_optimizer.mark_item_complete(item_id)
+    venue.kitchen.mark_item_complete(item_id)
+    venue.versions.touch("kitchen")
+    venue.events.publish("kitchen", "item.bumped", {"item_id": item_id})
     return {"status": "bumped", "item_id": item_id}
 
 @router.post("/kitchen/bump-order/{order_id}")
-async def bump_order(order_id: str):
+async def bump_order(order_id: str, venue: VenueState = Depends(get_venue)):
     """
     Kitchen Bump: Mark order as Ready for Server.
     """
-    order = next((o for o in toast_client.active_orders if o.id == order_id), None)
-    
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
+    with venue.toast.orders.locked(order_id):
+        order = venue.toast.orders.get(order_id)
 
-    # Mark items complete in optimizer (so they stop firing)
-    items_dict = [{"item_id": i.item_id} for i in order.items]
-    kitchen_optimizer.mark_order_complete(items_dict)
-    
-    # Set status to 'ready' (Visible to Server, Hidden from KDS via frontend filter)
-    order.status = "ready"
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+
+        # Mark items complete in optimizer (so they stop firing)
+        items_dict = [{"item_id": i.item_id} for i in order.items]
+        venue.kitchen.mark_order_complete(items_dict)
+
+        # Set status to 'ready' (Visible to Server, Hidden from KDS via frontend filter)
+        venue.toast.orders.set_status(order_id, "ready")
     
     return {"status": "ready", "order_id": order_id}
 
 @router.post("/kitchen/deliver-order/{order_id}")
-async def deliver_order(order_id: str):
+async def deliver_order(order_id: str, venue: VenueState = Depends(get_venue)):
     """
     Server Bump: Mark order as Delivered (Closed).
     """
-    order = next((o for o in toast_client.active_orders if o.id == order_id), None)
-    
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-        
-    order.status = "delivered"
-    # Could remove from active_orders here if we want strict archiving
-    # toast_client.active_orders.remove(order)
+    with venue.toast.orders.locked(order_id):
+        order = venue.toast.orders.get(order_id)
+
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
+
+        # Moves the order out of the live set; it stays in the registry for history
+        venue.toast.orders.set_status(order_id, "delivered")
+        venue.kitchen.drop_plan(order_id)
     
     return {"status": "delivered", "order_id": order_id}
 
 @router.patch("/kitchen/orders/{order_id}/status")
-async def update_order_status(order_id: str, status: str):
+async def update_order_status(order_id: str, status: str, venue: VenueState = Depends(get_venue)):
     """
     Update order status (new, cooking, ready, delivered).
     """
-    order = next((o for o in toast_client.active_orders if o.id == order_id), None)
-    
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-        
-    order.status = status
-    return {"status": status, "order_id": order_id}
+    with venue.toast.orders.locked(order_id):
+        order = venue.toast.orders.get(order_id)
 
-# --- Seating & Waitlist Management (In-Memory for Demo) ---
-
-# Initial Data (Matching Frontend)
-tables_db: List[TableData] = []
+        if not order:
+            raise HTTPException(status_code=404, detail="Order not found")
 
-# Generate 40 tables programmatically
-rows: int = 5
-cols: int = 8
-x_start: int = 10
-y_start: int = 10
-x_spacing: int = 20
-y_spacing: int = 15
+        venue.toast.orders.set_status(order_id, status)
+        if order.status in CLOSED_STATUSES:
+            venue.kitchen.drop_plan(order_id)
+    return {"status": status, "order_id": order_id}
 
-SERVERS: List[str] = ["Maria", "James", "Sarah", "David", "Michael"]
+# --- Seating & Waitlist Management (In-Memory for Demo) ---
 
-# Global System Status
-system_running: bool = False
+# Each venue owns its floor (generated to match the frontend), waitlist,
+# shift status and bartender sections; see app.integrations.venues.
 
 @router.get("/system/status")
-def get_system_status():
-    return {"running": system_running}
+def get_system_status(venue: VenueState = Depends(get_venue)):
+    return {"running": venue.system_running}
 
 @router.post("/system/start")
-def start_system():
-    global system_running
-    system_running = True
+def start_system(venue: VenueState = Depends(get_venue)):
+    venue.system_running = True
+    publish_system(venue)
     return {"status": "running"}
 
 @router.post("/system/stop")
-def stop_system():
-    global system_running
-    system_running = False
+def stop_system(venue: VenueState = Depends(get_venue)):
+    venue.system_running = False
+    publish_system(venue)
     return {"status": "stopped"}
 
-# Bartender Section Assignments (4 bartenders, 10 tables each)
-BARTENDERS: List[Dict[str, Any]] = [
-    {"id": "b1", "name": "Alex", "tables": list(range(1, 11))},      # Tables 1-10
-    {"id": "b2", "name": "Jordan", "tables": list(range(11, 21))},   # Tables 11-20
-    {"id": "b3", "name": "Taylor", "tables": list(range(21, 31))},   # Tables 21-30
-    {"id": "b4", "name": "Casey", "tables": list(range(31, 41))},    # Tables 31-40
-]
-
-def get_bartender_for_table(table_number: int) -> dict:
-    """Returns the bartender responsible for a given table number."""
-    bartender: Dict[str, Any]
-    for bartender in BARTENDERS:
-        if table_number in bartender["tables"]:
-            return bartender
-    return BARTENDERS[0]  # Default to first bartender
-
-def initialize_tables():
-    global tables_db
-    server_count: int = len(SERVERS)
-    i: int
-    for i in range(rows * cols):
-        # Calculate row and column
-        r: int = i // cols
-        c: int = i % cols
-        current_count: int = i + 1
-        
-        # Mix capacities
-        cap: int = 4
-        if current_count % 3 == 0: cap = 2
-        elif current_count % 5 == 0: cap = 6
-        elif current_count % 7 == 0: cap = 8
-
-        # Tighter packing to fit 8 cols in 0-100 range
-        t_x: int = 5 + (c * 11)
-        t_y: int = 10 + (r * 18)
-
-        # Assign server round-robin
-        server_idx: int = (current_count - 1) % server_count
-        assigned_server: str = SERVERS[server_idx]
-
-        tables_db.append(TableData(
-            id=f"t{current_count}",
-            number=current_count,
-            capacity=cap,
-            x=t_x,
-            y=t_y,
-            status="available",
-            server=assigned_server,
-            paymentStatus="none",
-            orderTotal=0.0,
-            items=[]
-        ))
-
-initialize_tables()
-
-
-waitlist_db: List[GuestToSeat] = [
-    GuestToSeat(id='w1', name='Anderson, Robert', party=4, isVip=True, notes='Celebrating promotion', source='waitlist'),
-    GuestToSeat(id='w2', name='Kim, Jessica', party=2, isVip=False, source='waitlist'),
-    GuestToSeat(id='w3', name='Martinez, Carlos', party=6, isVip=False, notes='Large party', source='waitlist'),
-]
-
 @router.get("/tables", response_model=List[TableData])
-def get_tables():
-    return tables_db
+def get_tables(venue: VenueState = Depends(get_venue)):
+    # Encoded once per floor version from the cached per-table dicts
+    return venue.responses.serve("tables", venue.floor.version,
+                                 lambda: [t.to_dict() for t in venue.floor])
 
 @router.put("/tables/{table_id}")
-def update_table(table_id: str, table_data: TableData):
-    for i, t in enumerate(tables_db):
-        if t.id == table_id:
-            tables_db[i] = table_data
-            return table_data
-    raise HTTPException(status_code=404, detail="Table not found")
+def update_table(table_id: str, table_data: TableData, venue: VenueState = Depends(get_venue)):
+    if table_id not in venue.floor:
+        raise HTTPException(status_code=404, detail="Table not found")
+    # A record stored under another id would be unreachable by its own id
+    if table_data.id != table_id:
+        raise HTTPException(status_code=400, detail="Table id does not match the URL")
+    updated_table = venue.floor.put(table_data, table_id)
+    publish_table(venue, updated_table)
+    return updated_table.to_dict()
+
+def seat_guest(venue: VenueState, table_id: str, guest: GuestToSeat,
+               expect_status: Optional[str] = None) -> Optional[TableState]:
+    """
+    Mark a table occupied by a guest party and publish the change.
+    With `expect_status`, only seats if the table is still in that status.
+    """
+    updated_table = venue.floor.update(table_id, expect_status,
+        status="occupied",
+        guestName=guest.name,
+        guestCount=guest.party,
+        seatedAt=time.time() * 1000,
+        isVip=guest.isVip,
+    )
+    publish_table(venue, updated_table)
+    return updated_table
+
+def claim_table(venue: VenueState, guest: GuestToSeat, table: Optional[TableState] = None) -> Optional[TableState]:
+    """
+    Seat a guest at `table`, or at the best-fit free table, only if it is
+    still available. A concurrent request may claim the best fit first; the
+    next best fit is tried until none is left.
+    """
+    while True:
+        candidate = table or venue.floor.best_available(guest.party)
+        if candidate is None:
+            return None
+        seated = seat_guest(venue, candidate.id, guest, expect_status="available")
+        if seated or table is not None:
+            return seated
 
 @router.post("/tables/{table_id}/seat")
-def seat_table(table_id: str, guest: GuestToSeat):
-    for i, t in enumerate(tables_db):
-        if t.id == table_id:
-            # Update table
-            updated_table = t.copy(update={
-                "status": "occupied",
-                "guestName": guest.name,
-                "guestCount": guest.party,
-                "seatedAt": time.time() * 1000,
-                "isVip": guest.isVip,
-            })
-            tables_db[i] = updated_table
-            
-            # Remove from waitlist if present
-            global waitlist_db
-            waitlist_db = [w for w in waitlist_db if w.id != guest.id]
-            
-            return updated_table
-    raise HTTPException(status_code=404, detail="Table not found")
+def seat_table(table_id: str, guest: GuestToSeat, venue: VenueState = Depends(get_venue)):
+    updated_table = seat_guest(venue, table_id, guest)
+    if not updated_table:
+        raise HTTPException(status_code=404, detail="Table not found")
+    
+    # Remove from waitlist if present
+    if venue.waitlist.remove(guest.id):
+        publish_waitlist(venue, "guest.removed", {"guest_id": guest.id})
+    return updated_table.to_dict()
 
 @router.post("/tables/{table_id}/clear")
-def clear_table(table_id: str):
-    for i, t in enumerate(tables_db):
-        if t.id == table_id:
-            updated_table = t.copy(update={
-                "status": "available",
-                "guestName": None,
-                "guestCount": None,
-                "seatedAt": None,
-                "isVip": None,
-                "currentCourse": "seated",
-                "paymentStatus": "none",
-                "orderTotal": 0.0,
-                "items": []
-            })
-            tables_db[i] = updated_table
-            return updated_table
-    raise HTTPException(status_code=404, detail="Table not found")
+def clear_table(table_id: str, venue: VenueState = Depends(get_venue)):
+    updated_table = venue.floor.update(table_id, **CLEARED_TABLE_FIELDS)
+    if not updated_table:
+        raise HTTPException(status_code=404, detail="Table not found")
+    publish_table(venue, updated_table)
+    return updated_table.to_dict()
 
 @router.get("/waitlist", response_model=List[GuestToSeat])
-def get_waitlist():
-    return waitlist_db
+def get_waitlist(venue: VenueState = Depends(get_venue)):
+    return venue.responses.serve("waitlist", venue.waitlist.version,
+                                 lambda: [g.model_dump(mode="json") for g in venue.waitlist.ordered()])
 
 @router.post("/waitlist")
-def add_to_waitlist(guest: GuestToSeat):
-    waitlist_db.append(guest)
+def add_to_waitlist(guest: GuestToSeat, venue: VenueState = Depends(get_venue)):
+    venue.waitlist.add(guest)
+    publish_waitlist(venue, "guest.added", guest.model_dump(mode="json"))
     return guest
 
 @router.delete("/waitlist/{guest_id}")
-def remove_from_waitlist(guest_id: str):
-    global waitlist_db
-    waitlist_db = [w for w in waitlist_db if w.id != guest_id]
+def remove_from_waitlist(guest_id: str, venue: VenueState = Depends(get_venue)):
+    venue.waitlist.remove(guest_id)
+    publish_waitlist(venue, "guest.removed", {"guest_id": guest_id})
     return {"status": "removed", "guest_id": guest_id}
 
 @router.post("/system/reset")
-def reset_system():
+def reset_system(venue: VenueState = Depends(get_venue)):
     """
     Reset the system to 'Beginning of Shift' state.
     Clears all orders, waitlist, and resets tables to available.
     Also stops the simulation.
     """
-    global system_running
-    system_running = False
+    venue.system_running = False
     # 1. Clear Orders
-    toast_client.active_orders = []
+    venue.toast.orders.clear()
     
-    # 2. Clear Kitchen Optimizer state
-    kitchen_optimizer.completed_items.clear()
-    kitchen_optimizer.station_load = {}
+    # 2. Clear Kitchen Optimizer state (completed items and cached plans)
+    venue.kitchen.reset()
     
     # 3. Clear Waitlist
-    global waitlist_db
-    waitlist_db = []
+    venue.waitlist.clear()
     
     # 4. Reset Tables
     # We keep the physical layout (id, number, capacity, x, y) but clear booking data
-    for i, t in enumerate(tables_db):
-        tables_db[i] = t.copy(update={
-            "status": "available",
-            "guestName": None,
-            "guestCount": None,
-            "seatedAt": None,
-            "isVip": None,
-            "currentCourse": "seated",
-            "paymentStatus": "none",
-            "orderTotal": 0.0,
-            "items": []
-        })
+    for t in venue.floor:
+        venue.floor.update(t.id, **CLEARED_TABLE_FIELDS)
+    
+    # Screens refetch everything after a reset
+    for section in SECTIONS:
+        venue.versions.touch(section, [t.id for t in venue.floor] if section == "tables" else ())
+    for topic in TOPICS:
+        venue.events.publish(topic, "system.reset")
     
     return {"status": "reset", "message": "System reset to beginning of shift"}
         
 
 @router.post("/system/auto-seat")
-def auto_seat_guests():
+def auto_seat_guests(mode: str = "greedy", venue: VenueState = Depends(get_venue)):
     """
     Auto-seats guests from the waitlist to available tables.
-    Matches first available table with sufficient capacity.
+    mode=greedy: VIPs first, then arrival order, each to the best-fit table
+    (smallest capacity >= party size).
+    mode=optimal: solves the whole waitlist at once as a min-cost assignment
+    (VIP priority, covers seated, wasted seats).
     """
-    seated_log = []
-    
-    global waitlist_db, tables_db
-    
-    # Sort waitlist by VIP status then arrival (mock arrival via index)
-    sorted_waitlist = sorted(waitlist_db, key=lambda x: (not x.isVip))
-    
-    guests_to_remove = []
+    if mode not in ("greedy", "optimal"):
+        raise HTTPException(status_code=400, detail="mode must be 'greedy' or 'optimal'")
+
+    # Waitlist priority order: VIP tier, then arrival time, then party size
+    sorted_waitlist = venue.waitlist.ordered()
     
-    for guest in sorted_waitlist:
-        # Find a suitable table
-        # Strategy: Best fit (smallest capacity >= party size)
-        suitable_tables = [
-            t for t in tables_db 
-            if t.status == 'available' and t.capacity >= guest.party
-        ]
-        
-        if not suitable_tables:
+    if mode == "optimal":
+        planned = seating_engine.assign_optimal(sorted_waitlist, venue.floor.available_by_capacity())
+    else:
+        # Best fit is picked per guest at claim time (capacity buckets)
+        planned = [(guest, None) for guest in sorted_waitlist]
+
+    assignments = []
+    for guest, table in planned:
+        # Claim the guest, then the table: concurrent auto-seat or manual
+        # seat calls can never seat the same guest or table twice
+        if venue.waitlist.remove(guest.id) is None:
             continue
-            
-        # Sort by capacity to find best fit
-        suitable_tables.sort(key=lambda t: t.capacity)
-        selected_table = suitable_tables[0]
-        
-        # Seat the guest
-        # Update table
-        for i, t in enumerate(tables_db):
-            if t.id == selected_table.id:
-                tables_db[i] = t.copy(update={
-                    "status": "occupied",
-                    "guestName": guest.name,
-                    "guestCount": guest.party,
-                    "seatedAt": time.time() * 1000,
-                    "isVip": guest.isVip,
-                })
-                break
-        
-        guests_to_remove.append(guest.id)
-        seated_log.append(f"Seated {guest.name} at Table {selected_table.number}")
+        selected_table = claim_table(venue, guest, table)
+        if selected_table:
+            assignments.append((guest, selected_table))
+        else:
+            # Back in line (arrival time is kept, so priority is unchanged)
+            venue.waitlist.add(guest)
+    
+    seated_log = [f"Seated {guest.name} at Table {table.number}" for guest, table in assignments]
         
-    # Remove seated guests from waitlist
-    waitlist_db = [w for w in waitlist_db if w.id not in guests_to_remove]
+    # Seated guests have left the waitlist
+    for guest, _ in assignments:
+        publish_waitlist(venue, "guest.removed", {"guest_id": guest.id})
     
     return {"status": "success", "seated": seated_log}
 
 # --- Bartender Endpoints ---
 
 @router.get("/bartenders")
-def get_bartenders():
+def get_bartenders(venue: VenueState = Depends(get_venue)):
     """Get all bartenders with their section assignments."""
-    return BARTENDERS
+    return venue.responses.serve("bartenders", venue.sections.version, lambda: venue.sections.bartenders)
+
+@router.put("/bartenders")
+def update_bartenders(bartenders: List[Dict[str, Any]], venue: VenueState = Depends(get_venue)):
+    """
+    Replace section assignments. Rebuilds the routing map and re-buckets
+    live drink tickets.
+    """
+    try:
+        venue.sections.load(bartenders)
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid sections: {e}")
+    venue.bar_queue.rebuild(venue.toast.orders.live())
+    venue.events.publish("bar", "sections.updated", bartenders)
+    return venue.sections.bartenders
 
 @router.get("/bar/queue")
-async def get_bar_queue():
+async def get_bar_queue(bartender_id: Optional[str] = None, venue: VenueState = Depends(get_venue)):
     """
     Get drink orders grouped by bartender section.
     Returns orders with drink items filtered and bartender assigned.
+    Pass bartender_id to get only that bartender's live tickets.
     """
-    toast_orders = await toast_client.get_orders()
-    
-    bar_queue = []
-    
-    for order in toast_orders:
-        if order.status == "delivered":
-            continue
-            
-        # Filter to only drink items
-        drink_items = [
-            item for item in order.items 
-            if item.station and item.station.lower() == "bar"
-        ]
-        
-        if not drink_items:
-            continue
-            
-        # Get bartender for this table
-        bartender = get_bartender_for_table(order.table_number)
-        
-        bar_queue.append({
-            "order_id": order.id,
-            "table": order.table_number,
-            "status": order.status,
-            "server": order.server,
-            "bartender": bartender["name"],
-            "bartender_id": bartender["id"],
-            "created_at": order.created_at.isoformat().replace("+00:00", "Z"),
-            "items": [
-                {
-                    "item_id": item.item_id,
-                    "name": item.name,
-                    "quantity": item.quantity,
-                    "station": item.station,
-                    "course": item.course
-                } for item in drink_items
-            ]
-        })
-    
-    return bar_queue
+    await venue.toast.refresh()
+    return venue.bar_queue.tickets(bartender_id)
+
+
+# --- Push Channel (replaces 2s polling of tables/waitlist/kitchen/status) ---
+
+def parse_topics(topics: Optional[str]) -> List[str]:
+    if not topics:
+        return list(TOPICS)
+    return [t for t in topics.split(",") if t in TOPICS]
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket, topics: Optional[str] = None, venue: VenueState = Depends(get_venue)):
+    """
+    Stream change events over a WebSocket.
+    Subscribe with ?topics=tables,waitlist,kitchen,bar,system (default: all).
+    """
+    await websocket.accept()
+    subscription = venue.events.subscribe(parse_topics(topics))
+    try:
+        while True:
+            await websocket.send_text(await subscription.next())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        venue.events.unsubscribe(subscription)
+
+@router.get("/events")
+async def events_stream(topics: Optional[str] = None, venue: VenueState = Depends(get_venue)):
+    """
+    Stream change events as Server-Sent Events (same payloads as /ws).
+    """
+    subscription = venue.events.subscribe(parse_topics(topics))
+
+    async def stream():
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.next(), timeout=15)
+                    yield f"data: {message}\n\n"
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            venue.events.unsubscribe(subscription)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+# --- Floor Snapshot (one versioned round trip instead of four polls) ---
+
+@router.get("/floor/snapshot")
+async def get_floor_snapshot(since: Optional[int] = None, if_none_match: Optional[str] = Header(None),
+                            venue: VenueState = Depends(get_venue)):
+    """
+    Tables, waitlist, system status and kitchen queue in one payload, tagged
+    with a monotonically increasing state version.
+    Honors If-None-Match (304) and ?since=<version> (only changed sections,
+    and only the tables that changed). A version from before a restart is
+    answered with the full snapshot ("since": null).
+    """
+    live_orders = await venue.toast.get_live_orders()
+    if since is not None and not venue.versions.issued(since):
+        since = None
+
+    etag = venue.versions.etag()
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    payload: Dict[str, Any] = {"version": venue.versions.version, "since": since}
+    if since is None:
+        payload["tables"] = [t.to_dict() for t in venue.floor]
+    else:
+        changed = [venue.floor.get(table_id) for table_id in venue.versions.changed_keys("tables", since)]
+        payload["tables"] = [t.to_dict() for t in changed if t]
+    if venue.versions.section_changed("waitlist", since):
+        payload["waitlist"] = [w.model_dump(mode="json") for w in venue.waitlist.ordered()]
+    if venue.versions.section_changed("system", since):
+        payload["system"] = {"running": venue.system_running}
+    if venue.versions.section_changed("kitchen", since):
+        payload["kitchen"] = build_kitchen_queue(venue, live_orders)
+
+    return JSONResponse(payload, headers={"ETag": etag})
@@ -0,0 +1,146 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.integrations.models import GuestToSeat
+from app.integrations.floor_state import TableState
+
+Assignment = Tuple[GuestToSeat, TableState]
+
+class SeatingEngine:
+    """
+    Batch seating: assigns the whole waitlist at once as a min-cost
+    matching of parties to available tables.
+
+    Cost model (all weights tunable):
+      - seating a party wastes `waste_weight` per empty seat at its table
+      - leaving a party waiting costs `party_weight + cover_weight * size`,
+        multiplied by `vip_weight` for VIPs
+
+    Parties with the same (VIP, size) and tables with the same capacity are
+    interchangeable, so the matching is solved as a small transportation
+    problem between those groups (min-cost flow) rather than party by table.
+    Within a group, earlier arrivals are seated first and tables are taken
+    in floor layout order.
+    """
+
+    def __init__(self, waste_weight: float = 1.0, party_weight: float = 100.0,
+                 cover_weight: float = 10.0, vip_weight: float = 10.0):
+        self.waste_weight = waste_weight
+        self.party_weight = party_weight
+        self.cover_weight = cover_weight
+        self.vip_weight = vip_weight
+
+    def waiting_cost(self, is_vip: bool, party: int) -> float:
+        cost = self.party_weight + self.cover_weight * party
+        return cost * self.vip_weight if is_vip else cost
+
+    def assign_optimal(self, guests: Sequence[GuestToSeat],
+                       available: Dict[int, List[TableState]]) -> List[Assignment]:
+        """
+        Returns (guest, table) pairs minimizing total cost. `guests` must be in
+        priority/arrival order; `available` maps capacity -> tables (see
+        FloorStore.available_by_capacity).
+        """
+        groups: Dict[Tuple[bool, int], List[GuestToSeat]] = defaultdict(list)
+        for guest in guests:
+            groups[(guest.isVip, guest.party)].append(guest)
+
+        group_keys = list(groups)
+        capacities = sorted(c for c, tables in available.items() if tables)
+        flows = _transport(
+            supply=[len(groups[g]) for g in group_keys],
+            demand=[len(available[c]) for c in capacities],
+            cost=[
+                [
+                    self.waste_weight * (c - party) - self.waiting_cost(is_vip, party) if c >= party else None
+                    for c in capacities
+                ]
+                for is_vip, party in group_keys
+            ],
+        )
+
+        # Expand group-level flows into concrete assignments
+        waiting = {g: iter(groups[g]) for g in group_keys}
+        free_tables = {c: iter(available[c]) for c in capacities}
+        assignments: List[Assignment] = []
+        for gi, ci, amount in flows:
+            for _ in range(amount):
+                assignments.append((next(waiting[group_keys[gi]]), next(free_tables[capacities[ci]])))
+
+        # Report in waitlist order
+        rank = {id(g): i for i, g in enumerate(guests)}
+        assignments.sort(key=lambda a: rank[id(a[0])])
+        return assignments
+
+def _transport(supply: List[int], demand: List[int],
+               cost: List[List[Optional[float]]]) -> List[Tuple[int, int, int]]:
+    """
+    Min-cost flow from supply groups to demand groups where only
+    negative-cost (i.e. worthwhile) units are shipped. Successive shortest
+    paths with Bellman-Ford on the residual graph; the graph has only
+    len(supply) + len(demand) + 2 nodes, so this is fast for any waitlist size.
+    Returns (supply_index, demand_index, amount) triples.
+    """
+    n_s, n_d = len(supply), len(demand)
+    source, sink = n_s + n_d, n_s + n_d + 1
+    n = n_s + n_d + 2
+    # Edge list: [to, capacity, cost, reverse_index]
+    graph: List[List[list]] = [[] for _ in range(n)]
+
+    def add_edge(u: int, v: int, capacity: int, edge_cost: float):
+        graph[u].append([v, capacity, edge_cost, len(graph[v])])
+        graph[v].append([u, 0, -edge_cost, len(graph[u]) - 1])
+
+    for si, amount in enumerate(supply):
+        add_edge(source, si, amount, 0.0)
+    for si, row in enumerate(cost):
+        for di, edge_cost in enumerate(row):
+            if edge_cost is not None:
+                add_edge(si, n_s + di, min(supply[si], demand[di]), edge_cost)
+    for di, amount in enumerate(demand):
+        add_edge(n_s + di, sink, amount, 0.0)
+
+    while True:
+        dist = [float("inf")] * n
+        prev: List[Optional[Tuple[int, int]]] = [None] * n
+        dist[source] = 0.0
+        for _ in range(n - 1):
+            updated = False
+            for u in range(n):
+                if dist[u] == float("inf"):
+                    continue
+                for ei, (v, capacity, edge_cost, _) in enumerate(graph[u]):
+                    if capacity > 0 and dist[u] + edge_cost < dist[v] - 1e-9:
+                        dist[v] = dist[u] + edge_cost
+                        prev[v] = (u, ei)
+                        updated = True
+            if not updated:
+                break
+
+        # Stop once shipping another unit no longer lowers the total cost
+        if dist[sink] >= 0:
+            break
+
+        amount = None
+        v = sink
+        while v != source:
+            u, ei = prev[v]
+            amount = graph[u][ei][1] if amount is None else min(amount, graph[u][ei][1])
+            v = u
+        v = sink
+        while v != source:
+            u, ei = prev[v]
+            edge = graph[u][ei]
+            edge[1] -= amount
+            graph[v][edge[3]][1] += amount
+            v = u
+
+    flows = []
+    for si in range(n_s):
+        for v, capacity, edge_cost, rev in graph[si]:
+            if n_s <= v < n_s + n_d:
+                shipped = graph[v][rev][1]
+                if shipped > 0:
+                    flows.append((si, v - n_s, shipped))
+    return flows
+
+seating_engine = SeatingEngine()
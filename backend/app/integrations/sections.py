@@ -0,0 +1,58 @@
+from typing import Any, Dict, List, Optional
+
+# Bartender Section Assignments (4 bartenders, 10 tables each)
+BARTENDERS: List[Dict[str, Any]] = [
+    {"id": "b1", "name": "Alex", "tables": list(range(1, 11))},      # Tables 1-10
+    {"id": "b2", "name": "Jordan", "tables": list(range(11, 21))},   # Tables 11-20
+    {"id": "b3", "name": "Taylor", "tables": list(range(21, 31))},   # Tables 21-30
+    {"id": "b4", "name": "Casey", "tables": list(range(31, 41))},    # Tables 31-40
+]
+
+class SectionMap:
+    """
+    Table -> bartender routing, built once from the section assignments and
+    rebuilt via `load` when sections change (which bumps `version`). Both
+    the bar queue and the kitchen optimizer's bar-station routing read from
+    this one map.
+    """
+
+    def __init__(self, bartenders: List[Dict[str, Any]]):
+        self.bartenders: List[Dict[str, Any]] = []
+        self._by_table: Dict[int, Dict[str, Any]] = {}
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._station: Dict[str, str] = {}
+        self.version = 0
+        self.load(bartenders)
+
+    def load(self, bartenders: List[Dict[str, Any]]):
+        if not bartenders:
+            raise ValueError("At least one bartender section is required")
+        by_table: Dict[int, Dict[str, Any]] = {}
+        for bartender in bartenders:
+            if "id" not in bartender or "name" not in bartender:
+                raise ValueError("Each section needs an id, name and tables")
+            for table_number in bartender["tables"]:
+                # First assignment wins, matching the old linear scan
+                by_table.setdefault(int(table_number), bartender)
+        self.bartenders = bartenders
+        self._by_table = by_table
+        self._by_id = {b["id"]: b for b in bartenders}
+        self._station = {b["id"]: f"bar {i}" for i, b in enumerate(bartenders, 1)}
+        self.version += 1
+
+    def get(self, bartender_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(bartender_id)
+
+    def for_table(self, table_number: Optional[int]) -> Dict[str, Any]:
+        """Returns the bartender responsible for a table (default: first bartender)."""
+        if table_number is None:
+            return self.bartenders[0]
+        return self._by_table.get(table_number, self.bartenders[0])
+
+    def station_for_table(self, table_number: Optional[int]) -> str:
+        """Bar station name ("bar 1".."bar N") serving a table."""
+        if table_number is None:
+            return "bar"
+        return self._station[self.for_table(table_number)["id"]]
+
+bar_sections = SectionMap(BARTENDERS)
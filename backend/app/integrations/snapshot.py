@@ -0,0 +1,50 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Sections of the floor snapshot payload
+SECTIONS = ("tables", "waitlist", "system", "kitchen")
+
+class StateVersions:
+    """
+    Monotonic state clock for the live floor.
+
+    Every mutation bumps the global version and stamps the section (and, for
+    tables, the individual table id) with it, so a client holding version N
+    can be sent only what changed after N.
+
+    The clock starts at the boot time in microseconds (`epoch`), so versions
+    and ETags never repeat across restarts; a version this process did not
+    issue (`issued` is False) cannot be diffed against and gets everything.
+    """
+
+    def __init__(self):
+        self.epoch = time.time_ns() // 1000
+        self.version = self.epoch
+        self._sections: Dict[str, int] = {section: self.epoch for section in SECTIONS}
+        self._keys: Dict[str, Dict[str, int]] = {section: {} for section in SECTIONS}
+        self._lock = threading.Lock()
+
+    def touch(self, section: str, keys: Iterable[str] = ()) -> int:
+        with self._lock:
+            self.version += 1
+            self._sections[section] = self.version
+            stamped = self._keys[section]
+            for key in keys:
+                stamped[key] = self.version
+            return self.version
+
+    def issued(self, version: int) -> bool:
+        return self.epoch <= version <= self.version
+
+    def section_changed(self, section: str, since: Optional[int]) -> bool:
+        return since is None or self._sections[section] > since
+
+    def changed_keys(self, section: str, since: int) -> List[str]:
+        with self._lock:
+            return [key for key, version in self._keys[section].items() if version > since]
+
+    def etag(self) -> str:
+        return f'W/"{self.version}"'
+
+state_versions = StateVersions()
@@ -1,80 +1,217 @@
-import httpx
+import asyncio
 import os
-from typing import List, Dict, Any
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional, Sequence
 from app.integrations.models import Order, OrderItem
+from app.integrations.order_registry import OrderRegistry
+from app.integrations.order_archive import OrderArchive
+from app.integrations.toast_http import ToastSession, toast_session
 import logging
 
 logger = logging.getLogger("uvicorn")
 
+def toast_time(moment: datetime) -> str:
+    """Toast's ISO 8601 timestamp format (milliseconds, numeric UTC offset)."""
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}+0000"
+
 class ToastClient:
-    def __init__(self):
-        self.base_url = os.getenv("TOAST_API_URL", "https://ws-sandbox-api.toasttab.com")
-        self.client_id = os.getenv("TOAST_CLIENT_ID", "mock_client_id")
-        self.client_secret = os.getenv("TOAST_CLIENT_SECRET", "mock_client_secret")
-        self.restaurant_guid = os.getenv("TOAST_RESTAURANT_GUID", "mock_restaurant_guid")
-        self.token = None
-        self.active_orders = []
-
-    async def _get_token(self):
-        # In a real scenario, this would exchange client_id/secret for a bearer token
-        # For now, we'll return a mock token
-        return "mock_bearer_token"
+    def __init__(self, restaurant_guid: Optional[str] = None, session: Optional[ToastSession] = None):
+        # Connection pool and OAuth token are shared by every restaurant
+        self.session = session or toast_session
+        self.base_url = self.session.base_url
+        self.client_id = self.session.client_id
+        # No GUID of its own: mock mode (a venue never borrows another restaurant's orders)
+        self.restaurant_guid = restaurant_guid
+        self.orders = OrderRegistry()
+        # Finished orders leave the hot set after a grace period (seconds)
+        self.archive = OrderArchive()
+        self.archive_grace_seconds = float(os.getenv("ORDER_ARCHIVE_GRACE_SECONDS", "300"))
+        # Incremental sync: only orders modified since the high-water mark are fetched
+        self.modified_since: Optional[datetime] = None
+        self.page_size = int(os.getenv("TOAST_PAGE_SIZE", "100"))
+        # Re-read this much before the mark (late writes, clock skew); unchanged orders are skipped
+        self.sync_overlap = timedelta(seconds=float(os.getenv("TOAST_SYNC_OVERLAP_SECONDS", "60")))
+        # First sync (or a full one) reaches this far back
+        self.sync_lookback = timedelta(hours=float(os.getenv("TOAST_SYNC_LOOKBACK_HOURS", "24")))
+        # Order guid -> modifiedDate last applied
+        self._modified: Dict[str, str] = {}
+        # Set while a background poller keeps the registry fresh (reads then skip Toast)
+        self.polled = False
+        self.synced_at: Optional[float] = None
+
+    @property
+    def mock(self) -> bool:
+        """True without Toast credentials or a restaurant GUID (nothing upstream to call)."""
+        return self.client_id == "mock_client_id" or not self.restaurant_guid
+
+    @property
+    def active_orders(self) -> List[Order]:
+        """All known orders in arrival order (read-only view of the registry)."""
+        return self.orders.all()
 
     async def get_orders(self) -> List[Order]:
         """
-        Fetches recent orders from Toast.
+        All known orders (synced from Toast first unless a poller keeps
+        them fresh).
+        """
+        await self.refresh()
+        return self.orders.all()
+
+    async def sync(self, full: bool = False, mirrors: Sequence["ToastClient"] = ()) -> int:
+        """
+        Pulls the orders modified since the high-water mark (or within the
+        lookback window when `full` or on the first sync), page by page,
+        and upserts those that changed into the registry. The mark only
+        moves once the whole window is read, so a failed sync is retried
+        from the same point. Returns the number of orders applied.
+
+        `mirrors` are other clients of the same restaurant: each page is
+        read once and applied to every one of them (the window reaches back
+        to the oldest of their marks).
+        """
+        clients = [self, *mirrors]
+        now = datetime.now(timezone.utc)
+        since = min(now - client.sync_lookback if full or client.modified_since is None else
+                    client.modified_since - client.sync_overlap for client in clients)
+        applied, newest = 0, None
+        async for page in self.pages(since, now):
+            for client in clients:
+                applied += client._apply(page)
+            for data in page:
+                modified = data.get("modifiedDate")
+                if modified is not None:
+                    stamp = datetime.fromisoformat(modified)
+                    if newest is None or stamp > newest:
+                        newest = stamp
+        for client in clients:
+            client.modified_since = max(filter(None, (newest, client.modified_since)), default=since)
+            client.synced_at = time.time()
+        return applied
+
+    def _apply(self, page: List[Dict[str, Any]]) -> int:
+        """Upserts the raw orders of a page that changed since last applied."""
+        changed = []
+        for data in page:
+            guid, modified = data.get("guid"), data.get("modifiedDate")
+            # Orders already archived this shift stay out of the hot set
+            if guid in self.archive or (modified is not None and self._modified.get(guid) == modified):
+                continue
+            changed.append(self._map_to_order(data))
+            if modified is not None:
+                self._modified[guid] = modified
+        self.orders.upsert_many(changed)
+        return len(changed)
+
+    async def pages(self, since: datetime, until: datetime,
+                    batch: int = 100) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Raw orders modified in [since, until), in lists of up to `batch` as
+        each `ordersBulk` page streams in (a large page is never held whole).
         """
-        # Verification: If in mock mode, return generated data
-        if self.client_id == "mock_client_id":
-             if not self.active_orders:
-                 self.active_orders = self._mock_orders()
-             return self.active_orders
+        page = 1
+        while True:
+            received, orders = 0, []
+            async for data in self.session.stream("/orders/v2/ordersBulk", self.restaurant_guid, params={
+                "startDate": toast_time(since), "endDate": toast_time(until),
+                "pageSize": self.page_size, "page": page,
+            }):
+                received += 1
+                orders.append(data)
+                if len(orders) == batch:
+                    yield orders
+                    orders = []
+            if orders:
+                yield orders
+            if received < self.page_size:
+                return
+            page += 1
 
+    async def refresh(self):
+        """
+        Pulls fresh orders from Toast into the registry (mock mode: seeds
+        only). A no-op while a background poller keeps the registry fresh.
+        """
+        if self.mock:
+            if not self.orders:
+                self.orders.upsert_many(self._mock_orders())
+            return
+        if self.polled:
+            return
         try:
-            token = await self._get_token()
-            headers = {"Authorization": f"Bearer {token}", "Toast-Restaurant-External-ID": self.restaurant_guid}
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/orders/v2/orders", headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                return [self._map_to_order(o) for o in data]
+            await self.sync()
         except Exception as e:
             logger.error(f"Failed to fetch Toast orders: {e}")
-            return []
+
+    async def get_live_orders(self) -> List[Order]:
+        """
+        Refreshes from Toast and returns only in-flight orders (not delivered/closed).
+        """
+        await self.refresh()
+        return self.orders.live()
+
+    def archive_closed(self, now: Optional[float] = None) -> int:
+        """
+        Moves orders closed longer than the grace period from the hot set
+        into the shift archive. Returns the number archived.
+        """
+        cutoff = (now if now is not None else time.time()) - self.archive_grace_seconds
+        expired = self.orders.closed_before(cutoff)
+        for order, closed_at in expired:
+            self.archive.append(order, closed_at)
+            self._modified.pop(order.id, None)
+            self.orders.remove(order.id)
+        return len(expired)
 
     def add_order(self, order: Order):
         """
         Manually add an order (for Tablet UI / Testing).
         """
-        self.active_orders.append(order)
-        return order
+        return self.orders.add(order)
 
     def _map_to_order(self, data: Dict[str, Any]) -> Order:
         """
         Maps Toast JSON schema to our unified Order model.
+
+        Toast is a trusted upstream, so the models are built without
+        validation (`model_construct`); the few conversions validation
+        would have done are done here. The order keeps Toast's creation
+        time, so re-mapping it on every sync does not reset its age.
         """
         # This is a simplified mapping. Real Toast schema is complex.
         items = []
-        for check in data.get("checks", []):
-            for selection in check.get("selections", []):
-                items.append(OrderItem(
+        for check in data.get("checks") or ():
+            for selection in check.get("selections") or ():
+                items.append(OrderItem.model_construct(
                     item_id=str(selection.get("itemGuid")),
-                    name=selection.get("displayName", "Unknown Item"),
-                    quantity=selection.get("quantity", 1),
-                    price=selection.get("price", 0.0),
-                    special_requests=selection.get("modifiers", [])
+                    name=selection.get("displayName") or "Unknown Item",
+                    quantity=int(selection.get("quantity") or 1),
+                    price=float(selection.get("price") or 0.0),
+                    # Modifiers are objects in the Toast schema; keep their names
+                    special_requests=[m.get("displayName", "") if isinstance(m, dict) else str(m)
+                                      for m in selection.get("modifiers") or ()],
+                    station=None, course=None,
                 ))
 
-        return Order(
-            id=data.get("guid"),
+        table = (data.get("table") or {}).get("id")  # Simplified
+        guid = str(data.get("guid"))
+        created = data.get("createdDate") or data.get("openedDate")
+        if created is not None:
+            created_at = datetime.fromisoformat(created)
+        else:
+            known = self.orders.get(guid)
+            created_at = known.created_at if known is not None else datetime.now(timezone.utc)
+        return Order.model_construct(
+            id=guid,
             source="toast",
-            table_number=data.get("table", {}).get("id"), # Simplified
-            guest_count=data.get("guestCount", 1),
+            table_number=table if isinstance(table, int) else int(table) if str(table).isdigit() else None,
+            guest_count=int(data.get("guestCount") or 1),
             items=items,
-            total_amount=data.get("totalAmount", 0.0),
+            total_amount=float(data.get("totalAmount") or 0.0),
             status=data.get("voided") and "voided" or "open", # Simplified status logic
-            server=data.get("server", {}).get("displayName") # Map server name if available
+            created_at=created_at,
+            server=(data.get("server") or {}).get("displayName") # Map server name if available
         )
 
     def _mock_orders(self) -> List[Order]:
@@ -83,4 +220,40 @@ class ToastClient:
         """
         return []
 
-toast_client = ToastClient()
+def poll_delay(failures: int, interval: float, jitter: float, max_backoff: float,
+               rng: random.Random = random) -> float:
+    """Seconds until the next poll: the interval, doubled per consecutive failure (capped), +/- jitter."""
+    delay = min(interval * 2 ** min(failures, 16), max(max_backoff, interval))
+    return delay * rng.uniform(1 - jitter, 1 + jitter)
+
+async def poll_restaurant(clients: Callable[[], List[ToastClient]], interval: float = 5.0,
+                          jitter: float = 0.2, max_backoff: float = 120.0):
+    """
+    Background sync of one Toast restaurant: each round, one sync reads
+    the restaurant's changes once and applies them to the clients of every
+    venue on that GUID, then the loop sleeps `poll_delay`. Synced clients
+    are marked `polled`, so their read endpoints serve the registry
+    without calling Toast; cancelling the task hands them back to syncing
+    on read.
+    """
+    failures = 0
+    # Start at a random point in the interval so restaurants do not poll in lockstep
+    await asyncio.sleep(random.uniform(0, interval * jitter))
+    try:
+        while True:
+            current = clients()
+            if current:
+                try:
+                    await current[0].sync(mirrors=current[1:])
+                    for client in current:
+                        client.polled = True
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    logger.error(f"Toast sync failed for restaurant {current[0].restaurant_guid}: {e}")
+            await asyncio.sleep(poll_delay(failures, interval, jitter, max_backoff))
+    finally:
+        for client in clients():
+            client.polled = False
+
+toast_client = ToastClient(os.getenv("TOAST_RESTAURANT_GUID"))
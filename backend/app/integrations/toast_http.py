@@ -0,0 +1,186 @@
+import asyncio
+import codecs
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx negotiates HTTP/2 only when h2 is installed)
+    HTTP2 = True
+except ImportError:  # optional; HTTP/1.1 keep-alive without it
+    HTTP2 = False
+
+logger = logging.getLogger("uvicorn")
+
+LOGIN_PATH = "/authentication/v1/authentication/login"
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Elements of a top-level JSON array, decoded as soon as each one is
+    complete in the byte stream (the whole body is never held). An element
+    counts as complete once something follows it, so a value cut off at a
+    chunk boundary is retried with more data.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, opened = "", 0, False
+    async for chunk in chunks:
+        buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if not opened:
+                if buffer[pos] != "[":
+                    raise ValueError(f"Expected a JSON array, got {buffer[pos:pos + 20]!r}")
+                opened, pos = True, pos + 1
+            elif buffer[pos] == ",":
+                pos += 1
+            elif buffer[pos] == "]":
+                return
+            else:
+                try:
+                    value, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break
+                if end == len(buffer):
+                    break
+                yield value
+                pos = end
+    raise ValueError("JSON array ended early")
+
+class ToastSession:
+    """
+    One pooled, keep-alive connection to the Toast API for the whole process
+    (every venue's ToastClient shares it), plus the OAuth token.
+
+    The httpx client is opened at startup (`start`) and closed at shutdown
+    (`close`); used before that, it is opened on first request. The token
+    is cached until `refresh_margin` seconds before it expires; from then
+    on requests keep using it while one background login replaces it, and
+    once it has expired they all wait on that same login (single flight).
+    """
+
+    def __init__(self, base_url: Optional[str] = None, client_id: Optional[str] = None,
+                 client_secret: Optional[str] = None, max_connections: Optional[int] = None,
+                 timeout: Optional[float] = None, refresh_margin: float = 300.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url or os.getenv("TOAST_API_URL", "https://ws-sandbox-api.toasttab.com")
+        self.client_id = client_id or os.getenv("TOAST_CLIENT_ID", "mock_client_id")
+        self.client_secret = client_secret or os.getenv("TOAST_CLIENT_SECRET", "mock_client_secret")
+        # Nearly all traffic goes to one host, so the pool limit is the per-host limit
+        max_connections = max_connections or int(os.getenv("TOAST_MAX_CONNECTIONS", "20"))
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                   keepalive_expiry=float(os.getenv("TOAST_KEEPALIVE_SECONDS", "60")))
+        timeout = timeout or float(os.getenv("TOAST_TIMEOUT_SECONDS", "10"))
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self.http2 = HTTP2 and os.getenv("TOAST_HTTP2", "true").lower() == "true"
+        self.refresh_margin = refresh_margin
+        self.transport = transport
+        self.logins = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._token: Optional[str] = None
+        self._expires = 0.0
+        self._refreshing: Optional[asyncio.Task] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Pooled connections belong to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(base_url=self.base_url, http2=self.http2, limits=self.limits,
+                                             timeout=self.timeout, transport=self.transport)
+        return self._client
+
+    async def start(self):
+        """Opens the connection pool (app startup)."""
+        self.client
+
+    async def close(self):
+        if self._refreshing is not None:
+            self._refreshing.cancel()
+            self._refreshing = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def token(self) -> str:
+        now = time.monotonic()
+        if self._token is not None and now < self._expires - self.refresh_margin:
+            return self._token
+        if self._refreshing is not None and self._refreshing.get_loop() is not asyncio.get_running_loop():
+            self._refreshing = None
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._login())
+            self._refreshing.add_done_callback(self._refreshed)
+        if self._token is not None and now < self._expires:
+            return self._token
+        return await asyncio.shield(self._refreshing)
+
+    def invalidate(self):
+        """Drops the cached token (the API rejected it)."""
+        self._token, self._expires = None, 0.0
+
+    async def get(self, path: str, restaurant_guid: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """GET on the pooled client with auth headers; a 401 logs in again and retries once."""
+        for attempt in range(2):
+            token = await self.token()
+            response = await self.client.get(path, params=params, headers={
+                "Authorization": f"Bearer {token}", "Toast-Restaurant-External-ID": restaurant_guid,
+            })
+            if response.status_code != 401 or attempt:
+                break
+            if self._token == token:
+                self.invalidate()
+        response.raise_for_status()
+        return response
+
+    async def stream(self, path: str, restaurant_guid: str,
+                     params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Any]:
+        """
+        Like `get` for endpoints that answer a JSON array: yields its
+        elements as the body arrives (see `iter_json_array`).
+        """
+        for attempt in range(2):
+            token = await self.token()
+            async with self.client.stream("GET", path, params=params, headers={
+                "Authorization": f"Bearer {token}", "Toast-Restaurant-External-ID": restaurant_guid,
+            }) as response:
+                if response.status_code == 401 and not attempt:
+                    if self._token == token:
+                        self.invalidate()
+                    continue
+                response.raise_for_status()
+                async for item in iter_json_array(response.aiter_bytes()):
+                    yield item
+                return
+
+    async def _login(self) -> str:
+        started = time.monotonic()
+        response = await self.client.post(LOGIN_PATH, json={
+            "clientId": self.client_id, "clientSecret": self.client_secret,
+            "userAccessType": "TOAST_MACHINE_CLIENT",
+        })
+        response.raise_for_status()
+        token = response.json()["token"]
+        self.logins += 1
+        self._token = token["accessToken"]
+        self._expires = started + float(token.get("expiresIn", 3600))
+        return self._token
+
+    def _refreshed(self, task: asyncio.Task):
+        self._refreshing = None
+        if not task.cancelled() and task.exception() is not None:
+            # Waiters see the error; a background refresh is retried by the next request
+            logger.error(f"Toast login failed: {task.exception()}")
+
+toast_session = ToastSession()
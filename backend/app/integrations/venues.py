@@ -0,0 +1,255 @@
+import asyncio
+import copy
+import logging
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, TYPE_CHECKING
+from app.core.unity_os import UnityConfig
+from app.integrations.models import Order, TableData, GuestToSeat
+from app.integrations.floor_state import FloorStore
+from app.integrations.waitlist import Waitlist
+from app.integrations.sections import BARTENDERS, SectionMap, bar_sections
+from app.integrations.bar_queue import BarQueue
+from app.integrations.events import EventBroker, event_broker
+from app.integrations.snapshot import StateVersions, state_versions
+from app.integrations.response_cache import ResponseCache
+from app.integrations.logic import reconciler
+from app.integrations.toast_client import ToastClient, poll_restaurant, toast_client
+from app.ai.kitchen import KitchenOptimizer, kitchen_optimizer
+
+if TYPE_CHECKING:
+    from app.integrations.persistence import WriteBehind
+
+logger = logging.getLogger("uvicorn")
+
+DEFAULT_VENUE = "default"
+VENUE_KEY_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]{0,63}$")
+
+SERVERS: List[str] = ["Maria", "James", "Sarah", "David", "Michael"]
+
+# OrderRegistry event -> pushed event type, by order status (None: any other)
+ORDER_EVENTS: Dict[str, Dict[Optional[str], str]] = {
+    "added": {None: "order.updated"},
+    "status": {"ready": "order.ready", "delivered": "order.delivered", None: "order.status"},
+}
+
+# Fields reset when a table is cleared or the shift is reset
+CLEARED_TABLE_FIELDS: Dict[str, Any] = {
+    "status": "available",
+    "guestName": None,
+    "guestCount": None,
+    "seatedAt": None,
+    "isVip": None,
+    "currentCourse": "seated",
+    "paymentStatus": "none",
+    "orderTotal": 0.0,
+    "items": [],
+}
+
+def demo_waitlist() -> List[GuestToSeat]:
+    return [
+        GuestToSeat(id='w1', name='Anderson, Robert', party=4, isVip=True, notes='Celebrating promotion', source='waitlist'),
+        GuestToSeat(id='w2', name='Kim, Jessica', party=2, isVip=False, source='waitlist'),
+        GuestToSeat(id='w3', name='Martinez, Carlos', party=6, isVip=False, notes='Large party', source='waitlist'),
+    ]
+
+def build_floor_layout(rows: int = 5, cols: int = 8) -> List[TableData]:
+    """Generate the demo floor (40 tables by default, matching the frontend)."""
+    tables: List[TableData] = []
+    server_count: int = len(SERVERS)
+    i: int
+    for i in range(rows * cols):
+        # Calculate row and column
+        r: int = i // cols
+        c: int = i % cols
+        current_count: int = i + 1
+
+        # Mix capacities
+        cap: int = 4
+        if current_count % 3 == 0: cap = 2
+        elif current_count % 5 == 0: cap = 6
+        elif current_count % 7 == 0: cap = 8
+
+        # Tighter packing to fit 8 cols in 0-100 range
+        t_x: int = 5 + (c * 11)
+        t_y: int = 10 + (r * 18)
+
+        # Assign server round-robin
+        server_idx: int = (current_count - 1) % server_count
+        assigned_server: str = SERVERS[server_idx]
+
+        tables.append(TableData(
+            id=f"t{current_count}",
+            number=current_count,
+            capacity=cap,
+            x=t_x,
+            y=t_y,
+            status="available",
+            server=assigned_server,
+            paymentStatus="none",
+            orderTotal=0.0,
+            items=[]
+        ))
+    return tables
+
+class VenueState:
+    """
+    All live state for one venue: floor, waitlist, orders (its own Toast
+    restaurant), kitchen plans, bar sections, push channel and snapshot clock.
+    Requests for one venue only ever touch its own partition.
+    """
+
+    def __init__(self, key: str, name: Optional[str] = None, restaurant_guid: Optional[str] = None,
+                 toast: Optional[ToastClient] = None, kitchen: Optional[KitchenOptimizer] = None,
+                 sections: Optional[SectionMap] = None, waitlist: Optional[List[GuestToSeat]] = None,
+                 tables: Optional[List[TableData]] = None, events: Optional[EventBroker] = None,
+                 versions: Optional[StateVersions] = None):
+        self.key = key
+        self.name = name or key
+        self.floor = FloorStore(tables if tables is not None else build_floor_layout())
+        self.waitlist = Waitlist(waitlist or ())
+        self.system_running = False
+        self.sections = sections or SectionMap(copy.deepcopy(BARTENDERS))
+        self.toast = toast or ToastClient(restaurant_guid=restaurant_guid)
+        self.toast.archive.venue_key = key
+        self.kitchen = kitchen or KitchenOptimizer(sections=self.sections)
+        self.bar_queue = BarQueue(self.sections)
+        self.bar_queue.rebuild(self.toast.orders.live())
+        self.toast.orders.subscribe(self.bar_queue.on_order_event)
+        # Guest profiles follow order events (each order version is applied once)
+        self.toast.orders.subscribe(lambda event, order: reconciler.on_order_event(key, event, order))
+        self.events = events or EventBroker()
+        self.versions = versions or StateVersions()
+        # Every order write (requests, Toast sync, webhooks, restore) is pushed from here
+        self.toast.orders.subscribe(self.on_order_event)
+        # Encoded GET bodies (tables, waitlist, bartenders)
+        self.responses = ResponseCache()
+
+    def on_order_event(self, event: str, order: Optional[Order]):
+        """OrderRegistry listener: record the change and push it to kitchen and bar screens."""
+        if event not in ORDER_EVENTS:
+            return
+        self.versions.touch("kitchen")
+        event_type = ORDER_EVENTS[event].get(order.status, ORDER_EVENTS[event][None])
+        data = {"order_id": order.id, "table": order.table_number, "status": order.status}
+        self.events.publish("kitchen", event_type, data)
+        if any(i.station and i.station.lower() == "bar" for i in order.items):
+            self.events.publish("bar", event_type, data)
+
+class VenueRegistry:
+    """
+    Venue key -> VenueState. Lookups are a dict hit, so the venue set can
+    grow to hundreds per process. Unknown keys are rejected unless
+    `autocreate` is on (then any valid slug gets a fresh venue).
+    """
+
+    def __init__(self, autocreate: bool = False):
+        self.autocreate = autocreate
+        self.persistence: Optional["WriteBehind"] = None
+        self._venues: Dict[str, VenueState] = {}
+
+    def __len__(self) -> int:
+        return len(self._venues)
+
+    def __iter__(self) -> Iterator[VenueState]:
+        return iter(list(self._venues.values()))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._venues
+
+    def keys(self) -> List[str]:
+        return list(self._venues)
+
+    def register(self, key: str, **kwargs) -> VenueState:
+        if not VENUE_KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid venue key: {key!r}")
+        venue = self._venues.get(key)
+        if venue is None:
+            venue = VenueState(key, **kwargs)
+            if self.persistence is not None:
+                self._persist(venue)
+            self._venues[key] = venue
+        return venue
+
+    def get(self, key: str) -> Optional[VenueState]:
+        venue = self._venues.get(key)
+        if venue is None and self.autocreate and VENUE_KEY_PATTERN.match(key):
+            venue = self.register(key)
+        return venue
+
+    def persist(self, persistence: "WriteBehind"):
+        """
+        Restore every venue from the database and record its changes from
+        now on (venues registered later are restored on registration).
+        """
+        self.persistence = persistence
+        for venue in self:
+            self._persist(venue)
+
+    def _persist(self, venue: VenueState):
+        try:
+            tables, orders = self.persistence.restore(venue)
+            if tables or orders:
+                logger.info(f"Restored venue {venue.key}: {tables} tables, {orders} live orders")
+        except Exception as e:
+            logger.error(f"Failed to restore venue {venue.key}: {e}")
+        self.persistence.attach(venue)
+
+    def archive_closed(self) -> int:
+        return sum(venue.toast.archive_closed() for venue in self)
+
+    def flush_archives(self) -> int:
+        return sum(venue.toast.archive.flush() for venue in self if venue.toast.archive.pending)
+
+    async def run_archiver(self, interval: float = 30.0):
+        """
+        Background loop: sweep closed orders of every venue into its archive
+        and flush the archives to the database off the event loop.
+        """
+        while True:
+            try:
+                self.archive_closed()
+                await asyncio.to_thread(self.flush_archives)
+            except Exception as e:
+                logger.error(f"Order archiver failed: {e}")
+            await asyncio.sleep(interval)
+
+    def toast_clients(self, restaurant_guid: str) -> List[ToastClient]:
+        return [venue.toast for venue in self if venue.toast.restaurant_guid == restaurant_guid]
+
+    async def run_toast_sync(self, interval: float = 5.0, jitter: float = 0.2, max_backoff: float = 120.0):
+        """
+        Background loop: keeps one `poll_restaurant` task per Toast
+        restaurant GUID (venues registered later are picked up on the next
+        pass), so upstream calls do not grow with the screens polling us.
+        Mock-mode clients (no credentials or no GUID) have nothing to poll.
+        """
+        pollers: Dict[str, asyncio.Task] = {}
+        try:
+            while True:
+                for guid in {venue.toast.restaurant_guid for venue in self if not venue.toast.mock}:
+                    if guid not in pollers or pollers[guid].done():
+                        pollers[guid] = asyncio.create_task(poll_restaurant(
+                            lambda guid=guid: self.toast_clients(guid), interval, jitter, max_backoff))
+                await asyncio.sleep(interval)
+        finally:
+            for task in pollers.values():
+                task.cancel()
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+def build_registry() -> VenueRegistry:
+    registry = VenueRegistry(autocreate=os.getenv("VENUE_AUTOCREATE", "false").lower() == "true")
+    # The default venue keeps the process-wide clients (and the demo waitlist)
+    registry.register(DEFAULT_VENUE, name="Default", toast=toast_client, kitchen=kitchen_optimizer,
+                      sections=bar_sections, waitlist=demo_waitlist(),
+                      events=event_broker, versions=state_versions)
+    for distro, locations in UnityConfig.LOCATIONS.items():
+        for location in locations:
+            # Only its own GUID: a location without one runs in mock mode
+            registry.register(slugify(location), name=location,
+                              restaurant_guid=os.getenv(f"TOAST_RESTAURANT_GUID_{slugify(location).replace('-', '_').upper()}"))
+    return registry
+
+venues = build_registry()
@@ -0,0 +1,102 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+from app.integrations.models import GuestToSeat
+
+class Waitlist:
+    """
+    Priority-queue waitlist.
+
+    Guests are ordered by (tier, arrival time, party size): VIPs first, then
+    earliest arrival, then smaller parties. Entries live in a heap with an
+    id -> entry map; removal marks the entry dead in O(1) and dead entries are
+    discarded lazily when they reach the top (or when they outnumber the
+    live ones).
+
+    All operations are atomic, so `remove` doubles as a claim: when several
+    requests try to seat the same guest, only one gets the guest back.
+    `version` changes on every change to the list.
+    """
+
+    def __init__(self, guests: Iterable[GuestToSeat] = ()):
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._counter = itertools.count()
+        self._lock = threading.RLock()
+        self.version = 0
+        for guest in guests:
+            self.add(guest)
+
+    @staticmethod
+    def tier(guest: GuestToSeat) -> int:
+        return 0 if guest.isVip else 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, guest_id: str) -> bool:
+        return guest_id in self._entries
+
+    def __iter__(self) -> Iterator[GuestToSeat]:
+        return iter(self.ordered())
+
+    def get(self, guest_id: str) -> Optional[GuestToSeat]:
+        entry = self._entries.get(guest_id)
+        return entry[-1] if entry else None
+
+    def add(self, guest: GuestToSeat) -> GuestToSeat:
+        """Queue a guest (stamping arrival time if missing). Re-adding an id replaces it."""
+        if guest.arrivedAt is None:
+            guest.arrivedAt = time.time() * 1000
+        with self._lock:
+            self.remove(guest.id)
+            entry = [self.tier(guest), guest.arrivedAt, guest.party, next(self._counter), guest]
+            self._entries[guest.id] = entry
+            heapq.heappush(self._heap, entry)
+            self.version += 1
+        return guest
+
+    def remove(self, guest_id: str) -> Optional[GuestToSeat]:
+        with self._lock:
+            entry = self._entries.pop(guest_id, None)
+            if entry is None:
+                return None
+            guest = entry[-1]
+            entry[-1] = None  # Mark dead; dropped when it surfaces
+            self.version += 1
+            if len(self._heap) > 2 * len(self._entries) + 16:
+                self._compact()
+        return guest
+
+    def peek(self) -> Optional[GuestToSeat]:
+        with self._lock:
+            while self._heap and self._heap[0][-1] is None:
+                heapq.heappop(self._heap)
+            return self._heap[0][-1] if self._heap else None
+
+    def pop(self) -> Optional[GuestToSeat]:
+        with self._lock:
+            guest = self.peek()
+            if guest is not None:
+                heapq.heappop(self._heap)
+                del self._entries[guest.id]
+                self.version += 1
+        return guest
+
+    def ordered(self) -> List[GuestToSeat]:
+        """Live guests in seating priority order."""
+        with self._lock:
+            # Read guests under the lock: a concurrent remove clears entry[-1]
+            return [entry[-1] for entry in sorted(self._entries.values())]
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+            self._entries.clear()
+            self.version += 1
+
+    def _compact(self):
+        self._heap = list(self._entries.values())
+        heapq.heapify(self._heap)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, Tuple, TYPE_CHECKING
+from app.integrations.logic import order_version
+from app.integrations.models import Order
+
+if TYPE_CHECKING:
+    from app.integrations.venues import VenueState
+
+logger = logging.getLogger("uvicorn")
+
+class WebhookIngest:
+    """
+    Buffered webhook ingestion: the endpoint validates and `submit`s, and
+    workers apply the orders in micro-batches off the request path.
+
+    Orders are routed to a worker by venue and order id, so one order's
+    updates are applied in arrival order. Each worker takes up to
+    `batch_size` queued orders at a time, keeps the latest of each order,
+    drops versions already applied (Toast retries, repeated updates) and
+    hands the rest to `apply(venue, orders)` in a thread. `submit` returns
+    False when the worker's queue is full; the endpoint then asks Toast to
+    retry later instead of queueing without bound.
+    """
+
+    def __init__(self, apply: Callable[["VenueState", List[Order]], None], maxsize: int = 10_000,
+                 workers: int = 4, batch_size: int = 100, remembered: int = 100_000):
+        self.apply = apply
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.maxsize = maxsize
+        self.remembered = remembered
+        self.received = self.rejected = self.duplicates = self.applied = self.batches = self.failed = 0
+        self.last_lag = self.max_lag = 0.0
+        self._queues: List[asyncio.Queue] = []
+        # Enqueue times of each queue's waiting orders, oldest first (queues are FIFO)
+        self._enqueued: List[deque] = []
+        # (venue key, order id) -> version last applied
+        self._versions: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def submit(self, venue: "VenueState", order: Order) -> bool:
+        """Queues an order for its venue (event loop, workers running). False: queue full, retry later."""
+        self.received += 1
+        worker = hash((venue.key, order.id)) % self.workers
+        now = time.monotonic()
+        try:
+            self._queues[worker].put_nowait((venue, order, now))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self._enqueued[worker].append(now)
+        return True
+
+    @property
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def metrics(self) -> Dict[str, float]:
+        queued = [enqueued[0] for enqueued in self._enqueued if enqueued]
+        return {
+            "depth": self.depth, "capacity": self.maxsize,
+            # Age of the oldest order still waiting, and the lag of the last / worst batch
+            "oldest_seconds": round(time.monotonic() - min(queued), 3) if queued else 0.0,
+            "lag_seconds": round(self.last_lag, 3), "max_lag_seconds": round(self.max_lag, 3),
+            "received": self.received, "rejected": self.rejected, "duplicates": self.duplicates,
+            "applied": self.applied, "batches": self.batches, "failed": self.failed,
+        }
+
+    async def run(self):
+        """Runs the workers until cancelled."""
+        # Queues belong to the running event loop
+        self._queues = [asyncio.Queue(max(1, self.maxsize // self.workers)) for _ in range(self.workers)]
+        self._enqueued = [deque() for _ in self._queues]
+        self._tasks = [asyncio.create_task(self._work(queue, enqueued))
+                       for queue, enqueued in zip(self._queues, self._enqueued)]
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+    async def drain(self, timeout: float = 10.0):
+        """Waits (up to `timeout`) for the queued orders to be applied, e.g. at shutdown."""
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self._queues)), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Webhook queue not drained at shutdown: {self.depth} orders dropped")
+
+    async def _work(self, queue: asyncio.Queue, enqueued: deque):
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            for _ in batch:
+                enqueued.popleft()
+            try:
+                await self._apply_batch(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"Failed to apply {len(batch)} webhook orders: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def apply_now(self, venue: "VenueState", orders: List[Order]) -> int:
+        """Applies in the caller (no workers running), with the same dedup. Returns the number applied."""
+        selected, changed = self._select((venue, order, 0.0) for order in orders)
+        for venue, orders in selected.values():
+            self.apply(venue, orders)
+        self._record(changed)
+        return len(changed)
+
+    async def _apply_batch(self, batch: List[Tuple["VenueState", Order, float]]):
+        selected, changed = self._select(batch)
+        self.duplicates += len(batch) - len(changed)
+        for venue, orders in selected.values():
+            await asyncio.to_thread(self.apply, venue, orders)
+        self._record(changed)
+        self.batches += 1
+        self.last_lag = time.monotonic() - batch[0][2]
+        self.max_lag = max(self.max_lag, self.last_lag)
+
+    def _select(self, batch: Iterable[Tuple["VenueState", Order, float]]):
+        """The latest version of each order in the batch, unless already applied; grouped by venue."""
+        latest: Dict[Tuple[str, str], Tuple["VenueState", Order, str]] = {}
+        for venue, order, _ in batch:
+            key = (venue.key, order.id)
+            latest.pop(key, None)
+            latest[key] = (venue, order, repr(order_version(order)))
+        selected: Dict[str, Tuple["VenueState", List[Order]]] = {}
+        changed = []
+        for key, (venue, order, version) in latest.items():
+            if self._versions.get(key) == version:
+                continue
+            selected.setdefault(venue.key, (venue, []))[1].append(order)
+            changed.append((key, version))
+        return selected, changed
+
+    def _record(self, changed: List[Tuple[Tuple[str, str], str]]):
+        for key, version in changed:
+            self._versions[key] = version
+            self._versions.move_to_end(key)
+        while len(self._versions) > self.remembered:
+            self._versions.popitem(last=False)
+        self.applied += len(changed)
@@ -1,11 +1,75 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.integrations import router as integration_router
+from app.integrations.venues import venues
+from app.integrations.persistence import write_behind
+from app.integrations.guest_store import guest_store
+from app.integrations.logic import reconciler
+from app.integrations.toast_http import toast_session
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Rebuild the live floor and orders from the database, then persist
+    # changes write-behind (requests never wait on the database)
+    persist = os.getenv("LIVE_STATE_PERSISTENCE", "true").lower() == "true"
+    if persist and not await asyncio.to_thread(write_behind.schema_ready):
+        logging.getLogger("uvicorn").error("Live state persistence disabled: run `alembic upgrade head`")
+        persist = False
+    # Guest profiles live in the guests table; the reconciler caches the hot ones
+    guests = os.getenv("GUEST_PROFILE_STORE", "true").lower() == "true"
+    if guests and not await asyncio.to_thread(guest_store.schema_ready):
+        logging.getLogger("uvicorn").error("Guest profile store disabled: run `alembic upgrade head`")
+        guests = False
+    # One pooled keep-alive connection to Toast for all venues
+    await toast_session.start()
+    workers = []
+    if guests:
+        reconciler.attach(guest_store)
+        workers.append(asyncio.create_task(
+            guest_store.run(float(os.getenv("GUEST_PROFILE_FLUSH_SECONDS", "1")))
+        ))
+        # Order events only queue guest reconciliation; it runs off the event loop
+        workers.append(asyncio.create_task(reconciler.run()))
+    if persist:
+        await asyncio.to_thread(venues.persist, write_behind)
+        workers.append(asyncio.create_task(
+            write_behind.run(float(os.getenv("LIVE_STATE_FLUSH_SECONDS", "1")))
+        ))
+    # One Toast sync task per restaurant; order reads serve the local registry
+    if os.getenv("TOAST_POLLING", "true").lower() == "true":
+        workers.append(asyncio.create_task(venues.run_toast_sync(
+            interval=float(os.getenv("TOAST_POLL_SECONDS", "5")),
+            jitter=float(os.getenv("TOAST_POLL_JITTER", "0.2")),
+            max_backoff=float(os.getenv("TOAST_POLL_MAX_BACKOFF_SECONDS", "120")),
+        )))
+    # Webhook orders are queued by the endpoint and applied here in micro-batches
+    workers.append(asyncio.create_task(integration_router.toast_webhooks.run()))
+    # Background workers: archive finished orders out of the hot set
+    workers.append(asyncio.create_task(
+        venues.run_archiver(float(os.getenv("ORDER_ARCHIVE_INTERVAL_SECONDS", "30")))
+    ))
+    yield
+    await integration_router.toast_webhooks.drain()
+    for worker in workers:
+        worker.cancel()
+    # Persist whatever is still pending before shutdown
+    if persist:
+        await asyncio.to_thread(write_behind.flush)
+    if guests:
+        await asyncio.to_thread(reconciler.drain)
+        await asyncio.to_thread(guest_store.flush)
+    await asyncio.to_thread(venues.flush_archives)
+    await toast_session.close()
 
 app = FastAPI(
     title="HOSPITALITY AI OS",
     description="Enterprise AI Operating System for Premium Hospitality",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Initialize Database Tables
@@ -40,6 +104,8 @@ def health_check():
 
 # Include Routers
 app.include_router(integration_router.router, prefix="/api/v1/integrations", tags=["integrations"])
+# Same endpoints scoped to one venue (the unprefixed routes serve the default venue)
+app.include_router(integration_router.router, prefix="/api/v1/venues/{venue_key}/integrations", tags=["integrations"])
 from app.api import unity as unity_router
 app.include_router(unity_router.router, prefix="/api/v1/unity", tags=["unity-os"])
 from app.api import xs_features as xs_router
@@ -0,0 +1,101 @@
+"""
+Benchmark: auto-seat at 1k waiting parties x 2k tables.
+
+Compares the old per-guest list-build-and-sort loop against the bucketed
+best-fit (FloorStore.best_available) and the batch min-cost assignment
+(SeatingEngine.assign_optimal). Reports time, parties/VIPs seated and
+wasted seats. Half the floor starts occupied so tables are contended.
+
+Usage (from backend/):
+    python -m scripts.bench_auto_seat
+"""
+import random
+import time
+from typing import List, Tuple
+from app.integrations.models import GuestToSeat, TableData
+from app.integrations.floor_state import FloorStore
+from app.integrations.seating import SeatingEngine
+
+PARTIES = 1000
+TABLES = 2000
+
+def make_floor() -> List[TableData]:
+    rng = random.Random(11)
+    return [
+        TableData(id=f"t{i}", number=i, capacity=rng.choice([2, 2, 4, 4, 4, 6, 8, 10]), x=0, y=0,
+                  status="available" if rng.random() < 0.5 else "occupied")
+        for i in range(1, TABLES + 1)
+    ]
+
+def make_waitlist() -> List[GuestToSeat]:
+    rng = random.Random(12)
+    return [
+        GuestToSeat(id=f"w{i}", name=f"Guest {i}", party=rng.choice([1, 2, 2, 2, 3, 4, 4, 5, 6, 7, 8]),
+                    isVip=rng.random() < 0.15, source="waitlist")
+        for i in range(PARTIES)
+    ]
+
+def seat_fields(guest: GuestToSeat) -> dict:
+    return {"status": "occupied", "guestName": guest.name, "guestCount": guest.party, "isVip": guest.isVip}
+
+def legacy(tables: List[TableData], waitlist: List[GuestToSeat]) -> List[Tuple[GuestToSeat, TableData]]:
+    seated = []
+    for guest in sorted(waitlist, key=lambda x: (not x.isVip)):
+        suitable = [t for t in tables if t.status == "available" and t.capacity >= guest.party]
+        if not suitable:
+            continue
+        suitable.sort(key=lambda t: t.capacity)
+        selected = suitable[0]
+        for i, t in enumerate(tables):
+            if t.id == selected.id:
+                tables[i] = t.copy(update=seat_fields(guest))
+                break
+        seated.append((guest, selected))
+    return seated
+
+def greedy(floor: FloorStore, waitlist: List[GuestToSeat]) -> List[Tuple[GuestToSeat, TableData]]:
+    seated = []
+    for guest in sorted(waitlist, key=lambda x: (not x.isVip)):
+        selected = floor.best_available(guest.party)
+        if selected:
+            floor.update(selected.id, **seat_fields(guest))
+            seated.append((guest, selected))
+    return seated
+
+def optimal(floor: FloorStore, waitlist: List[GuestToSeat]) -> List[Tuple[GuestToSeat, TableData]]:
+    ordered = sorted(waitlist, key=lambda x: (not x.isVip))
+    seated = SeatingEngine().assign_optimal(ordered, floor.available_by_capacity())
+    for guest, table in seated:
+        floor.update(table.id, **seat_fields(guest))
+    return seated
+
+def report(label: str, elapsed: float, seated: List[Tuple[GuestToSeat, TableData]]):
+    vips = sum(1 for g, _ in seated if g.isVip)
+    covers = sum(g.party for g, _ in seated)
+    waste = sum(t.capacity - g.party for g, t in seated)
+    print(f"{label:>10} | {elapsed * 1000:>9.1f} | {len(seated):>6} | {vips:>4} | {covers:>6} | {waste:>6}")
+
+def main():
+    waitlist = make_waitlist()
+    total_vips = sum(1 for g in waitlist if g.isVip)
+    print(f"{PARTIES} parties ({total_vips} VIP) x {TABLES} tables")
+    print(f"{'mode':>10} | {'time (ms)':>9} | {'seated':>6} | {'vips':>4} | {'covers':>6} | {'waste':>6}")
+    print("-" * 60)
+
+    tables = make_floor()
+    start = time.perf_counter()
+    seated = legacy(tables, waitlist)
+    report("legacy", time.perf_counter() - start, seated)
+
+    floor = FloorStore(make_floor())
+    start = time.perf_counter()
+    seated = greedy(floor, waitlist)
+    report("greedy", time.perf_counter() - start, seated)
+
+    floor = FloorStore(make_floor())
+    start = time.perf_counter()
+    seated = optimal(floor, waitlist)
+    report("optimal", time.perf_counter() - start, seated)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: CPU cost of the push channel fan-out vs. 2s polling.
+
+Connects N in-process subscribers to the EventBroker, publishes table change
+events from a worker thread (as sync FastAPI handlers do) and measures process
+CPU time until every client has drained its queue. For comparison it also
+measures the CPU needed to re-serialize /tables + /waitlist for every client
+once per poll interval.
+
+Usage (from backend/):
+    python -m scripts.bench_event_fanout
+"""
+import asyncio
+import json
+import time
+from typing import List
+from app.integrations.events import EventBroker
+from app.integrations.models import TableData, GuestToSeat
+
+CLIENTS = [100, 500, 1000]
+EVENTS = 200
+TABLES = 40
+
+def make_floor() -> List[TableData]:
+    return [TableData(id=f"t{i}", number=i, capacity=4, x=0, y=0, status="available") for i in range(1, TABLES + 1)]
+
+async def run_push(clients: int) -> float:
+    broker = EventBroker(queue_size=EVENTS)
+    tables = make_floor()
+    subscriptions = [broker.subscribe(["tables"]) for _ in range(clients)]
+    received = 0
+    done = asyncio.Event()
+
+    async def client(subscription):
+        nonlocal received
+        for _ in range(EVENTS):
+            await subscription.next()
+            received += 1
+            if received == clients * EVENTS:
+                done.set()
+
+    tasks = [asyncio.create_task(client(s)) for s in subscriptions]
+
+    def publisher():
+        for i in range(EVENTS):
+            table = tables[i % TABLES]
+            broker.publish("tables", "table.updated", table.model_dump(mode="json"))
+
+    start = time.process_time()
+    await asyncio.to_thread(publisher)
+    await done.wait()
+    elapsed = time.process_time() - start
+    for task in tasks:
+        task.cancel()
+    return elapsed
+
+def run_poll(clients: int) -> float:
+    tables = make_floor()
+    waitlist = [GuestToSeat(id=f"w{i}", name="Guest", party=2, isVip=False, source="waitlist") for i in range(10)]
+    start = time.process_time()
+    for _ in range(clients):
+        json.dumps([t.model_dump(mode="json") for t in tables])
+        json.dumps([w.model_dump(mode="json") for w in waitlist])
+    return time.process_time() - start
+
+def main():
+    print(f"{'clients':>8} | {'push CPU ms / event / 100 clients':>34} | {'poll CPU ms / interval / 100 clients':>37}")
+    print("-" * 86)
+    for clients in CLIENTS:
+        push = asyncio.run(run_push(clients))
+        poll = run_poll(clients)
+        per_event = push / EVENTS * 1000 / (clients / 100)
+        per_poll = poll * 1000 / (clients / 100)
+        print(f"{clients:>8} | {per_event:>34.3f} | {per_poll:>37.3f}")
+
+if __name__ == "__main__":
+    main()
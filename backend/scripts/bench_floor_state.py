@@ -0,0 +1,58 @@
+"""
+Benchmark: table mutation latency vs. floor size.
+
+Compares the old linear `for i, t in enumerate(tables_db)` scan against the
+indexed FloorStore for seat/clear mutations, from 40 up to 10,000 tables.
+
+Usage (from backend/):
+    python -m scripts.bench_floor_state
+"""
+import random
+import time
+from typing import List
+from app.integrations.models import TableData
+from app.integrations.floor_state import FloorStore
+
+SIZES = [40, 500, 2000, 10000]
+MUTATIONS = 2000
+
+def make_tables(n: int) -> List[TableData]:
+    return [
+        TableData(id=f"t{i}", number=i, capacity=random.choice([2, 4, 6, 8]),
+                  x=0, y=0, status="available")
+        for i in range(1, n + 1)
+    ]
+
+def bench_linear(tables: List[TableData], ids: List[str]) -> float:
+    start = time.perf_counter()
+    for table_id in ids:
+        for i, t in enumerate(tables):
+            if t.id == table_id:
+                tables[i] = t.copy(update={"status": "occupied", "guestCount": 2})
+                break
+        for i, t in enumerate(tables):
+            if t.id == table_id:
+                tables[i] = t.copy(update={"status": "available", "guestCount": None})
+                break
+    return (time.perf_counter() - start) / (len(ids) * 2)
+
+def bench_store(store: FloorStore, ids: List[str]) -> float:
+    start = time.perf_counter()
+    for table_id in ids:
+        store.update(table_id, status="occupied", guestCount=2)
+        store.update(table_id, status="available", guestCount=None)
+    return (time.perf_counter() - start) / (len(ids) * 2)
+
+def main():
+    random.seed(7)
+    print(f"{'tables':>8} | {'linear (us/op)':>15} | {'FloorStore (us/op)':>19}")
+    print("-" * 50)
+    for n in SIZES:
+        tables = make_tables(n)
+        ids = [f"t{random.randint(1, n)}" for _ in range(MUTATIONS)]
+        linear = bench_linear(list(tables), ids)
+        indexed = bench_store(FloorStore(tables), ids)
+        print(f"{n:>8} | {linear * 1e6:>15.2f} | {indexed * 1e6:>19.2f}")
+
+if __name__ == "__main__":
+    main()
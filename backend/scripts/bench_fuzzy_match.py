@@ -0,0 +1,116 @@
+"""
+Benchmark: fuzzy guest name matching on a synthetic million-guest corpus.
+
+Builds 1M distinct "First Last" names, indexes them in a NameMatcher and
+looks up
+  - known guests with realistic variations: "Last, First" order, one typo
+    (substitution, deletion, insertion or transposition), a phonetic
+    respelling, odd case and spacing -> recall = the original is the top
+    match
+  - unseen guests -> false match rate = anything returned at all
+per threshold, with p50/p99 latency per lookup (blocking + scoring).
+
+Usage (from backend/):
+    python -m scripts.bench_fuzzy_match
+"""
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+from app.integrations.matching import NameMatcher
+
+GUESTS = 1_000_000
+QUERIES = 2000
+THRESHOLDS = [0.75, 0.8, 0.85, 0.9]
+
+SYLLABLES = ["an", "ber", "ca", "dre", "el", "fa", "gio", "han", "is", "jo", "ka", "lin", "mar", "ni",
+             "o", "pe", "qui", "ro", "sa", "ta", "u", "vel", "wen", "xa", "ya", "zo", "son", "ton",
+             "ley", "na", "ri", "ch", "de", "la", "mo", "ne", "sh", "ter", "va", "lo"]
+PHONETIC = [("ph", "f"), ("f", "ph"), ("c", "k"), ("k", "c"), ("ie", "y"), ("y", "ie"), ("s", "z"), ("son", "sen")]
+
+def make_name(rng: random.Random) -> str:
+    first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+    last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    return f"{first.capitalize()} {last.capitalize()}"
+
+def make_corpus(rng: random.Random) -> List[str]:
+    names: Dict[str, None] = {}
+    while len(names) < GUESTS:
+        names[make_name(rng)] = None
+    return list(names)
+
+def typo(rng: random.Random, word: str) -> str:
+    i = rng.randrange(1, len(word)) if len(word) > 2 else 1
+    kind = rng.choice(["sub", "del", "ins", "swap"])
+    if kind == "sub":
+        return word[:i] + rng.choice("aeiourstnl") + word[i + 1:]
+    if kind == "del":
+        return word[:i] + word[i + 1:]
+    if kind == "ins":
+        return word[:i] + rng.choice("aeiourstnl") + word[i:]
+    return word[:i - 1] + word[i:i + 1] + word[i - 1:i] + word[i + 1:]
+
+def phonetic(rng: random.Random, name: str) -> str:
+    for old, new in rng.sample(PHONETIC, len(PHONETIC)):
+        if old in name.lower():
+            return name.lower().replace(old, new, 1).title()
+    return name + "e"
+
+VARIANTS: Dict[str, Callable[[random.Random, str], str]] = {
+    "reordered": lambda rng, n: "{1}, {0}".format(*n.split()),
+    "typo": lambda rng, n: " ".join(typo(rng, w) if i == hit else w
+                                    for hit in [rng.randrange(2)] for i, w in enumerate(n.split())),
+    "phonetic": phonetic,
+    "case/space": lambda rng, n: "  " + n.upper().replace(" ", "   "),
+}
+
+def timed_match(matcher: NameMatcher, names: List[str], query: str, threshold: float) -> Tuple[list, float]:
+    start = time.perf_counter()
+    result = matcher.match(query, names.__getitem__, threshold)
+    return result, time.perf_counter() - start
+
+def main():
+    rng = random.Random(7)
+    start = time.perf_counter()
+    names = make_corpus(rng)
+    corpus = set(names)
+    print(f"{GUESTS:,} names generated in {time.perf_counter() - start:.1f} s")
+
+    matcher = NameMatcher()
+    start = time.perf_counter()
+    for i, name in enumerate(names):
+        matcher.add(i, name)
+    print(f"indexed in {time.perf_counter() - start:.1f} s ({len(matcher):,} blocking keys)\n")
+
+    known = {kind: [(i, make(rng, names[i])) for i in rng.sample(range(GUESTS), QUERIES // len(VARIANTS))]
+             for kind, make in VARIANTS.items()}
+    unseen = []
+    while len(unseen) < QUERIES:
+        name = make_name(rng)
+        if name not in corpus:
+            unseen.append(name)
+
+    print(f"{'threshold':>9} | " + " | ".join(f"{kind:>10}" for kind in VARIANTS) +
+          f" | {'false match':>11} | {'p50 us':>7} | {'p99 us':>7}")
+    print("-" * 96)
+    for threshold in THRESHOLDS:
+        latencies, recalls = [], []
+        for kind, queries in known.items():
+            found = 0
+            for expected, query in queries:
+                result, elapsed = timed_match(matcher, names, query, threshold)
+                latencies.append(elapsed)
+                found += bool(result) and result[0][0] == expected
+            recalls.append(found / len(queries))
+        false = 0
+        for query in unseen:
+            result, elapsed = timed_match(matcher, names, query, threshold)
+            latencies.append(elapsed)
+            false += bool(result)
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(f"{threshold:>9.2f} | " + " | ".join(f"{r:>10.1%}" for r in recalls) +
+              f" | {false / len(unseen):>11.1%} | {statistics.median(latencies) * 1e6:>7.0f} | {p99 * 1e6:>7.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: offline guest dedup (GuestDedup) on a synthetic guests table.
+
+Seeds a SQLite database with distinct guests (syllable names, half with an
+email, half with a phone) plus 10% duplicates of them as another venue's
+import would have them: "Last, First" order, one typo, odd case and
+spacing, the email in other case or the phone in another format. Runs the
+job and reports
+  - recall: duplicates merged into their original guest
+  - wrong merges: distinct guests merged together
+  - throughput per stage, projected to 5M rows (the overnight target)
+
+Usage (from backend/):
+    python -m scripts.bench_guest_dedup [guests]     (default 200,000)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert, select
+from app.db.base import Base
+from app.db import models
+from app.integrations.guest_dedup import GuestDedup
+from scripts.bench_fuzzy_match import make_name, typo
+from scripts.dedup_guests import print_report
+
+DUPLICATE_SHARE = 0.1
+
+def make_guests(rng: random.Random, count: int):
+    """Guest rows and, for each duplicate row, the id of the guest it duplicates."""
+    start = datetime(2024, 1, 1)
+    names, rows, truth = set(), [], {}
+    originals = int(count / (1 + DUPLICATE_SHARE))
+    while len(rows) < originals:
+        name = make_name(rng)
+        if name in names:
+            continue
+        names.add(name)
+        n = len(rows)
+        rows.append({
+            "id": str(uuid.uuid4()), "name": name,
+            "email": f"{name.replace(' ', '.').lower()}{n}@example.com" if rng.random() < 0.5 else None,
+            "phone": f"702{n:07d}" if rng.random() < 0.5 else None,
+            "lifetime_spend": rng.choice([0.0, 80.0, 250.0]), "created_at": start + timedelta(seconds=n),
+            "velocity_history": [], "preferences": {}, "vip_status": False, "influence_score": 0,
+            "privacy_toggle": False,
+        })
+    for original in rng.sample(rows, count - originals):
+        first, last = original["name"].split()
+        name = rng.choice([f"{last}, {first}", f"{typo(rng, first)} {last}", f"  {first.upper()}  {last}"])
+        contact = rng.random()
+        duplicate = {
+            **original, "id": str(uuid.uuid4()), "name": name, "email": None, "phone": None,
+            "created_at": original["created_at"] + timedelta(days=30),
+        }
+        if contact < 0.4 and original["email"]:
+            duplicate["email"] = original["email"].upper()
+        elif contact < 0.8 and original["phone"]:
+            p = original["phone"]
+            duplicate["phone"] = f"({p[:3]}) {p[3:6]}-{p[6:]}"
+        truth[duplicate["id"]] = original["id"]
+        rows.append(duplicate)
+    rng.shuffle(rows)
+    return rows, truth
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    workdir = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'guests.db')}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    rows, truth = make_guests(rng, count)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for i in range(0, len(rows), 10_000):
+            conn.execute(insert(models.Guest.__table__), rows[i:i + 10_000])
+    print(f"{len(rows):,} guests ({len(truth):,} duplicates) seeded in {time.perf_counter() - start:.1f} s\n")
+
+    job = GuestDedup(engine, state_path=os.path.join(workdir, "state.db"), log=lambda line: None)
+    start = time.perf_counter()
+    report = job.run()
+    job.close()
+    print(f"dedup finished in {time.perf_counter() - start:.1f} s with {job.workers} worker(s)")
+
+    with engine.connect() as conn:
+        merges = dict(conn.execute(select(models.GuestMerge.id, models.GuestMerge.survivor_id)).all())
+    found = sum(merges.get(duplicate) == original for duplicate, original in truth.items())
+    wrong = sum(truth.get(duplicate) != survivor for duplicate, survivor in merges.items())
+    print(f"recall {found / len(truth):.1%} ({found:,} of {len(truth):,} duplicates merged), "
+          f"wrong merges {wrong:,} of {len(merges):,}")
+    print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: database-backed guest profiles (GuestStore + bounded reconciler cache).
+
+Seeds a SQLite file with 200k guests through the store's batched upserts,
+then compares
+  - memory: every profile loaded in the reconciler (before) vs. the
+    store-backed reconciler after touching all of them (bounded cache)
+  - lookups: hot (cached) and cold (indexed query on the key columns)
+    reconciles, and a cold lookup with the key indexes dropped (full scan)
+  - writes: batched flush throughput vs. one commit per profile change
+
+Usage (from backend/):
+    python -m scripts.bench_guest_store
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.db.base import Base
+from app.db import models
+from app.integrations.guest_store import GuestStore
+from app.integrations.logic import GuestReconciler
+from app.integrations.models import GuestProfile
+
+GUESTS = 200_000
+CACHE = 20_000
+LOOKUPS = 2000
+WRITE_THROUGH_SAMPLE = 500
+STRIDE = 5   # every 5th guest visits (40k guests, twice the cache)
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+def guest(n: int) -> dict:
+    return {"name": f"Guest Number{n}", "email": f"guest{n}@example.com", "phone": f"+1702{n:07d}"}
+
+def timed(fn, args) -> list:
+    latencies = []
+    for arg in args:
+        start = time.perf_counter()
+        fn(arg)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies
+
+def report(label: str, latencies: list):
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"{label:<34} p50 {statistics.median(latencies) * 1e6:>8.0f} us   p99 {p99 * 1e6:>8.0f} us")
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "guests.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    # Seed through the store (new profiles are inserted in batches)
+    seeder = GuestReconciler(max_profiles=GUESTS)
+    seeder.attach(GuestStore(session_factory, batch_size=2000))
+    start = time.perf_counter()
+    for n in range(GUESTS):
+        profile = GuestProfile(name=guest(n)["name"], email=guest(n)["email"], phone=guest(n)["phone"])
+        seeder.add(profile)
+        seeder.store.created(profile, seeder._keys(profile), time.time())
+    staged = time.perf_counter() - start
+    start = time.perf_counter()
+    written = seeder.store.flush()
+    flushed = time.perf_counter() - start
+    print(f"{written:,} guests staged in {staged:.1f} s, flushed in {flushed:.1f} s "
+          f"({written / flushed:,.0f} rows/s)")
+    del seeder
+
+    rng = random.Random(7)
+    base = rss_mb()
+    store = GuestStore(session_factory)
+    backed = GuestReconciler(max_profiles=CACHE)
+    backed.attach(store)
+    # Touch every guest once (a season of visits), then a hot set repeatedly
+    for n in range(0, GUESTS, STRIDE):
+        backed.find_profile(**guest(n))
+    print(f"\nstore-backed: {len(backed.profiles):,} profiles cached, "
+          f"+{rss_mb() - base:,.0f} MB after touching {GUESTS // STRIDE:,} guests")
+
+    hot = [guest(n) for n in rng.sample(range(0, GUESTS, STRIDE), 200)]
+    for data in hot:
+        backed.reconcile(data)
+    report("hot reconcile (cached)", timed(backed.reconcile, [rng.choice(hot) for _ in range(LOOKUPS)]))
+    cold = [guest(n) for n in rng.sample(range(1, GUESTS, STRIDE), LOOKUPS)]
+    report("cold reconcile (indexed query)", timed(backed.reconcile, cold))
+    report("cold miss (new guest)", timed(backed.find_profile, [f"Walk-in {n}" for n in range(LOOKUPS)]))
+    store.flush()
+
+    with engine.begin() as conn:
+        for column in ("email_key", "phone_key", "name_key"):
+            conn.execute(text(f"DROP INDEX ix_guests_{column}"))
+    unindexed = GuestReconciler()
+    unindexed.attach(GuestStore(session_factory))
+    sample = [guest(n) for n in rng.sample(range(2, GUESTS, STRIDE), 20)]
+    report("cold reconcile (no key indexes)", timed(unindexed.reconcile, sample))
+
+    base = rss_mb()
+    everything = GuestReconciler()
+    db = session_factory()
+    everything.load(GuestProfile.model_construct(id=row.id, name=row.name, email=row.email, phone=row.phone,
+                                                 vip_status=False, dietary_restrictions=[],
+                                                 lifetime_spend=0.0, preferences={})
+                    for row in db.query(models.Guest.id, models.Guest.name, models.Guest.email,
+                                        models.Guest.phone).yield_per(5000))
+    db.close()
+    print(f"\nin memory (before): {len(everything.profiles):,} profiles, +{rss_mb() - base:,.0f} MB")
+
+    # Profile changes: batched flush vs. a commit per change
+    changes = [guest(n) for n in rng.sample(range(3, GUESTS, STRIDE), LOOKUPS)]
+    for data in changes:
+        backed.reconcile({**data, "spend": 25.0})
+    start = time.perf_counter()
+    rows = store.flush()
+    batched = rows / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for data in changes[:WRITE_THROUGH_SAMPLE]:
+        backed.reconcile({**data, "spend": 25.0})
+        store.flush()
+    through = WRITE_THROUGH_SAMPLE / (time.perf_counter() - start)
+    print(f"profile writes: batched {batched:,.0f} rows/s, commit per change {through:,.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark: GET /orders with per-poll reconciliation vs. order-keyed ledger.
+
+A venue with 500 open orders is polled 200 times. Before, every poll ran
+`reconciler.reconcile` for every order (and added its spend again); now
+orders are reconciled once from registry events and reads do no work.
+Reports poll latency and the resulting guest spend.
+
+Usage (from backend/):
+    python -m scripts.bench_order_reconcile
+"""
+import asyncio
+import time
+from app.integrations import router
+from app.integrations.logic import GuestReconciler, order_guest_data, reconciler
+from app.integrations.models import Order, OrderItem
+from app.integrations.venues import VenueState
+
+ORDERS = 500
+POLLS = 200
+
+def make_order(n: int) -> Order:
+    return Order(id=f"o{n}", table_number=1 + n % 40, total_amount=50.0, items=[
+        OrderItem(item_id=f"i{n}", name="Risotto", quantity=1, price=50.0),
+    ])
+
+async def main():
+    venue = VenueState("bench")
+    for n in range(ORDERS):
+        venue.toast.add_order(make_order(n))
+
+    legacy = GuestReconciler()
+    start = time.perf_counter()
+    for _ in range(POLLS):
+        orders = await venue.toast.get_orders()
+        for order in orders:
+            legacy.reconcile(order_guest_data(order))
+    before = (time.perf_counter() - start) / POLLS
+
+    start = time.perf_counter()
+    for _ in range(POLLS):
+        await router.get_recent_orders(venue=venue)
+    after = (time.perf_counter() - start) / POLLS
+
+    expected = ORDERS * 50.0
+    print(f"{ORDERS} orders, {POLLS} polls of GET /orders\n")
+    print(f"reconcile per poll: {before * 1e3:>7.2f} ms/poll, guest spend "
+          f"{sum(p.lifetime_spend for p in legacy.profiles):>12,.0f} (expected {expected:,.0f})")
+    print(f"order-keyed ledger: {after * 1e3:>7.2f} ms/poll, guest spend "
+          f"{sum(reconciler.find_profile(f'Guest {t}').lifetime_spend for t in range(1, 41)):>12,.0f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
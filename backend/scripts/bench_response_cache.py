@@ -0,0 +1,74 @@
+"""
+Benchmark: GET /tables requests per second, before and after the response cache.
+
+Requests go through the full ASGI stack in process (httpx ASGITransport, no
+sockets) against
+  - before:  the floor returned as TableData models through
+             `response_model` (validated and encoded on every poll)
+  - cached:  the current endpoint (encoded bytes served per floor version)
+  - cached + writes: the current endpoint with a seat or clear between
+             every 10 reads, so bodies are rebuilt regularly
+at 40 and 2,000 tables.
+
+Usage (from backend/):
+    python -m scripts.bench_response_cache
+"""
+import asyncio
+import time
+from typing import List
+import httpx
+from fastapi import FastAPI
+from app.integrations import router
+from app.integrations.models import GuestToSeat, TableData
+from app.integrations.response_cache import orjson
+from app.integrations.venues import VenueState, build_floor_layout
+
+SIZES = [(5, 8), (40, 50)]   # floor rows x cols: 40 and 2,000 tables
+REQUESTS = {40: 5000, 2000: 1000}
+
+def make_app(venue: VenueState) -> FastAPI:
+    app = FastAPI()
+    models = [TableData(**t.to_dict()) for t in venue.floor]
+
+    @app.get("/before/tables", response_model=List[TableData])
+    def tables_before():
+        return models
+
+    @app.get("/tables")
+    def tables_cached():
+        return router.get_tables(venue=venue)
+
+    return app
+
+async def rps(client: httpx.AsyncClient, path: str, requests: int, venue: VenueState = None) -> float:
+    guest = GuestToSeat(id="g", name="Kim", party=2, isVip=False, source="walkin")
+    start = time.perf_counter()
+    for n in range(requests):
+        if venue is not None and n % 10 == 0:
+            table_id = f"t{1 + n % len(venue.floor)}"
+            if venue.floor.get(table_id).status == "available":
+                router.seat_guest(venue, table_id, guest)
+            else:
+                router.clear_table(table_id, venue=venue)
+        response = await client.get(path)
+        assert response.status_code == 200
+    return requests / (time.perf_counter() - start)
+
+async def main():
+    print(f"encoder: {'orjson' if orjson is not None else 'json (stdlib)'}\n")
+    print(f"{'tables':>7} | {'before (req/s)':>14} | {'cached (req/s)':>14} | {'cached + writes':>15}")
+    print("-" * 62)
+    for rows, cols in SIZES:
+        venue = VenueState("bench", tables=build_floor_layout(rows, cols))
+        tables = rows * cols
+        requests = REQUESTS[tables]
+        transport = httpx.ASGITransport(app=make_app(venue))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.get("/tables")
+            before = await rps(client, "/before/tables", requests)
+            cached = await rps(client, "/tables", requests)
+            churn = await rps(client, "/tables", requests, venue)
+        print(f"{tables:>7} | {before:>14,.0f} | {cached:>14,.0f} | {churn:>15,.0f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""
+Benchmark: compact in-place table state vs. pydantic copy-on-update at 5k tables.
+
+  - memory: live floor held as TableData models vs. TableState records
+  - mutations: seat / add order / clear, as `model_copy(update=...)` per
+    change (before) vs. TableState.apply in place (now), plus the full
+    FloorStore.update path
+  - GET /tables: serializing the floor the way FastAPI did with
+    response_model (validate + dump each TableData) vs. cached dicts
+
+Usage (from backend/):
+    python -m scripts.bench_table_state
+"""
+import gc
+import json
+import random
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+from pydantic import TypeAdapter
+from app.integrations.models import TableData
+from app.integrations.floor_state import FloorStore, TableState
+
+TABLES = 5000
+CYCLES = 5000
+SERIALIZE_ROUNDS = 20
+
+def make_tables(n: int) -> List[TableData]:
+    rng = random.Random(7)
+    return [
+        TableData(id=f"t{i}", number=i, capacity=rng.choice([2, 4, 6, 8]), x=i % 100, y=i // 100,
+                  status="occupied" if i % 2 else "available", guestName=f"Guest {i}" if i % 2 else None,
+                  server="Maria", currentCourse="mains", orderTotal=84.0, items=["Risotto", "Negroni"])
+        for i in range(1, n + 1)
+    ]
+
+def measure_memory(build: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size
+
+def cycle_fields(n: int):
+    seat = {"status": "occupied", "guestName": f"Guest {n}", "guestCount": 2, "seatedAt": n * 1000.0}
+    order = {"items": ["Risotto", "Negroni"], "orderTotal": 58.0, "currentCourse": "mains"}
+    return seat, order
+
+def bench_copy(tables: Dict[str, TableData], ids: List[str]) -> float:
+    start = time.perf_counter()
+    for n, table_id in enumerate(ids):
+        seat, order = cycle_fields(n)
+        tables[table_id] = tables[table_id].model_copy(update=seat)
+        t = tables[table_id]
+        tables[table_id] = t.model_copy(update={**order, "items": t.items + order["items"]})
+        tables[table_id] = tables[table_id].model_copy(update={"status": "available", "guestName": None,
+                                                                "items": [], "orderTotal": 0.0})
+    return (time.perf_counter() - start) / (len(ids) * 3)
+
+def bench_apply(tables: Dict[str, TableState], ids: List[str]) -> float:
+    start = time.perf_counter()
+    for n, table_id in enumerate(ids):
+        seat, order = cycle_fields(n)
+        t = tables[table_id]
+        t.apply(seat)
+        t.apply({**order, "items": t.items + order["items"]})
+        t.apply({"status": "available", "guestName": None, "items": [], "orderTotal": 0.0})
+    return (time.perf_counter() - start) / (len(ids) * 3)
+
+def bench_store(floor: FloorStore, ids: List[str]) -> float:
+    start = time.perf_counter()
+    for n, table_id in enumerate(ids):
+        seat, order = cycle_fields(n)
+        floor.update(table_id, **seat)
+        t = floor.get(table_id)
+        floor.update(table_id, **{**order, "items": t.items + order["items"]})
+        floor.update(table_id, status="available", guestName=None, items=[], orderTotal=0.0)
+    return (time.perf_counter() - start) / (len(ids) * 3)
+
+def timed(fn: Callable[[], object], rounds: int = SERIALIZE_ROUNDS) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+def main():
+    print(f"{TABLES} tables\n")
+    models = make_tables(TABLES)
+
+    pydantic_bytes = measure_memory(lambda: make_tables(TABLES))
+    state_bytes = measure_memory(lambda: FloorStore(models))
+    records_bytes = measure_memory(lambda: [TableState.from_model(t) for t in models])
+    print(f"memory   TableData models  {pydantic_bytes / 1024:>8.0f} KiB ({pydantic_bytes / TABLES:.0f} B/table)")
+    print(f"memory   TableState        {records_bytes / 1024:>8.0f} KiB ({records_bytes / TABLES:.0f} B/table)")
+    print(f"memory   FloorStore total  {state_bytes / 1024:>8.0f} KiB (records + indexes)\n")
+
+    rng = random.Random(11)
+    ids = [f"t{rng.randint(1, TABLES)}" for _ in range(CYCLES)]
+    copied = bench_copy({t.id: t for t in models}, ids)
+    applied = bench_apply({t.id: TableState.from_model(t) for t in models}, ids)
+    stored = bench_store(FloorStore(models), ids)
+    print(f"mutation TableData copy    {copied * 1e6:>8.2f} us/op")
+    print(f"mutation TableState apply  {applied * 1e6:>8.2f} us/op ({copied / applied:.1f}x)")
+    print(f"mutation FloorStore.update {stored * 1e6:>8.2f} us/op (locks, indexes, listeners)\n")
+
+    adapter = TypeAdapter(List[TableData])
+    floor = FloorStore(models)
+    old = timed(lambda: json.dumps(adapter.dump_python(adapter.validate_python(models), mode="json")))
+    warm = timed(lambda: json.dumps([t.to_dict() for t in floor]))
+    print(f"/tables  response_model    {old * 1e3:>8.2f} ms")
+    print(f"/tables  cached dicts      {warm * 1e3:>8.2f} ms ({old / warm:.1f}x)")
+    for share in (0.1, 1.0):
+        changed = ids[:int(TABLES * share)] if share < 1 else [t.id for t in floor]
+        elapsed = 0.0
+        for n in range(SERIALIZE_ROUNDS):
+            for table_id in changed:
+                floor.update(table_id, orderTotal=float(n))
+            start = time.perf_counter()
+            json.dumps([t.to_dict() for t in floor])
+            elapsed += time.perf_counter() - start
+        print(f"/tables  {share:>4.0%} changed      {elapsed / SERIALIZE_ROUNDS * 1e3:>8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: Toast order fetch latency, a client per call vs. the pooled session.
+
+Runs a fake Toast API on localhost (plain HTTP/1.1 with keep-alive) that
+injects latency the way a remote API over TLS costs it:
+  - every request waits one round trip (RTT)
+  - the first request on a new connection waits HANDSHAKE more (TCP + TLS)
+  - a login (client credentials -> token) waits LOGIN more
+and compares get_orders latency for
+  - before: a new httpx.AsyncClient and a token exchange on every call
+  - pooled: ToastClient on the shared ToastSession (keep-alive pool,
+            cached token)
+with one poller and with SCREENS screens polling at once.
+
+Usage (from backend/):
+    python -m scripts.bench_toast_client
+"""
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+import httpx
+from app.integrations.toast_client import ToastClient
+from app.integrations.toast_http import LOGIN_PATH, ToastSession
+
+RTT = 0.010
+HANDSHAKE = 0.020
+LOGIN = 0.030
+POLLS = 200
+SCREENS = 20
+
+ORDERS = json.dumps([
+    {"guid": f"o{n}", "table": {"id": n % 40}, "guestCount": 2, "totalAmount": 48.0,
+     "checks": [{"selections": [{"itemGuid": f"i{n}", "displayName": "Old Fashioned", "quantity": 2,
+                                 "price": 24.0}]}]}
+    for n in range(20)
+]).encode()
+TOKEN = json.dumps({"token": {"accessToken": "bench-token", "expiresIn": 86400}}).encode()
+
+class FakeToast:
+    def __init__(self):
+        self.connections = 0
+        self.logins = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        first = True
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                path = head.split(b" ", 2)[1].decode()
+                length = 0
+                for line in head.split(b"\r\n")[1:]:
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                delay = RTT + (HANDSHAKE if first else 0.0)
+                first = False
+                if path.startswith(LOGIN_PATH):
+                    self.logins += 1
+                    delay, body = delay + LOGIN, TOKEN
+                else:
+                    body = ORDERS
+                await asyncio.sleep(delay)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+class BeforeClient(ToastClient):
+    """get_orders as it was: a fresh client (new connection) and a token exchange per call."""
+
+    async def get_orders(self):
+        session = self.session
+        async with httpx.AsyncClient(base_url=session.base_url) as client:
+            login = await client.post(LOGIN_PATH, json={"clientId": session.client_id,
+                                                        "clientSecret": session.client_secret})
+            token = login.json()["token"]["accessToken"]
+            response = await client.get("/orders/v2/orders", headers={
+                "Authorization": f"Bearer {token}", "Toast-Restaurant-External-ID": self.restaurant_guid})
+            response.raise_for_status()
+            orders = [self._map_to_order(o) for o in response.json()]
+            self.orders.upsert_many(orders)
+            return orders
+
+async def poll(client: ToastClient, polls: int, pollers: int) -> List[float]:
+    latencies = []
+
+    async def screen():
+        for _ in range(polls // pollers):
+            start = time.perf_counter()
+            assert await client.get_orders()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(screen() for _ in range(pollers)))
+    latencies.sort()
+    return latencies
+
+def ms(latencies: List[float], q: float) -> float:
+    return (statistics.median(latencies) if q == 0.5 else latencies[int(len(latencies) * q)]) * 1000
+
+async def main():
+    fake = FakeToast()
+    server = await asyncio.start_server(fake.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    session = ToastSession(base_url=f"http://127.0.0.1:{port}", client_id="bench", client_secret="secret")
+    print(f"fake Toast: RTT {RTT * 1000:.0f} ms, +{HANDSHAKE * 1000:.0f} ms per new connection, "
+          f"+{LOGIN * 1000:.0f} ms per login\n")
+    print(f"{'client':<8} | {'pollers':>7} | {'p50 (ms)':>8} | {'p99 (ms)':>8} | {'connections':>11} | {'logins':>6}")
+    print("-" * 64)
+    for pollers in (1, SCREENS):
+        results = {}
+        for label, client in (("before", BeforeClient("bench", session=session)),
+                              ("pooled", ToastClient("bench", session=session))):
+            await client.get_orders()
+            connections, logins = fake.connections, fake.logins
+            latencies = await poll(client, POLLS, pollers)
+            results[label] = latencies
+            print(f"{label:<8} | {pollers:>7} | {ms(latencies, 0.5):>8.1f} | {ms(latencies, 0.99):>8.1f} | "
+                  f"{fake.connections - connections:>11} | {fake.logins - logins:>6}")
+        print(f"{'':<8} | {'':>7} | {ms(results['before'], 0.5) / ms(results['pooled'], 0.5):>7.1f}x | "
+              f"{ms(results['before'], 0.99) / ms(results['pooled'], 0.99):>7.1f}x |")
+    await session.close()
+    server.close()
+    await server.wait_closed()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+Benchmark: mapping a large Toast orders response, whole body vs. streamed.
+
+Writes a synthetic ~50 MB Toast payload (a JSON array of orders with
+checks, selections, modifiers and the usual Toast bookkeeping fields) and
+serves it from a fake Toast (in-process transport, 64 KB chunks). Each mode
+runs in a fresh process so peak RSS is its own:
+  - before:   the body read whole, `response.json()`, validated pydantic
+              models per selection (get_orders as it was)
+  - streamed: ToastClient.sync with the page streamed, orders decoded as
+              each completes and built with `model_construct`
+Both keep the mapped orders in the registry, as a sync does.
+
+Usage (from backend/):
+    python -m scripts.bench_toast_mapper [megabytes]     (default 50)
+"""
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import httpx
+from app.integrations.models import Order, OrderItem
+from app.integrations.toast_client import ToastClient
+from app.integrations.toast_http import LOGIN_PATH, ToastSession
+
+CHUNK = 64 * 1024
+
+def make_order(rng: random.Random, n: int) -> dict:
+    def guid():
+        return str(uuid.UUID(int=rng.getrandbits(128)))
+    return {
+        "guid": guid(), "entityType": "Order", "externalId": None, "openedDate": "2026-10-17T19:00:00.000+0000",
+        "modifiedDate": "2026-10-17T20:00:00.000+0000", "businessDate": 20261017, "guestCount": 1 + n % 6,
+        "table": {"guid": guid(), "id": 1 + n % 60, "entityType": "Table"},
+        "server": {"guid": guid(), "displayName": f"Server {n % 14}", "entityType": "RestaurantUser"},
+        "totalAmount": 0.0, "voided": n % 50 == 0, "source": "In Store",
+        "checks": [{
+            "guid": guid(), "displayNumber": str(n), "amount": 0.0, "taxAmount": 0.0, "paymentStatus": "OPEN",
+            "selections": [{
+                "guid": guid(), "itemGuid": guid(), "displayName": rng.choice(["Wagyu Tartare", "Negroni",
+                                                                               "Burrata", "Old Fashioned"]),
+                "quantity": 1 + s % 2, "price": 16.0 + s, "tax": 1.2, "voided": False, "fulfillmentStatus": "SENT",
+                "item": {"guid": guid(), "entityType": "MenuItem"},
+                "modifiers": [{"guid": guid(), "displayName": "No ice", "price": 0.0, "quantity": 1}],
+            } for s in range(6)],
+        } for _ in range(2)],
+    }
+
+def write_payload(path: str, megabytes: int) -> int:
+    rng, count, size = random.Random(7), 0, 0
+    with open(path, "w") as f:
+        f.write("[")
+        while size < megabytes * 2**20:
+            chunk = ("," if count else "") + json.dumps(make_order(rng, count))
+            f.write(chunk)
+            size += len(chunk)
+            count += 1
+        f.write("]")
+    return count
+
+class FileStream(httpx.AsyncByteStream):
+    def __init__(self, path: str):
+        self.path = path
+
+    async def __aiter__(self):
+        with open(self.path, "rb") as f:
+            while chunk := f.read(CHUNK):
+                yield chunk
+
+def legacy_map(data: dict) -> Order:
+    """_map_to_order as it was (validated models; modifiers reduced to names so they validate)."""
+    items = []
+    for check in data.get("checks", []):
+        for selection in check.get("selections", []):
+            items.append(OrderItem(
+                item_id=str(selection.get("itemGuid")),
+                name=selection.get("displayName", "Unknown Item"),
+                quantity=selection.get("quantity", 1),
+                price=selection.get("price", 0.0),
+                special_requests=[m["displayName"] for m in selection.get("modifiers", [])],
+            ))
+    return Order(
+        id=data.get("guid"), source="toast", table_number=data.get("table", {}).get("id"),
+        guest_count=data.get("guestCount", 1), items=items, total_amount=data.get("totalAmount", 0.0),
+        status=data.get("voided") and "voided" or "open", server=data.get("server", {}).get("displayName"),
+    )
+
+async def run(mode: str, path: str):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == LOGIN_PATH:
+            return httpx.Response(200, json={"token": {"accessToken": "t", "expiresIn": 86400}})
+        if request.url.params.get("page", "1") != "1":
+            return httpx.Response(200, content=b"[]")
+        return httpx.Response(200, stream=FileStream(path))
+
+    session = ToastSession(base_url="https://toast.bench", client_id="bench", client_secret="secret",
+                           transport=httpx.MockTransport(handler))
+    client = ToastClient("bench", session=session)
+    client.page_size = 10**9   # one page: the whole response
+    await session.token()
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "before":
+        response = await session.get("/orders/v2/orders", "bench")
+        client.orders.upsert_many([legacy_map(o) for o in response.json()])
+    else:
+        await client.sync()
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    await session.close()
+    print(json.dumps({"seconds": seconds, "orders": len(client.orders), "peak_mb": peak / 1024,
+                      "grew_mb": (peak - start_rss) / 1024}))
+
+def main():
+    if len(sys.argv) > 2:
+        asyncio.run(run(sys.argv[1], sys.argv[2]))
+        return
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    path = os.path.join(tempfile.mkdtemp(), "orders.json")
+    count = write_payload(path, megabytes)
+    print(f"payload: {os.path.getsize(path) / 2**20:.1f} MB, {count:,} orders\n")
+    print(f"{'mode':<9} | {'seconds':>7} | {'orders/s':>9} | {'peak RSS (MB)':>13} | {'RSS growth (MB)':>15}")
+    print("-" * 66)
+    for mode in ("before", "streamed"):
+        out = subprocess.run([sys.executable, "-m", "scripts.bench_toast_mapper", mode, path],
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        assert result["orders"] == count
+        print(f"{mode:<9} | {result['seconds']:>7.2f} | {count / result['seconds']:>9,.0f} | "
+              f"{result['peak_mb']:>13,.0f} | {result['grew_mb']:>15,.0f}")
+    os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: upstream Toast calls and KDS read latency, sync per request vs.
+the background poller, as the number of screens grows.
+
+A fake Toast (in-process transport, LATENCY per call) holds 200 orders.
+SCREENS screens each hit GET /kitchen/queue every REFRESH seconds for
+DURATION seconds (time compressed: a 2 s KDS refresh and a 5 s poll become
+0.2 s and 0.5 s). Reports upstream calls and read p50/p99 for
+  - per request: every read syncs with Toast first (before)
+  - poller:      one poll_restaurant task, reads serve the registry
+
+Usage (from backend/):
+    python -m scripts.bench_toast_poller
+"""
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+import httpx
+from app.integrations import router
+from app.integrations.toast_client import ToastClient, poll_restaurant, toast_time
+from app.integrations.toast_http import LOGIN_PATH, ToastSession
+from app.integrations.venues import VenueState
+
+LATENCY = 0.020
+ORDERS = 200
+REFRESH = 0.2
+POLL = 0.5
+DURATION = 3.0
+
+class FakeToast:
+    def __init__(self):
+        modified = toast_time(datetime.now(timezone.utc) - timedelta(minutes=5))
+        self.body = json.dumps([
+            {"guid": f"o{n}", "table": {"id": 1 + n % 40}, "totalAmount": 40.0, "modifiedDate": modified,
+             "checks": [{"selections": [{"itemGuid": f"i{n}", "displayName": "Risotto", "price": 40.0}]}]}
+            for n in range(ORDERS)
+        ]).encode()
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(LATENCY)
+        if request.url.path == LOGIN_PATH:
+            return httpx.Response(200, json={"token": {"accessToken": "t", "expiresIn": 86400}})
+        self.calls += 1
+        # One page holds everything; later pages are empty
+        body = self.body if request.url.params["page"] == "1" else b"[]"
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+
+async def run(screens: int, polled: bool):
+    fake = FakeToast()
+    session = ToastSession(base_url="https://toast.bench", client_id="bench", client_secret="secret",
+                           transport=httpx.MockTransport(fake))
+    client = ToastClient("bench", session=session)
+    client.page_size = 500
+    venue = VenueState("bench", toast=client)
+    poller = None
+    if polled:
+        poller = asyncio.create_task(poll_restaurant(lambda: [client], interval=POLL, jitter=0.2))
+        while not client.polled:
+            await asyncio.sleep(0.01)
+    else:
+        await client.sync()
+    fake.calls = 0
+    latencies = []
+
+    async def screen(offset: float):
+        await asyncio.sleep(offset)
+        deadline = time.perf_counter() + DURATION
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await router.get_kitchen_queue(venue=venue)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(REFRESH)
+
+    await asyncio.gather(*(screen(REFRESH * n / screens) for n in range(screens)))
+    if poller is not None:
+        poller.cancel()
+        await asyncio.gather(poller, return_exceptions=True)
+    await session.close()
+    latencies.sort()
+    return fake.calls, statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+
+async def main():
+    print(f"fake Toast {LATENCY * 1000:.0f} ms per call, {ORDERS} orders, screens refresh every {REFRESH} s "
+          f"for {DURATION} s\n")
+    print(f"{'screens':>7} | {'mode':<11} | {'upstream calls':>14} | {'read p50 (ms)':>13} | {'read p99 (ms)':>13}")
+    print("-" * 72)
+    for screens in (1, 10, 50):
+        for polled in (False, True):
+            calls, p50, p99 = await run(screens, polled)
+            print(f"{screens:>7} | {'poller' if polled else 'per request':<11} | {calls:>14} | "
+                  f"{p50 * 1000:>13.2f} | {p99 * 1000:>13.2f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+Benchmark: Toast order polls, full pull vs. incremental (modified-since) sync.
+
+A fake Toast API (in-process httpx transport) holds a day of ORDERS orders;
+between polls CHANGED of them are modified. Compares per poll
+  - full:        GET /orders/v2/orders, the whole day parsed and mapped
+                 (get_orders as it was)
+  - incremental: ToastClient.sync, ordersBulk pages modified since the
+                 high-water mark, only changed orders mapped
+the bytes received, client time (the fake server's own time excluded) and
+peak Python memory (tracemalloc). Polls here are milliseconds apart, so the
+sync overlap is off; at a real interval it re-reads the last minute's
+changes, which are skipped unmapped.
+
+Usage (from backend/):
+    python -m scripts.bench_toast_sync
+"""
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+import httpx
+from app.integrations.toast_client import ToastClient, toast_time
+from app.integrations.toast_http import LOGIN_PATH, ToastSession
+
+ORDERS = 5000
+CHANGED = 50
+POLLS = 20
+
+def make_order(n: int, modified: datetime) -> dict:
+    return {
+        "guid": f"order-{n}", "table": {"id": n % 60}, "guestCount": 2 + n % 4, "totalAmount": 96.0,
+        "server": {"displayName": f"Server {n % 12}"}, "modifiedDate": toast_time(modified),
+        "checks": [{"selections": [
+            {"itemGuid": f"item-{n}-{s}", "displayName": "Wagyu Tartare", "quantity": 1, "price": 24.0,
+             "modifiers": ["No capers"]}
+            for s in range(4)
+        ]}],
+    }
+
+class FakeToast:
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        start = datetime.now(timezone.utc) - timedelta(hours=8)
+        self.orders = [make_order(n, start + timedelta(seconds=5 * n)) for n in range(ORDERS)]
+        self.received = 0
+        self.seconds = 0.0
+
+    def modify(self):
+        stamp = toast_time(datetime.now(timezone.utc) - timedelta(milliseconds=5))
+        for order in self.rng.sample(self.orders, CHANGED):
+            order["totalAmount"] += 1.0
+            order["modifiedDate"] = stamp
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        began = time.perf_counter()
+        if request.url.path == LOGIN_PATH:
+            body = json.dumps({"token": {"accessToken": "t", "expiresIn": 86400}}).encode()
+        elif request.url.path == "/orders/v2/orders":
+            body = json.dumps(self.orders).encode()
+        else:
+            params = request.url.params
+            start, end = params["startDate"], params["endDate"]
+            size, page = int(params["pageSize"]), int(params["page"])
+            # Same timestamp format throughout, so string order is time order
+            window = [o for o in self.orders if start <= o["modifiedDate"] < end]
+            body = json.dumps(window[(page - 1) * size:page * size]).encode()
+        self.received += len(body)
+        self.seconds += time.perf_counter() - began
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+
+async def full_pull(client: ToastClient):
+    """get_orders before incremental sync: the whole day every poll."""
+    response = await client.session.get("/orders/v2/orders", client.restaurant_guid)
+    orders = [client._map_to_order(o) for o in response.json()]
+    client.orders.upsert_many(o for o in orders if o.id not in client.archive)
+
+async def measure(label: str, fake: FakeToast, client: ToastClient, poll):
+    await poll(client)
+    seconds, received, peak = 0.0, 0, 0
+    for _ in range(POLLS):
+        fake.modify()
+        before, server = fake.received, fake.seconds
+        start = time.perf_counter()
+        await poll(client)
+        seconds += time.perf_counter() - start - (fake.seconds - server)
+        received += fake.received - before
+    # Memory in a separate pass (tracemalloc slows everything down)
+    tracemalloc.start()
+    for _ in range(3):
+        fake.modify()
+        tracemalloc.reset_peak()
+        await poll(client)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    print(f"{label:<12} | {received / POLLS / 1024:>10,.0f} | {seconds / POLLS * 1000:>9.1f} | "
+          f"{peak / 2**20:>13.1f}")
+
+async def main():
+    print(f"{ORDERS:,} orders today, {CHANGED} modified between polls\n")
+    print(f"{'poll':<12} | {'KB / poll':>10} | {'ms / poll':>9} | {'peak mem (MB)':>13}")
+    print("-" * 54)
+    for label, poll in (("full", full_pull), ("incremental", ToastClient.sync)):
+        fake = FakeToast(random.Random(7))
+        session = ToastSession(base_url="https://toast.bench", client_id="bench", client_secret="secret",
+                               transport=httpx.MockTransport(fake))
+        client = ToastClient("bench", session=session)
+        client.sync_overlap = timedelta(0)
+        await measure(label, fake, client, poll)
+        await session.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
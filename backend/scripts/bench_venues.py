@@ -0,0 +1,87 @@
+"""
+Benchmark: mixed floor traffic across 50 venues in one process.
+
+Replays the same request mix (table reads, seat/clear, waitlist add/read,
+auto-seat, snapshot) against
+  - shared:      one global partition holding every venue's tables and
+                 waitlist (the old process-wide state), and
+  - partitioned: one VenueState per venue, selected by key.
+Handlers are called directly (no HTTP), so the numbers are the state
+layer's cost per request. Reports throughput and p50/p99 latency.
+
+Usage (from backend/):
+    python -m scripts.bench_venues
+"""
+import asyncio
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+from app.integrations import router
+from app.integrations.models import GuestToSeat
+from app.integrations.venues import VenueRegistry, VenueState, build_floor_layout
+
+VENUES = 50
+REQUESTS = 20000
+
+def shared_layout() -> List:
+    # Every venue's 40 tables in one store, ids/numbers made unique
+    tables = []
+    for v in range(VENUES):
+        for t in build_floor_layout():
+            tables.append(t.copy(update={"id": f"v{v}-{t.id}", "number": v * 100 + t.number}))
+    return tables
+
+def make_ops(rng: random.Random) -> List[Tuple[int, str, int]]:
+    kinds = ["tables"] * 40 + ["waitlist"] * 15 + ["seat"] * 15 + ["clear"] * 10 + \
+            ["join"] * 10 + ["auto_seat"] * 5 + ["snapshot"] * 5
+    return [(rng.randrange(VENUES), rng.choice(kinds), rng.randint(1, 40)) for _ in range(REQUESTS)]
+
+def guest(n: int, party: int = 2) -> GuestToSeat:
+    return GuestToSeat(id=f"g{n}", name=f"Guest {n}", party=party, isVip=n % 7 == 0, source="waitlist")
+
+def run(resolve: Callable[[int], Tuple[VenueState, str]], ops: List[Tuple[int, str, int]]) -> List[float]:
+    loop = asyncio.new_event_loop()
+    latencies = []
+    for n, (v, kind, t) in enumerate(ops):
+        start = time.perf_counter()
+        venue, prefix = resolve(v)
+        table_id = f"{prefix}t{t}"
+        if kind == "tables":
+            router.get_tables(venue=venue)
+        elif kind == "waitlist":
+            router.get_waitlist(venue=venue)
+        elif kind == "seat":
+            router.seat_guest(venue, table_id, guest(n))
+        elif kind == "clear":
+            router.clear_table(table_id, venue=venue)
+        elif kind == "join":
+            router.add_to_waitlist(guest(n, party=1 + n % 6), venue=venue)
+        elif kind == "auto_seat":
+            router.auto_seat_guests(venue=venue)
+        else:
+            loop.run_until_complete(router.get_floor_snapshot(since=None, if_none_match=None, venue=venue))
+        latencies.append(time.perf_counter() - start)
+    loop.close()
+    return latencies
+
+def report(label: str, latencies: List[float]):
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    p99 = ordered[int(len(ordered) * 0.99)]
+    print(f"{label:<12} {len(latencies) / total:>9.0f} req/s   "
+          f"p50 {statistics.median(ordered) * 1e6:>7.0f} us   p99 {p99 * 1e6:>7.0f} us")
+
+def main():
+    ops = make_ops(random.Random(7))
+    print(f"{VENUES} venues x 40 tables, {REQUESTS} mixed requests\n")
+
+    shared = VenueState("shared", tables=shared_layout())
+    report("shared", run(lambda v: (shared, f"v{v}-"), ops))
+
+    registry = VenueRegistry()
+    keys: Dict[int, str] = {v: registry.register(f"venue-{v}").key for v in range(VENUES)}
+    report("partitioned", run(lambda v: (registry.get(keys[v]), ""), ops))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: a burst of Toast webhooks, applied in the request vs. queued.
+
+Sends WEBHOOKS order webhooks (a minute's worth at 5k/min) through the
+ASGI stack in process, RATE per second (4x the 5k/min peak) and then as
+fast as CONCURRENCY clients can. A RETRY_SHARE of them are Toast retries
+of an earlier delivery. Compares
+  - inline: the old endpoint (reconcile the guest and append the order in
+            the request, no dedup)
+  - queued: the current endpoint (validate, enqueue, 202; workers apply
+            micro-batches deduped by order and version)
+reporting acknowledgement p50/p99, time until every order is applied and
+the number of order rows kept.
+
+Usage (from backend/):
+    python -m scripts.bench_webhooks
+"""
+import asyncio
+import random
+import statistics
+import time
+from typing import List
+import httpx
+from fastapi import FastAPI
+from app.integrations import router
+from app.integrations.logic import reconciler
+from app.integrations.models import Order
+from app.integrations.venues import venues
+
+WEBHOOKS = 5000
+RETRY_SHARE = 0.2
+RATE = 4 * 5000 / 60
+CONCURRENCY = 50
+
+def payloads(rng: random.Random) -> List[dict]:
+    orders = []
+    for n in range(int(WEBHOOKS * (1 - RETRY_SHARE))):
+        orders.append({"id": f"hook-{n}", "table_number": 1 + n % 40, "total_amount": 60.0,
+                       "items": [{"item_id": f"i{n}-{k}", "name": "Mezcal Negroni", "quantity": 1,
+                                  "price": 15.0, "station": "bar"} for k in range(4)]})
+    orders += [rng.choice(orders) for _ in range(WEBHOOKS - len(orders))]
+    rng.shuffle(orders)
+    return orders
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    legacy_rows: List[Order] = []
+
+    @app.post("/inline/webhook/toast", response_model=Order)
+    def receive_inline(order: Order):
+        reconciler.reconcile_order(order, "webhook")
+        legacy_rows.append(order)
+        return order
+
+    app.include_router(router.router, prefix="/venues/{venue_key}")
+    app.state.legacy_rows = legacy_rows
+    return app
+
+async def send(client: httpx.AsyncClient, path: str, body: dict, latencies: List[float]):
+    start = time.perf_counter()
+    response = await client.post(path, json=body)
+    assert response.status_code in (200, 202), response.text
+    latencies.append(time.perf_counter() - start)
+
+async def burst(client: httpx.AsyncClient, path: str, bodies: List[dict], rate: float = 0.0) -> List[float]:
+    """Sends every body at `rate` per second (0: as fast as CONCURRENCY senders go)."""
+    latencies, pending = [], iter(bodies)
+    if rate:
+        start, sends = time.perf_counter(), []
+        for n, body in enumerate(bodies):
+            await asyncio.sleep(max(0.0, start + n / rate - time.perf_counter()))
+            sends.append(asyncio.create_task(send(client, path, body, latencies)))
+        await asyncio.gather(*sends)
+    else:
+        async def sender():
+            for body in pending:
+                await send(client, path, body, latencies)
+        await asyncio.gather(*(sender() for _ in range(CONCURRENCY)))
+    latencies.sort()
+    return latencies
+
+def line(label: str, latencies: List[float], applied_after: float, rows: int):
+    print(f"{label:<16} | {statistics.median(latencies) * 1000:>8.2f} | "
+          f"{latencies[int(len(latencies) * 0.99)] * 1000:>8.2f} | {applied_after:>13.2f} | {rows:>5,}")
+
+async def main():
+    bodies = payloads(random.Random(7))
+    app = make_app()
+    venue = venues.register("bench-webhooks")
+    print(f"{WEBHOOKS:,} webhooks ({RETRY_SHARE:.0%} retries), {CONCURRENCY} concurrent senders\n")
+    print(f"{'mode':<16} | {'ack p50':>8} | {'ack p99':>8} | {'all applied s':>13} | {'rows':>5}")
+    print("-" * 64)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        workers = asyncio.create_task(router.toast_webhooks.run())
+        await asyncio.sleep(0)
+        for rate, pace in ((RATE, f"{RATE:.0f}/s"), (0.0, "max")):
+            app.state.legacy_rows.clear()
+            start = time.perf_counter()
+            latencies = await burst(client, "/inline/webhook/toast", bodies, rate)
+            line(f"inline, {pace}", latencies, time.perf_counter() - start, len(app.state.legacy_rows))
+
+            venue.toast.orders.clear()
+            start = time.perf_counter()
+            latencies = await burst(client, "/venues/bench-webhooks/webhook/toast", bodies, rate)
+            await router.toast_webhooks.drain(timeout=300)
+            line(f"queued, {pace}", latencies, time.perf_counter() - start, len(venue.toast.orders))
+            # The second pass re-sends the same versions; start the dedup memory afresh
+            router.toast_webhooks._versions.clear()
+        workers.cancel()
+    metrics = router.toast_webhooks.metrics()
+    print(f"\nqueue: {metrics['batches']:,} batches, {metrics['duplicates']:,} duplicates dropped, "
+          f"{metrics['rejected']:,} rejected, max lag {metrics['max_lag_seconds']:.2f} s")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""
+Offline guest dedup: finds duplicate guest profiles in the guests table
+(imports from several venues, walk-ins re-entered by hand) and merges each
+group into its oldest profile. See GuestDedup for the stages.
+
+Interrupting the job is safe: run it again with the same --state file and
+it resumes from the last checkpoint. --dry-run stops before anything is
+written to the database (the matches and clusters stay in the state file
+for inspection). --undo puts wrongly merged guests back (see unmerge_guest).
+
+Usage (from backend/):
+    python -m scripts.dedup_guests [--dry-run] [--workers N] [--state dedup_state.db]
+    python -m scripts.dedup_guests --undo GUEST_ID [GUEST_ID ...]
+"""
+import argparse
+import os
+import time
+from sqlalchemy import create_engine
+from app.core.config import settings
+from app.integrations.guest_dedup import GuestDedup, unmerge_guest
+
+# Overnight budget the throughput report is checked against
+TARGET_ROWS = 5_000_000
+TARGET_HOURS = 8
+
+def print_report(report: dict):
+    print(f"\n{'stage':<9} | {'rows':>11} | {'seconds':>8} | {'rows/s':>9} | {'5M rows at this rate':>20}")
+    print("-" * 70)
+    guests, projected = max(report["snapshot"]["rows"], 1), 0.0
+    for stage, numbers in report.items():
+        if not numbers["seconds"]:
+            continue
+        # Linear in table size (cluster and apply rows are matches and merges, not guests)
+        estimate = numbers["seconds"] * TARGET_ROWS / guests
+        projected += estimate
+        print(f"{stage:<9} | {numbers['rows']:>11,} | {numbers['seconds']:>8.1f} | {numbers['rate']:>9,.0f} | "
+              f"{estimate / 3600:>18.2f} h")
+    verdict = "fits" if projected <= TARGET_HOURS * 3600 else "does NOT fit"
+    print(f"\nprojected for {TARGET_ROWS:,} guests: {projected / 3600:.2f} h ({verdict} in {TARGET_HOURS} h)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge duplicate guest profiles.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--state", default="dedup_state.db", help="checkpoint file (resumes if it exists)")
+    parser.add_argument("--restart", action="store_true", help="discard the checkpoint file first")
+    parser.add_argument("--dry-run", action="store_true", help="match and cluster only, write nothing")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="scoring processes")
+    parser.add_argument("--chunk", type=int, default=5000, help="guests per read page / scoring task")
+    parser.add_argument("--batch", type=int, default=500, help="clusters merged per transaction")
+    parser.add_argument("--threshold", type=float, default=0.9, help="name similarity needed to merge")
+    parser.add_argument("--undo", nargs="+", metavar="GUEST_ID", help="unmerge these guests and exit")
+    args = parser.parse_args()
+
+    if args.undo:
+        engine = create_engine(args.database_url)
+        for guest_id in args.undo:
+            print(f"{guest_id}: {'unmerged' if unmerge_guest(engine, guest_id) else 'not merged'}")
+        return
+
+    if args.restart:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.state + suffix):
+                os.remove(args.state + suffix)
+    engine = create_engine(args.database_url)
+    job = GuestDedup(engine, state_path=args.state, workers=args.workers, chunk=args.chunk,
+                     batch=args.batch, threshold=args.threshold)
+    started = time.perf_counter()
+    try:
+        report = job.run(until="cluster" if args.dry_run else "apply")
+    finally:
+        job.close()
+    print(f"\nfinished in {time.perf_counter() - started:.1f} s")
+    print_report(report)
+
+if __name__ == "__main__":
+    main()
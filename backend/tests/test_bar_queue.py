@@ -0,0 +1,51 @@
+from app.integrations.bar_queue import BarQueue
+from app.integrations.models import Order, OrderItem
+from app.integrations.order_registry import OrderRegistry
+from app.integrations.sections import SectionMap
+
+SECTIONS = [
+    {"id": "b1", "name": "Alex", "tables": [1, 2]},
+    {"id": "b2", "name": "Jordan", "tables": [3, 4]},
+]
+
+def drink_order(order_id: str, table: int) -> Order:
+    return Order(id=order_id, table_number=table, total_amount=20.0, items=[
+        OrderItem(item_id=f"{order_id}-d", name="Martini", quantity=1, price=20.0, station="Bar"),
+        OrderItem(item_id=f"{order_id}-f", name="Fries", quantity=1, price=9.0, station="Fry"),
+    ])
+
+def make_queue():
+    sections = SectionMap(SECTIONS)
+    registry = OrderRegistry()
+    queue = BarQueue(sections)
+    registry.subscribe(queue.on_order_event)
+    return sections, registry, queue
+
+def test_section_map_routing():
+    sections = SectionMap(SECTIONS)
+    assert sections.for_table(4)["id"] == "b2"
+    assert sections.for_table(99)["id"] == "b1"
+    assert sections.station_for_table(3) == "bar 2"
+    assert sections.station_for_table(None) == "bar"
+
+def test_tickets_are_bucketed_per_bartender():
+    _, registry, queue = make_queue()
+    registry.add(drink_order("o1", 3))
+    registry.add(drink_order("o2", 1))
+    registry.add(Order(id="food", table_number=3, total_amount=9.0, items=[]))
+
+    assert [t["order_id"] for t in queue.tickets("b2")] == ["o1"]
+    assert [t["order_id"] for t in queue.tickets()] == ["o1", "o2"]
+    assert [i["name"] for i in queue.tickets("b2")[0]["items"]] == ["Martini"]
+
+    registry.set_status("o1", "ready")
+    assert queue.tickets("b2")[0]["status"] == "ready"
+    registry.set_status("o1", "delivered")
+    assert queue.tickets("b2") == []
+
+def test_rebuild_after_section_change():
+    sections, registry, queue = make_queue()
+    registry.add(drink_order("o1", 3))
+    sections.load([{"id": "b9", "name": "Sam", "tables": [3]}])
+    queue.rebuild(registry.live())
+    assert [t["bartender_id"] for t in queue.tickets()] == ["b9"]
@@ -0,0 +1,120 @@
+import asyncio
+import random
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.integrations import router
+from app.integrations.floor_state import FloorStore
+from app.integrations.models import GuestToSeat, Order, OrderItem
+from app.integrations.order_registry import CLOSED_STATUSES
+from app.integrations.venues import VenueState
+
+@pytest.fixture(autouse=True)
+def fast_switching():
+    # Switch threads as often as possible to surface interleavings
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+def run_concurrently(calls, workers: int = 32):
+    random.Random(1).shuffle(calls)
+    with ThreadPoolExecutor(workers) as pool:
+        for future in [pool.submit(call) for call in calls]:
+            future.result()
+
+def guest(n: int, party: int = 2) -> GuestToSeat:
+    return GuestToSeat(id=f"g{n}", name=f"Guest {n}", party=party, isVip=n % 5 == 0, source="waitlist")
+
+def order(n: int, table: int, station: str = "grill") -> Order:
+    return Order(id=f"o{n}", table_number=table, total_amount=1.0, items=[
+        OrderItem(item_id=f"i{n}", name=f"Item {n}", quantity=1, price=1.0, station=station),
+    ])
+
+def assert_floor_consistent(floor: FloorStore):
+    for table in floor:
+        for status, ids in floor._by_status.items():
+            assert (table.id in ids) == (status == table.status)
+        assert table.id in floor._by_capacity[table.capacity]
+        assert floor.get_by_number(table.number).id == table.id
+    for capacity in floor.capacities():
+        best = floor.best_available(capacity)
+        assert best is None or best.status == "available"
+
+def test_orders_and_seating_on_the_same_tables_keep_every_update():
+    venue = VenueState("stress")
+    calls = [
+        lambda n=n: asyncio.run(router.create_manual_order(order(n, 1 + n % 10), venue=venue))
+        for n in range(2000)
+    ] + [
+        lambda n=n: router.seat_guest(venue, f"t{1 + n % 10}", guest(n))
+        for n in range(2000)
+    ]
+    run_concurrently(calls)
+
+    for number in range(1, 11):
+        table = venue.floor.get_by_number(number)
+        assert table.status == "occupied"
+        assert table.orderTotal == 200
+        assert len(table.items) == 200
+    assert len(venue.toast.orders) == 2000
+    assert_floor_consistent(venue.floor)
+
+def test_concurrent_auto_seat_never_seats_a_guest_or_table_twice():
+    venue = VenueState("stress")
+    for n in range(300):
+        venue.waitlist.add(guest(n, party=1 + n % 8))
+    results = []
+    calls = [
+        lambda mode=mode: results.append(router.auto_seat_guests(mode=mode, venue=venue))
+        for mode in ["greedy", "optimal"] * 8
+    ] + [
+        lambda n=n: router.add_to_waitlist(guest(1000 + n, party=2), venue=venue)
+        for n in range(200)
+    ]
+    run_concurrently(calls)
+
+    seated = [re.match(r"Seated (.+) at Table (\d+)", line).groups()
+              for result in results for line in result["seated"]]
+    guests = [name for name, _ in seated]
+    tables = [number for _, number in seated]
+    assert len(set(guests)) == len(guests)
+    assert len(set(tables)) == len(tables)
+    occupied = venue.floor.with_status("occupied")
+    assert len(occupied) == len(seated)
+    assert len(venue.waitlist) == 500 - len(seated)
+    assert not {g.name for g in venue.waitlist.ordered()} & set(guests)
+    assert_floor_consistent(venue.floor)
+
+def test_seat_and_clear_churn_keeps_indexes_consistent():
+    venue = VenueState("stress")
+    calls = [lambda n=n: router.seat_guest(venue, f"t{1 + n % 40}", guest(n)) for n in range(3000)]
+    calls += [lambda n=n: router.clear_table(f"t{1 + n % 40}", venue=venue) for n in range(3000)]
+    calls += [lambda: venue.floor.best_available(2) for _ in range(1000)]
+    run_concurrently(calls)
+    assert len(venue.floor) == 40
+    assert_floor_consistent(venue.floor)
+
+def test_concurrent_order_transitions_keep_buckets_consistent():
+    venue = VenueState("stress")
+    for n in range(500):
+        venue.toast.add_order(order(n, 1 + n % 40, station="bar" if n % 2 else "grill"))
+    transitions = [router.bump_order, router.deliver_order]
+    calls = [
+        lambda n=n, t=t: asyncio.run(t(f"o{n}", venue=venue))
+        for n in range(500) for t in transitions
+    ] + [
+        lambda n=n: asyncio.run(router.update_order_status(f"o{n}", "cooking", venue=venue))
+        for n in range(500)
+    ]
+    run_concurrently(calls)
+
+    orders = venue.toast.orders
+    live_ids = {o.id for o in orders.live()}
+    assert live_ids == {o.id for o in orders.all() if o.status not in CLOSED_STATUSES}
+    for o in orders.all():
+        assert o.id in {x.id for x in orders.with_status(o.status)}
+    assert {t["order_id"] for t in venue.bar_queue.tickets()} == {
+        o.id for o in orders.live() if o.items[0].station == "bar"
+    }
@@ -0,0 +1,39 @@
+import asyncio
+import json
+from app.integrations.events import EventBroker
+
+def test_publish_reaches_only_subscribed_topics():
+    async def scenario():
+        broker = EventBroker()
+        tables = broker.subscribe(["tables"])
+        everything = broker.subscribe()
+        broker.publish("waitlist", "guest.added", {"guest_id": "w1"})
+        broker.publish("tables", "table.updated", {"id": "t1"})
+        assert tables.queue.qsize() == 1
+        assert everything.queue.qsize() == 2
+        assert json.loads(await tables.next())["data"] == {"id": "t1"}
+        broker.unsubscribe(tables)
+        assert broker.subscriber_count("tables") == 1
+
+    asyncio.run(scenario())
+
+def test_publish_from_worker_thread():
+    async def scenario():
+        broker = EventBroker()
+        subscription = broker.subscribe(["system"])
+        await asyncio.to_thread(broker.publish, "system", "system.status", {"running": True})
+        message = await asyncio.wait_for(subscription.next(), timeout=1)
+        assert json.loads(message)["type"] == "system.status"
+
+    asyncio.run(scenario())
+
+def test_slow_client_drops_oldest_events():
+    async def scenario():
+        broker = EventBroker(queue_size=2)
+        subscription = broker.subscribe(["kitchen"])
+        for i in range(3):
+            broker.publish("kitchen", "order.created", {"n": i})
+        assert subscription.dropped == 1
+        assert json.loads(await subscription.next())["data"] == {"n": 1}
+
+    asyncio.run(scenario())
@@ -0,0 +1,59 @@
+import pytest
+from app.integrations.models import TableData
+from app.integrations.floor_state import FloorStore
+
+def make_table(n: int, capacity: int = 4, status: str = "available") -> TableData:
+    return TableData(id=f"t{n}", number=n, capacity=capacity, x=0, y=0, status=status)
+
+@pytest.fixture
+def floor():
+    return FloorStore([make_table(1, 2), make_table(2, 4), make_table(3, 4), make_table(4, 6)])
+
+def test_lookup_by_id_and_number(floor):
+    assert floor.get("t3").number == 3
+    assert floor.get_by_number(4).id == "t4"
+    assert floor.get("t99") is None
+    assert floor.get_by_number(None) is None
+
+def test_update_reindexes_status(floor):
+    floor.update("t2", status="occupied", guestName="Kim")
+    assert [t.id for t in floor.with_status("occupied")] == ["t2"]
+    assert [t.id for t in floor.with_capacity(4, status="available")] == ["t3"]
+    assert floor.get("t2").guestName == "Kim"
+
+def test_put_keeps_layout_order(floor):
+    floor.put(make_table(9, 8), "t1")
+    assert [t.id for t in floor.all()] == ["t9", "t2", "t3", "t4"]
+    assert floor.get_by_number(1) is None
+    assert floor.get_by_number(9) is floor.get("t1")
+    assert floor.capacities() == [4, 6, 8]
+
+def test_update_unknown_table(floor):
+    assert floor.update("nope", status="occupied") is None
+
+def test_best_available_is_best_fit_in_layout_order(floor):
+    assert floor.best_available(3).id == "t2"
+    floor.update("t2", status="occupied")
+    assert floor.best_available(3).id == "t3"
+    floor.update("t3", status="occupied")
+    assert floor.best_available(3).id == "t4"
+    floor.update("t2", status="available")
+    assert floor.best_available(3).id == "t2"
+    assert floor.best_available(7) is None
+
+def test_update_mutates_in_place_and_reports_previous_values(floor):
+    table = floor.get("t2")
+    seen = []
+    floor.subscribe(lambda before, t: seen.append((before, t.status)))
+    assert floor.update("t2", status="occupied", guestName="Kim") is table
+    floor.update("t2", orderTotal=12.5)
+    assert seen == [({"status": "available", "guestName": None}, "occupied"), ({"orderTotal": 0.0}, "occupied")]
+
+def test_to_dict_is_cached_until_the_next_change(floor):
+    table = floor.get("t2")
+    first = table.to_dict()
+    assert table.to_dict() is first
+    assert first == TableData(**first).model_dump(mode="json")
+    floor.update("t2", items=["Negroni"])
+    assert table.to_dict()["items"] == ["Negroni"] and first["items"] == []
+    assert table.to_model().items == ["Negroni"]
@@ -0,0 +1,75 @@
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert, select
+from app.db.base import Base
+from app.db import models
+from app.integrations.guest_dedup import GuestDedup, merge_guests, unmerge_guest
+
+START = datetime(2025, 1, 1)
+
+def guest(name, email=None, phone=None, spend=0.0, minute=0, history=None, preferences=None):
+    return {"id": str(uuid.uuid4()), "name": name, "email": email, "phone": phone, "lifetime_spend": spend,
+            "created_at": START + timedelta(minutes=minute), "velocity_history": history or [],
+            "preferences": preferences or {}, "vip_status": False, "influence_score": 0, "privacy_toggle": False}
+
+def test_merge_keeps_oldest_identity_and_folds_the_rest():
+    merged = merge_guests([
+        guest("Robert Anderson", "rob@example.com", spend=100.0, history=[["2025-01-02", 100, "XS"]],
+              preferences={"seat": "window"}),
+        guest("Anderson, Robert", phone="7025550100", spend=50.0, minute=5,
+              history=[["2025-01-01", 50, "Delilah"], ["2025-01-02", 100, "XS"]],
+              preferences={"seat": "booth", "drink": "gin"}),
+    ])
+    assert (merged["email"], merged["phone_key"], merged["lifetime_spend"]) == \
+        ("rob@example.com", "+17025550100", 150.0)
+    assert merged["velocity_history"] == [["2025-01-01", 50, "Delilah"], ["2025-01-02", 100, "XS"]]
+    assert merged["preferences"] == {"seat": "booth", "drink": "gin"}
+
+def test_job_merges_duplicates_and_resumes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    Base.metadata.create_all(bind=engine)
+    robert = guest("Robert Anderson", "rob@example.com", spend=100.0)
+    rows = [
+        robert,
+        guest("Anderson, Robert", phone="702-555-0100", spend=50.0, minute=1),
+        guest("Robert Andersen", "ROB@example.com", "(702) 555-0100", spend=25.0, minute=2),
+        # Same name, different email: linked by name to the second row, but refused
+        guest("Robert Anderson", "bob@other.example.com", spend=10.0, minute=3),
+        guest("Maria Lopez", spend=5.0, minute=4),
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(models.Guest.__table__), rows)
+        conn.execute(insert(models.Order.__table__), [{"id": "o1", "guest_id": rows[2]["id"], "total_amount": 25.0}])
+
+    state = str(tmp_path / "state.db")
+    first = GuestDedup(engine, state_path=state, workers=1, chunk=2, log=lambda _: None)
+    first.run(until="score")
+    first.close()
+    # A second run resumes after the finished stages (a pool of two this time)
+    job = GuestDedup(engine, state_path=state, workers=2, chunk=2, log=lambda _: None)
+    report = job.run()
+    assert report["snapshot"]["rows"] == 5 and report["apply"]["rows"] == 2
+
+    with engine.connect() as conn:
+        survivors = {row.name: row for row in conn.execute(select(models.Guest.__table__))}
+        assert set(survivors) == {"Robert Anderson", "Maria Lopez"}
+        assert len(conn.execute(select(models.Guest.id)).all()) == 3
+        merged = conn.execute(select(models.Guest.__table__).where(models.Guest.id == robert["id"])).one()
+        assert (merged.lifetime_spend, merged.phone) == (175.0, "702-555-0100")
+        assert conn.execute(select(models.Order.guest_id)).scalar() == robert["id"]
+        assert {row.survivor_id for row in conn.execute(select(models.GuestMerge.__table__))} == {robert["id"]}
+
+    # Nothing left to do, and nothing merged twice
+    assert job.run()["apply"]["rows"] == 2
+    job.close()
+
+    # A wrong merge is undone from its snapshot
+    assert unmerge_guest(engine, rows[2]["id"]) and not unmerge_guest(engine, rows[2]["id"])
+    with engine.connect() as conn:
+        restored = conn.execute(select(models.Guest.__table__).where(models.Guest.id == rows[2]["id"])).one()
+        assert (restored.email, restored.lifetime_spend, restored.created_at) == \
+            ("ROB@example.com", 25.0, rows[2]["created_at"])
+        merged = conn.execute(select(models.Guest.__table__).where(models.Guest.id == robert["id"])).one()
+        assert (merged.lifetime_spend, merged.phone) == (150.0, "702-555-0100")
+        assert conn.execute(select(models.Order.guest_id)).scalar() == rows[2]["id"]
+        assert len(conn.execute(select(models.GuestMerge.id)).all()) == 1
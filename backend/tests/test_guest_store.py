@@ -0,0 +1,101 @@
+from app.db import models
+from app.integrations.guest_store import GuestStore
+from app.integrations.logic import GuestReconciler
+from app.integrations.models import Order, OrderItem
+
+def backed(session_factory, **kwargs) -> GuestReconciler:
+    reconciler = GuestReconciler(**kwargs)
+    reconciler.attach(GuestStore(session_factory))
+    return reconciler
+
+def test_profiles_are_written_in_batches_and_found_after_restart(session_factory):
+    reconciler = backed(session_factory)
+    kim = reconciler.reconcile({"name": "Kim Lee", "email": "Kim@Example.com", "phone": "702-555-0123", "spend": 40.0})
+    reconciler.reconcile({"name": "Kim Lee", "spend": 10.0})
+    reconciler.reconcile({"name": "Bo"})
+    db = session_factory()
+    assert db.query(models.Guest).count() == 0
+    assert reconciler.store.flush() == 2
+    row = db.query(models.Guest).filter(models.Guest.id == str(kim.id)).one()
+    assert (row.email_key, row.phone_key, row.name_key, row.lifetime_spend) == \
+        ("kim@example.com", "+17025550123", "kim lee", 50.0)
+
+    # A new process finds the profile through the indexed key columns
+    restarted = backed(session_factory)
+    assert restarted.profiles == []
+    found = restarted.reconcile({"name": "Someone", "phone": "+1 (702) 555 0123", "spend": 5.0})
+    assert found.id == kim.id and found.lifetime_spend == 55.0
+    restarted.store.flush()
+    db.expire_all()
+    assert db.query(models.Guest).count() == 2
+    assert db.query(models.Guest.lifetime_spend).filter(models.Guest.id == str(kim.id)).scalar() == 55.0
+    db.close()
+
+def test_cache_is_bounded_and_spend_is_written_as_deltas(session_factory):
+    reconciler = backed(session_factory, max_profiles=2)
+    for n in range(5):
+        reconciler.reconcile({"name": f"Guest {n}", "phone": f"702555010{n}"})
+    # Unwritten profiles are kept until flushed
+    assert len(reconciler.profiles) == 5
+    reconciler.store.flush()
+    reconciler.reconcile({"name": "Guest 9"})
+    assert len(reconciler.profiles) == 2
+
+    # Two processes adding spend to the same guest do not overwrite each other
+    other = backed(session_factory)
+    reconciler.reconcile({"name": "Guest 0", "spend": 30.0})
+    other.reconcile({"name": "guest 0", "spend": 12.0})
+    reconciler.store.flush()
+    other.store.flush()
+    db = session_factory()
+    assert db.query(models.Guest.lifetime_spend).filter(models.Guest.name == "Guest 0").scalar() == 42.0
+    db.close()
+
+def test_order_ledger_survives_restart(session_factory):
+    order = Order(id="o1", table_number=7, total_amount=40.0,
+                  items=[OrderItem(item_id="i1", name="Risotto", quantity=1, price=40.0)])
+    reconciler = backed(session_factory)
+    profile = reconciler.reconcile_order(order, "alpha")
+    reconciler.store.flush()
+
+    # Restored orders are re-announced on startup: already applied
+    restarted = backed(session_factory)
+    assert restarted.reconcile_order(order, "alpha") is None
+    order.total_amount = 55.0
+    assert restarted.reconcile_order(order, "alpha").id == profile.id
+    restarted.store.flush()
+    db = session_factory()
+    assert db.query(models.Guest.lifetime_spend).scalar() == 55.0
+    assert db.query(models.GuestOrder).one().spend == 55.0
+    db.close()
+
+def test_order_events_queue_reconciliation_when_store_backed(session_factory):
+    from app.integrations.order_registry import OrderRegistry
+    reconciler = backed(session_factory)
+    registry = OrderRegistry()
+    registry.subscribe(lambda event, order: reconciler.on_order_event("alpha", event, order))
+    reconciler.store.ledger = None  # any database read in the listener would fail
+    registry.add(Order(id="o1", table_number=7, total_amount=40.0, items=[]))
+    registry.set_status("o1", "cooking")
+    assert reconciler.queued == 1 and reconciler.profiles == []
+
+    del reconciler.store.ledger
+    assert reconciler.drain() == 1
+    assert reconciler.find_profile("Guest 7").lifetime_spend == 40.0
+
+def test_evicted_profiles_leave_the_fuzzy_index(session_factory):
+    from app.integrations.matching import NameMatcher
+    reconciler = backed(session_factory, matcher=NameMatcher(), max_profiles=2)
+    for n in range(6):
+        reconciler.reconcile({"name": f"Robert Anderson{'x' * n}", "phone": f"702555010{n}"})
+    reconciler.store.flush()
+    reconciler.find_profile("Nobody")  # evicts down to the two newest
+    assert len(reconciler.profiles) == 2 and len(reconciler._entries) == 2
+    blocks = len(reconciler.matcher)
+
+    # Evicted and reloaded over and over: indexed once each time
+    for _ in range(3):
+        for n in range(6):
+            reconciler.find_profile("Someone", phone=f"702555010{n}")
+    assert len(reconciler._entries) == len(reconciler.profiles) == 2
+    assert len(reconciler.matcher) <= blocks + 2 * len(NameMatcher().keys("Robert Andersonxxxxx"))
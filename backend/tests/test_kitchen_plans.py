@@ -0,0 +1,30 @@
+from app.ai.kitchen import KitchenOptimizer
+
+ITEMS = [
+    {"item_id": "i1", "name": "Ribeye 12oz", "quantity": 1},
+    {"item_id": "i2", "name": "Caesar Salad", "quantity": 1},
+]
+
+def test_plan_is_cached_and_stable():
+    optimizer = KitchenOptimizer()
+    plan = optimizer.plan_order("o1", ITEMS, 4, signature=("i1", "i2"))
+    assert optimizer.cached_plan("o1", ("i1", "i2")) is plan
+    assert optimizer.cached_plan("o1", ("i1",)) is None
+    fire_at = plan["i1"]["fire_at"]
+    assert optimizer.cached_plan("o1", ("i1", "i2"))["i1"]["fire_at"] == fire_at
+
+def test_item_bump_patches_cached_plan():
+    optimizer = KitchenOptimizer()
+    optimizer.plan_order("o1", ITEMS, signature="s")
+    optimizer.mark_item_complete("i2")
+    assert list(optimizer.cached_plan("o1", "s")) == ["i1"]
+
+def test_drop_plan_and_reset():
+    optimizer = KitchenOptimizer()
+    optimizer.plan_order("o1", ITEMS, signature="s")
+    optimizer.drop_plan("o1")
+    assert optimizer.cached_plan("o1", "s") is None
+    assert not optimizer.item_orders
+    optimizer.plan_order("o2", ITEMS, signature="s")
+    optimizer.reset()
+    assert not optimizer.plans
@@ -0,0 +1,34 @@
+from app.integrations.menu import MenuCatalog, menu_catalog, normalize_course
+
+def test_default_catalog_loads_menu_file():
+    assert menu_catalog.get("m1").name == "Filet Mignon 8oz"
+    assert menu_catalog.lookup("random-id", "ribeye 12oz").prep_time == 18
+
+def test_classify_prefers_item_fields_over_catalog():
+    catalog = MenuCatalog([{"id": "x1", "name": "Brownie", "course": "Desserts", "station": "Pastry", "prep_time": 7}])
+    assert catalog.classify("x1") == ("dessert", "pastry", 7)
+    assert catalog.classify("x1", course="Apps", station="Fry") == ("appetizer", "Fry", 7)
+    assert catalog.classify("unknown", "Mystery") == ("main", "grill", 10)
+
+def test_course_aliases():
+    assert [normalize_course(c) for c in ["Apps", "beverage", "Sides", "entree", None, "???"]] == \
+        ["appetizer", "drink", "side", "main", "main", "main"]
+
+def test_off_menu_items_do_not_move_the_table_course():
+    from app.integrations import router
+    from app.integrations.models import Order, OrderItem
+    from app.integrations.venues import VenueState
+    assert menu_catalog.known_course("custom-1", "Birthday Candle") is None
+    assert menu_catalog.known_course("custom-1", "Birthday Candle", course="Apps") == "appetizer"
+    assert menu_catalog.known_course("dr1") == "drink"
+
+    venue = VenueState("courses")
+    table = venue.floor.all()[0]
+    venue.floor.update(table.id, currentCourse="seated")
+    def order(*items):
+        return Order(id="o", table_number=table.number, total_amount=0.0,
+                     items=[OrderItem(item_id=item_id, name=name, quantity=1, price=0.0) for item_id, name in items])
+    assert router.add_order_to_table(venue, table.id, order(("x9", "Off-Menu Mocktail"))).currentCourse == "seated"
+    assert router.add_order_to_table(venue, table.id, order(("dr1", "Caymus Cabernet"))).currentCourse == "drinks"
+    assert router.add_order_to_table(venue, table.id, order(("x9", "Chef Special"), ("a7", "Caesar Salad"))) \
+        .currentCourse == "apps"
@@ -0,0 +1,63 @@
+from app.db import models
+from app.integrations.models import Order, OrderItem
+from app.integrations.order_archive import OrderArchive
+from app.integrations.toast_client import ToastClient
+
+def make_order(order_id: str, status: str = "open") -> Order:
+    return Order(id=order_id, table_number=3, total_amount=42.0, status=status,
+                 items=[OrderItem(item_id="i1", name="Risotto", quantity=1, price=42.0)])
+
+def test_closed_orders_leave_hot_set_after_grace():
+    client = ToastClient()
+    client.archive_grace_seconds = 60
+    client.add_order(make_order("o1"))
+    client.add_order(make_order("o2"))
+    client.orders.set_status("o1", "delivered")
+
+    assert client.archive_closed() == 0
+    closed_at = client.orders.closed_before(float("inf"))[0][1]
+    assert client.archive_closed(now=closed_at + 61) == 1
+    assert "o1" not in client.orders and "o1" in client.archive
+    assert [o.id for o in client.orders.all()] == ["o2"]
+
+def test_history_is_newest_first_and_time_filtered():
+    archive = OrderArchive()
+    for i in range(5):
+        archive.append(make_order(f"o{i}", "delivered"), closed_at=100.0 + i)
+    total, page = archive.history(limit=2)
+    assert total == 5 and [r.id for r in page] == ["o4", "o3"]
+    total, page = archive.history(limit=2, offset=4)
+    assert [r.id for r in page] == ["o0"]
+    total, page = archive.history(since=101, until=103)
+    assert total == 3 and [r.id for r in page] == ["o3", "o2", "o1"]
+
+def test_flush_writes_batches_and_trims(session_factory):
+    archive = OrderArchive(max_records=2, batch_size=2)
+    for i in range(5):
+        archive.append(make_order(f"o{i}", "delivered"), closed_at=float(i))
+    assert archive.flush(session_factory) == 5
+    assert archive.pending == 0 and len(archive) == 2
+
+    db = session_factory()
+    assert db.query(models.Order).count() == 5
+    assert db.query(models.OrderItem).count() == 5
+    db.close()
+
+def test_flush_updates_orders_already_persisted(session_factory):
+    db = session_factory()
+    db.add(models.Order(id="alpha:o1", venue_key="alpha", table_number=3, total_amount=42.0, status="cooking"))
+    db.add(models.OrderItem(id="alpha:o1:0", order_id="alpha:o1", item_name="Risotto"))
+    db.commit()
+    archive = OrderArchive(venue_key="alpha")
+    order = make_order("o1", "delivered")
+    order.total_amount = 55.0
+    order.items.append(OrderItem(item_id="i2", name="Tiramisu", quantity=1, price=13.0, station="pastry"))
+    archive.append(order, closed_at=1.0)
+    assert archive.flush(session_factory) == 1
+
+    db.expire_all()
+    row = db.query(models.Order).one()
+    assert (row.id, row.status, row.total_amount) == ("alpha:o1", "delivered", 55.0)
+    assert [(i.item_name, i.station) for i in db.query(models.OrderItem).order_by(models.OrderItem.id)] == \
+        [("Risotto", None), ("Tiramisu", "pastry")]
+    db.close()
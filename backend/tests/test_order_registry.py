@@ -0,0 +1,34 @@
+from app.integrations.models import Order
+from app.integrations.order_registry import OrderRegistry
+
+def make_order(order_id: str, status: str = "open") -> Order:
+    return Order(id=order_id, items=[], total_amount=0.0, status=status)
+
+def test_status_transitions_move_buckets():
+    registry = OrderRegistry()
+    for i in range(3):
+        registry.add(make_order(f"o{i}"))
+
+    registry.set_status("o1", "ready")
+    assert [o.id for o in registry.with_status("open")] == ["o0", "o2"]
+    assert [o.id for o in registry.with_status("ready")] == ["o1"]
+
+    registry.set_status("o1", "delivered")
+    assert [o.id for o in registry.live()] == ["o0", "o2"]
+    assert registry.get("o1").status == "delivered"
+    assert len(registry) == 3
+
+def test_set_status_unknown_order():
+    assert OrderRegistry().set_status("missing", "ready") is None
+
+def test_upsert_keeps_local_workflow_status():
+    registry = OrderRegistry()
+    registry.add(make_order("o1"))
+    registry.set_status("o1", "ready")
+
+    registry.upsert_many([make_order("o1", "open"), make_order("o2", "open")])
+    assert registry.get("o1").status == "ready"
+    assert [o.id for o in registry.live()] == ["o1", "o2"]
+
+    registry.upsert_many([make_order("o1", "voided")])
+    assert [o.id for o in registry.live()] == ["o2"]
@@ -0,0 +1,117 @@
+import pytest
+from app.db import models
+from app.integrations import router
+from app.integrations.models import GuestToSeat, Order, OrderItem
+from app.integrations.persistence import WriteBehind
+from app.integrations.venues import VenueState
+
+def make_order(order_id: str, table: int = 3) -> Order:
+    return Order(id=order_id, table_number=table, total_amount=42.0, server="Maria", items=[
+        OrderItem(item_id="i1", name="Risotto", quantity=1, price=42.0, station="saute", course="main"),
+        OrderItem(item_id="i2", name="Negroni", quantity=2, price=16.0, station="bar",
+                  special_requests=["up", "orange twist"]),
+    ])
+
+def seat(venue: VenueState, table_id: str):
+    router.seat_guest(venue, table_id, GuestToSeat(id="g1", name="Kim", party=2, isVip=False, source="walkin"))
+
+def test_changes_are_buffered_until_flush(session_factory):
+    persistence = WriteBehind(session_factory)
+    venue = VenueState("alpha")
+    persistence.attach(venue)
+
+    venue.toast.add_order(make_order("o1"))
+    venue.toast.orders.set_status("o1", "cooking")
+    seat(venue, "t3")
+    venue.floor.update("t3", orderTotal=42.0)
+
+    db = session_factory()
+    assert db.query(models.Order).count() == 0
+    # One row per order/table no matter how often it changed
+    assert persistence.pending == 3
+    assert persistence.flush() == 3
+    assert persistence.pending == 0
+    order = db.query(models.Order).one()
+    assert (order.venue_key, order.status, order.server) == ("alpha", "cooking", "Maria")
+    assert db.query(models.OrderItem).count() == 2
+    assert db.query(models.FloorTable).one().state["orderTotal"] == 42.0
+    assert db.query(models.Visit).one().end_time is None
+    db.close()
+
+def test_restore_rebuilds_floor_live_orders_and_open_visits(session_factory):
+    persistence = WriteBehind(session_factory)
+    venue = VenueState("alpha")
+    persistence.attach(venue)
+    venue.toast.add_order(make_order("o1"))
+    venue.toast.add_order(make_order("o2"))
+    venue.toast.orders.set_status("o2", "delivered")
+    seat(venue, "t3")
+    persistence.flush()
+
+    restarted = WriteBehind(session_factory)
+    fresh = VenueState("alpha")
+    assert restarted.restore(fresh) == (1, 1)
+    restarted.attach(fresh)
+
+    assert fresh.floor.get("t3").guestName == "Kim"
+    assert fresh.floor.get("t4").status == "available"
+    order = fresh.toast.orders.get("o1")
+    assert [(i.item_id, i.station, i.special_requests) for i in order.items] == [
+        ("i1", "saute", []), ("i2", "bar", ["up", "orange twist"]),
+    ]
+    assert "o2" not in fresh.toast.orders
+    assert [t["order_id"] for t in fresh.bar_queue.tickets()] == ["o1"]
+
+    # The restored open visit is the one closed when the table clears
+    router.clear_table("t3", venue=fresh)
+    restarted.flush()
+    db = session_factory()
+    visit = db.query(models.Visit).one()
+    assert visit.end_time is not None and visit.venue_key == "alpha"
+    db.close()
+
+def test_reset_closes_open_orders(session_factory):
+    persistence = WriteBehind(session_factory)
+    venue = VenueState("alpha")
+    persistence.attach(venue)
+    venue.toast.add_order(make_order("o1"))
+    persistence.flush()
+
+    router.reset_system(venue=venue)
+    venue.toast.add_order(make_order("o3"))
+    persistence.flush()
+
+    db = session_factory()
+    assert {o.id: o.status for o in db.query(models.Order)} == {"alpha:o1": "closed", "alpha:o3": "open"}
+    db.close()
+
+def test_failed_flush_requeues_changes(session_factory):
+    def broken():
+        raise RuntimeError("database down")
+    persistence = WriteBehind(broken)
+    venue = VenueState("alpha")
+    persistence.attach(venue)
+    venue.toast.add_order(make_order("o1"))
+
+    with pytest.raises(RuntimeError):
+        persistence.flush()
+    assert persistence.pending == 1
+    persistence.session_factory = session_factory
+    assert persistence.flush() == 1
+
+def test_venues_sharing_an_order_id_keep_their_own_rows(session_factory):
+    persistence = WriteBehind(session_factory)
+    alpha, beta = VenueState("alpha"), VenueState("beta")
+    persistence.attach(alpha)
+    persistence.attach(beta)
+    alpha.toast.add_order(make_order("o1"))
+    beta.toast.add_order(make_order("o1", table=7))
+    persistence.flush()
+
+    db = session_factory()
+    assert {o.id: o.venue_key for o in db.query(models.Order)} == {"alpha:o1": "alpha", "beta:o1": "beta"}
+    assert db.query(models.OrderItem).count() == 4
+    db.close()
+    fresh = VenueState("beta")
+    persistence.restore(fresh)
+    assert fresh.toast.orders.get("o1").table_number == 7
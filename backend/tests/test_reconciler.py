@@ -0,0 +1,85 @@
+from app.integrations.logic import GuestReconciler, normalize_phone
+
+def test_normalizes_phone_numbers_to_e164():
+    assert normalize_phone("(702) 555-0123") == "+17025550123"
+    assert normalize_phone("+44 20 7946 0958") == "+442079460958"
+    assert normalize_phone("0044 20 7946 0958") == "+442079460958"
+    assert normalize_phone("ext.") is None
+
+def test_matches_on_normalized_email_phone_and_name():
+    reconciler = GuestReconciler()
+    kim = reconciler.reconcile({"name": "Kim Lee", "email": "Kim@Example.com", "phone": "702-555-0123"})
+    assert reconciler.reconcile({"name": "K. Lee", "email": " kim@example.com"}) is kim
+    assert reconciler.reconcile({"name": "Someone", "phone": "+1 (702) 555 0123"}) is kim
+    assert reconciler.reconcile({"name": "  kim   LEE ", "spend": 40.0}) is kim
+    assert kim.lifetime_spend == 40.0
+    assert len(reconciler.profiles) == 1
+
+def test_earliest_profile_wins_like_the_original_scan():
+    reconciler = GuestReconciler()
+    first = reconciler.reconcile({"name": "Ana"})
+    second = reconciler.reconcile({"name": "Bo", "email": "bo@example.com"})
+    # Matches Bo by email and Ana by name: the older profile wins
+    assert reconciler.find_profile("Ana", email="bo@example.com") is first
+
+    # A merged email moves in the index
+    reconciler.reconcile({"name": "Bo", "email": "bo@new.example.com"})
+    assert reconciler.find_profile("Nobody", email="bo@example.com") is None
+    assert reconciler.find_profile("Nobody", email="BO@new.example.com") is second
+
+def test_fuzzy_mode_matches_name_variants():
+    from app.integrations.matching import NameMatcher, levenshtein, soundex
+    assert levenshtein("anderson robert", "andreson robert") == 2
+    assert soundex("cason") == soundex("kason")
+
+    exact, fuzzy = GuestReconciler(), GuestReconciler(matcher=NameMatcher(threshold=0.85))
+    for reconciler in (exact, fuzzy):
+        reconciler.reconcile({"name": "Robert Anderson", "email": "robert@example.com"})
+        reconciler.reconcile({"name": "Anderson, Robert"})
+        reconciler.reconcile({"name": "Robert Andersen"})
+    assert len(exact.profiles) == 3
+    assert len(fuzzy.profiles) == 1
+
+    # A contradicting email is a different guest, however close the name
+    assert fuzzy.reconcile({"name": "Robert Andersen", "email": "bob@example.com"}) is not fuzzy.profiles[0]
+    assert fuzzy.find_profile("Maria Lopez") is None
+
+def test_fuzzy_mode_keeps_names_that_differ_by_a_number_apart():
+    from app.integrations.matching import NameMatcher, name_tokens, similarity
+    assert name_tokens("Guest12") == ["guest", "12"]
+    assert similarity("guest 5", "guest 7") == similarity("1002 guest", "1003 guest") == 0.0
+    assert similarity("12 guest", "12 guest") == 1.0
+
+    fuzzy = GuestReconciler(matcher=NameMatcher(threshold=0.85))
+    for name in ("Guest 7", "Guest 5", "Guest 12", "Guest 1002", "Guest 1003", "guest 12"):
+        fuzzy.reconcile({"name": name})
+    assert sorted(p.name for p in fuzzy.profiles) == ["Guest 1002", "Guest 1003", "Guest 12", "Guest 5", "Guest 7"]
+
+def make_order(order_id: str, total: float, status: str = "open"):
+    from app.integrations.models import Order, OrderItem
+    return Order(id=order_id, table_number=7, total_amount=total, status=status,
+                 items=[OrderItem(item_id="i1", name="Risotto", quantity=1, price=total)])
+
+def test_orders_are_applied_once_and_then_as_deltas():
+    reconciler = GuestReconciler()
+    profile = reconciler.reconcile_order(make_order("o1", 40.0))
+    assert profile.lifetime_spend == 40.0
+    # Re-polled or redelivered: nothing to do
+    assert reconciler.reconcile_order(make_order("o1", 40.0)) is None
+    assert reconciler.reconcile_order(make_order("o1", 55.0)) is profile
+    assert profile.lifetime_spend == 55.0
+    reconciler.reconcile_order(make_order("o1", 55.0, status="voided"))
+    assert profile.lifetime_spend == 0.0
+    assert len(reconciler.profiles) == 1
+
+def test_order_events_drive_reconciliation():
+    from app.integrations.logic import reconciler
+    from app.integrations.venues import VenueState
+    venue = VenueState("ledger")
+    profile = reconciler.find_profile("Guest 7")
+    before = profile.lifetime_spend if profile else 0.0
+    venue.toast.add_order(make_order("o1", 30.0))
+    venue.toast.orders.upsert_many([make_order("o1", 30.0), make_order("o1", 30.0)])
+    venue.toast.orders.set_status("o1", "cooking")
+    reconciler.drain()  # queued instead when backed by a store
+    assert reconciler.find_profile("Guest 7").lifetime_spend == before + 30.0
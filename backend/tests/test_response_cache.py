@@ -0,0 +1,35 @@
+import json
+from app.integrations import router
+from app.integrations.models import GuestToSeat
+from app.integrations.response_cache import ResponseCache, dumps
+from app.integrations.venues import VenueState
+
+def body(response) -> list:
+    assert response.media_type == "application/json"
+    return json.loads(response.body)
+
+def test_body_is_reused_until_the_version_moves():
+    cache = ResponseCache()
+    calls = []
+    build = lambda: calls.append(1) or {"a": [1, None]}
+    assert cache.body("k", 1, build) is cache.body("k", 1, build)
+    assert cache.body("k", 2, build) == dumps({"a": [1, None]})
+    assert len(calls) == 2 and (cache.hits, cache.misses) == (1, 2)
+    assert cache.body("k", 2, build, ttl=0) and len(calls) == 3
+
+def test_mutations_invalidate_cached_endpoints():
+    venue = VenueState("cache")
+    tables = body(router.get_tables(venue=venue))
+    assert len(tables) == 40 and tables[2]["status"] == "available"
+    assert router.get_tables(venue=venue).body is venue.responses.body("tables", venue.floor.version, list)
+
+    router.seat_guest(venue, "t3", GuestToSeat(id="g1", name="Kim", party=2, isVip=False, source="walkin"))
+    assert body(router.get_tables(venue=venue))[2]["guestName"] == "Kim"
+
+    assert body(router.get_waitlist(venue=venue)) == []
+    router.add_to_waitlist(GuestToSeat(id="g2", name="Lee", party=4, isVip=True, source="waitlist"), venue=venue)
+    assert [g["name"] for g in body(router.get_waitlist(venue=venue))] == ["Lee"]
+
+    assert len(body(router.get_bartenders(venue=venue))) == 4
+    router.update_bartenders([{"id": "x", "name": "Solo", "tables": [1]}], venue=venue)
+    assert body(router.get_bartenders(venue=venue)) == [{"id": "x", "name": "Solo", "tables": [1]}]
@@ -0,0 +1,31 @@
+from app.integrations.models import GuestToSeat, TableData
+from app.integrations.seating import SeatingEngine
+
+def guest(guest_id: str, party: int, vip: bool = False) -> GuestToSeat:
+    return GuestToSeat(id=guest_id, name=guest_id, party=party, isVip=vip, source="waitlist")
+
+def tables(*capacities: int):
+    grouped = {}
+    for i, capacity in enumerate(capacities, 1):
+        grouped.setdefault(capacity, []).append(
+            TableData(id=f"t{i}", number=i, capacity=capacity, x=0, y=0, status="available"))
+    return grouped
+
+def test_optimal_avoids_wasting_large_tables():
+    # Greedy in arrival order would give the 2-top's party the 6-top
+    waitlist = [guest("a", 2), guest("b", 6)]
+    seated = SeatingEngine().assign_optimal(waitlist, tables(6, 2))
+    assert [(g.id, t.capacity) for g, t in seated] == [("a", 2), ("b", 6)]
+
+def test_optimal_prefers_vip_when_tables_are_short():
+    waitlist = [guest("regular", 4), guest("vip", 4, vip=True)]
+    seated = SeatingEngine().assign_optimal(waitlist, tables(4))
+    assert [g.id for g, _ in seated] == ["vip"]
+
+def test_optimal_seats_earliest_arrival_within_group():
+    waitlist = [guest("first", 2), guest("second", 2)]
+    seated = SeatingEngine().assign_optimal(waitlist, tables(2))
+    assert [g.id for g, _ in seated] == ["first"]
+
+def test_party_larger_than_any_table_keeps_waiting():
+    assert SeatingEngine().assign_optimal([guest("big", 12)], tables(4, 6)) == []
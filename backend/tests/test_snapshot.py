@@ -0,0 +1,34 @@
+from app.integrations.snapshot import StateVersions
+
+def test_versions_track_changed_sections_and_tables():
+    versions = StateVersions()
+    versions.touch("tables", ["t1"])
+    since = versions.version
+    versions.touch("tables", ["t2"])
+    versions.touch("waitlist")
+
+    assert versions.changed_keys("tables", since) == ["t2"]
+    assert versions.section_changed("waitlist", since)
+    assert not versions.section_changed("kitchen", since)
+    assert versions.section_changed("kitchen", None)
+    assert versions.etag() == f'W/"{versions.epoch + 3}"'
+
+def test_versions_from_another_boot_are_not_diffed():
+    versions = StateVersions()
+    versions.touch("tables", ["t1"])
+    restarted = StateVersions()
+    assert restarted.version > versions.version and restarted.etag() != versions.etag()
+    assert restarted.issued(restarted.version) and not restarted.issued(versions.version)
+    assert not restarted.issued(restarted.version + 100)
+
+def test_snapshot_endpoint_sends_everything_for_an_unknown_version():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+    first = client.get("/api/v1/venues/delilah/integrations/floor/snapshot").json()
+    # A version held from before a restart
+    stale = client.get("/api/v1/venues/delilah/integrations/floor/snapshot", params={"since": 100}).json()
+    assert stale["since"] is None and len(stale["tables"]) == len(first["tables"]) == 40
+    current = client.get("/api/v1/venues/delilah/integrations/floor/snapshot",
+                         params={"since": first["version"]}).json()
+    assert current["since"] == first["version"]
@@ -0,0 +1,197 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import httpx
+import pytest
+from app.integrations.models import Order
+from app.integrations.toast_client import ToastClient, poll_delay, poll_restaurant, toast_time
+from app.integrations.toast_http import LOGIN_PATH, ToastSession, iter_json_array
+
+ORDER = {"guid": "t1", "table": {"id": 4}, "guestCount": 2, "totalAmount": 30.0,
+         "checks": [{"selections": [{"itemGuid": "i1", "displayName": "Negroni", "quantity": 2, "price": 15.0}]}]}
+
+class FakeToast:
+    """Toast API stand-in: counts logins and rejects tokens it has revoked."""
+
+    def __init__(self, expires_in: int = 3600, login_delay: float = 0.0):
+        self.expires_in = expires_in
+        self.login_delay = login_delay
+        self.logins = 0
+        self.revoked = set()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == LOGIN_PATH:
+            self.logins += 1
+            await asyncio.sleep(self.login_delay)
+            return httpx.Response(200, json={"token": {"accessToken": f"token-{self.logins}",
+                                                       "expiresIn": self.expires_in}})
+        token = request.headers["Authorization"].removeprefix("Bearer ")
+        if token in self.revoked:
+            return httpx.Response(401)
+        assert request.headers["Toast-Restaurant-External-ID"] == "r1"
+        return httpx.Response(200, json=[ORDER])
+
+def make_client(fake: FakeToast, refresh_margin: float = 300.0) -> ToastClient:
+    session = ToastSession(base_url="https://toast.test", client_id="id", client_secret="secret",
+                           refresh_margin=refresh_margin, transport=httpx.MockTransport(fake))
+    return ToastClient(restaurant_guid="r1", session=session)
+
+def test_token_is_cached_and_refreshed_once_under_concurrency():
+    fake = FakeToast(login_delay=0.01)
+    client = make_client(fake)
+
+    async def scenario():
+        results = await asyncio.gather(*(client.get_orders() for _ in range(20)))
+        assert all(orders[0].id == "t1" for orders in results)
+        await client.get_orders()
+        assert fake.logins == 1
+        # Inside the refresh margin: requests carry on with the old token while one login runs
+        client.session.refresh_margin = 3600
+        await asyncio.gather(*(client.get_orders() for _ in range(5)))
+        await asyncio.sleep(0.05)
+        assert fake.logins == 2
+        await client.session.close()
+
+    asyncio.run(scenario())
+    assert client.orders.get("t1").total_amount == 30.0
+
+def test_rejected_token_logs_in_again():
+    fake = FakeToast()
+    client = make_client(fake)
+
+    async def scenario():
+        await client.get_orders()
+        fake.revoked.add("token-1")
+        assert [o.id for o in await client.get_orders()] == ["t1"]
+        assert fake.logins == 2
+        await client.session.close()
+
+    asyncio.run(scenario())
+
+class FakeBulk:
+    """ordersBulk stand-in: orders filtered by modifiedDate window, paginated."""
+
+    def __init__(self):
+        self.orders = {}
+        self.pages = []
+
+    def put(self, guid: str, modified: datetime, total: float = 30.0):
+        self.orders[guid] = {**ORDER, "guid": guid, "totalAmount": total, "modifiedDate": toast_time(modified)}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == LOGIN_PATH:
+            return httpx.Response(200, json={"token": {"accessToken": "t", "expiresIn": 3600}})
+        assert request.url.path == "/orders/v2/ordersBulk"
+        params = request.url.params
+        start, end = datetime.fromisoformat(params["startDate"]), datetime.fromisoformat(params["endDate"])
+        size, page = int(params["pageSize"]), int(params["page"])
+        self.pages.append(page)
+        window = sorted((o for o in self.orders.values()
+                         if start <= datetime.fromisoformat(o["modifiedDate"]) < end), key=lambda o: o["guid"])
+        return httpx.Response(200, json=window[(page - 1) * size:page * size])
+
+def test_sync_fetches_only_orders_modified_since_the_last_sync():
+    fake = FakeBulk()
+    client = make_client(fake)
+    client.page_size = 2
+    applied = []
+    client.orders.subscribe(lambda event, order: applied.append(order.id) if event == "added" else None)
+    now = datetime.now(timezone.utc)
+    for n in range(5):
+        fake.put(f"t{n}", now - timedelta(minutes=10 - n))
+
+    async def scenario():
+        assert await client.sync() == 5
+        assert fake.pages == [1, 2, 3]
+        # The overlap re-reads the newest orders, but unchanged ones are not applied again
+        assert await client.sync() == 0
+        changed = datetime.now(timezone.utc) - timedelta(seconds=1)
+        fake.put("t1", changed, total=99.0)
+        fake.put("t9", changed)
+        assert await client.sync() == 2
+        await client.session.close()
+
+    asyncio.run(scenario())
+    assert applied == ["t0", "t1", "t2", "t3", "t4", "t1", "t9"]
+    assert client.orders.get("t1").total_amount == 99.0
+
+def test_poller_keeps_orders_fresh_and_reads_stay_local():
+    fake = FakeBulk()
+    fake.put("t1", datetime.now(timezone.utc) - timedelta(minutes=1))
+    client = make_client(fake)
+
+    async def scenario():
+        poller = asyncio.create_task(poll_restaurant(lambda: [client], interval=60, jitter=0))
+        while not client.polled:
+            await asyncio.sleep(0.01)
+        calls = len(fake.pages)
+        # Twenty screens refreshing: served from the registry, no upstream calls
+        for orders in await asyncio.gather(*(client.get_live_orders() for _ in range(20))):
+            assert [o.id for o in orders] == ["t1"]
+        assert len(fake.pages) == calls
+        poller.cancel()
+        await asyncio.gather(poller, return_exceptions=True)
+        assert not client.polled
+        await client.session.close()
+
+    asyncio.run(scenario())
+
+def test_venues_on_one_restaurant_share_each_upstream_read():
+    fake = FakeBulk()
+    fake.put("t1", datetime.now(timezone.utc) - timedelta(minutes=1))
+    first = make_client(fake)
+    second = ToastClient(restaurant_guid="r1", session=first.session)
+
+    async def scenario():
+        poller = asyncio.create_task(poll_restaurant(lambda: [first, second], interval=60, jitter=0))
+        while not second.polled:
+            await asyncio.sleep(0.01)
+        poller.cancel()
+        await asyncio.gather(poller, return_exceptions=True)
+        await first.session.close()
+
+    asyncio.run(scenario())
+    assert fake.pages == [1]
+    assert first.orders.get("t1") is not second.orders.get("t1")
+    assert first.modified_since == second.modified_since
+
+def test_poll_delay_backs_off_to_the_cap():
+    class Mid:
+        def uniform(self, low, high):
+            return (low + high) / 2
+
+    assert [poll_delay(n, 5.0, 0.2, 60.0, Mid()) for n in range(6)] == [5.0, 10.0, 20.0, 40.0, 60.0, 60.0]
+    assert 4.0 <= poll_delay(0, 5.0, 0.2, 60.0) <= 6.0
+
+def test_json_array_elements_decode_across_chunk_boundaries():
+    data = [ORDER, {"guid": "t2", "note": "café \"]}", "checks": []}, {}]
+    body = json.dumps(data, ensure_ascii=False).encode()
+
+    async def chunks(size):
+        for i in range(0, len(body), size):
+            yield body[i:i + size]
+
+    async def decode(size):
+        return [item async for item in iter_json_array(chunks(size))]
+
+    for size in (1, 3, 64, len(body)):
+        assert asyncio.run(decode(size)) == data
+    with pytest.raises(ValueError):
+        body = body[:-1]
+        asyncio.run(decode(16))
+
+def test_mapped_orders_match_validated_models():
+    order = ToastClient()._map_to_order({**ORDER, "table": {"id": "12"}, "server": None, "checks": [
+        {"selections": [{"itemGuid": "i1", "displayName": "Negroni", "modifiers": [{"displayName": "Up"}]}]}]})
+    assert Order.model_validate(order.model_dump()) == order
+    assert (order.table_number, order.server, order.items[0].quantity, order.items[0].special_requests) == \
+        (12, None, 1, ["Up"])
+
+def test_mapped_orders_keep_their_toast_creation_time():
+    client = ToastClient()
+    order = client._map_to_order({**ORDER, "createdDate": "2026-10-17T19:05:00.000+0000"})
+    assert order.created_at == datetime(2026, 10, 17, 19, 5, tzinfo=timezone.utc)
+    # Without Toast dates, a re-mapped order keeps the time it was first seen
+    client.orders.upsert_many([client._map_to_order(ORDER)])
+    first = client.orders.get("t1").created_at
+    assert client._map_to_order(ORDER).created_at == first
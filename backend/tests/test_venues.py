@@ -0,0 +1,92 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.integrations.venues import VenueRegistry, DEFAULT_VENUE, build_registry, venues
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+def test_registry_rejects_unknown_and_invalid_keys():
+    registry = VenueRegistry()
+    registry.register("alpha")
+    assert registry.get("alpha").key == "alpha"
+    assert registry.get("beta") is None
+    with pytest.raises(ValueError):
+        registry.register("Not A Slug")
+
+    registry.autocreate = True
+    assert registry.get("beta").key == "beta"
+    assert registry.get("../etc") is None
+    assert len(registry) == 2
+
+def test_venues_have_independent_state():
+    registry = VenueRegistry()
+    a, b = registry.register("a"), registry.register("b")
+    a.floor.update("t1", status="occupied")
+    a.sections.load([{"id": "x", "name": "Solo", "tables": [1]}])
+
+    assert b.floor.get("t1").status == "available"
+    assert [s["id"] for s in b.sections.bartenders] == ["b1", "b2", "b3", "b4"]
+    assert a.toast.orders is not b.toast.orders
+    assert a.kitchen.sections is a.sections
+
+def test_locations_are_registered():
+    assert DEFAULT_VENUE in venues
+    assert "xs-nightclub" in venues
+    assert venues.get("xs-nightclub").name == "XS Nightclub"
+
+def test_locations_without_their_own_guid_do_not_share_the_default(monkeypatch):
+    monkeypatch.setenv("TOAST_RESTAURANT_GUID", "shared")
+    monkeypatch.setenv("TOAST_RESTAURANT_GUID_XS_NIGHTCLUB", "xs")
+    registry = build_registry()
+    assert registry.get("xs-nightclub").toast.restaurant_guid == "xs"
+    delilah = registry.get("delilah").toast
+    assert delilah.restaurant_guid is None and delilah.mock
+    assert registry.toast_clients("shared") == []
+
+def test_requests_are_scoped_to_the_venue(client):
+    base = "/api/v1/venues/delilah/integrations"
+    client.post(f"{base}/system/reset")
+    try:
+        seated = client.post(f"{base}/tables/t2/seat",
+                             json={"id": "g1", "name": "Guest", "party": 2, "isVip": False, "source": "walkin"})
+        assert seated.status_code == 200
+
+        assert client.get(f"{base}/tables").json()[1]["status"] == "occupied"
+        by_header = client.get("/api/v1/integrations/tables", headers={"X-Venue-Key": "delilah"})
+        assert by_header.json()[1]["status"] == "occupied"
+        assert client.get("/api/v1/venues/sw/integrations/tables").json()[1]["status"] == "available"
+    finally:
+        client.post(f"{base}/system/reset")
+
+def test_table_put_with_another_id_is_rejected_unchanged(client):
+    base = "/api/v1/venues/delilah/integrations"
+    table = client.get(f"{base}/tables").json()[0]
+    response = client.put(f"{base}/tables/{table['id']}", json={**table, "id": "t99", "capacity": 12})
+    assert response.status_code == 400
+    assert client.get(f"{base}/tables").json()[0] == table
+
+def test_unknown_venue_is_404(client):
+    assert client.get("/api/v1/venues/nowhere/integrations/tables").status_code == 404
+    assert client.get("/api/v1/integrations/tables", headers={"X-Venue-Key": "nowhere"}).status_code == 404
+
+def test_every_order_write_is_pushed_once():
+    import asyncio
+    import json
+    from app.integrations.models import Order, OrderItem
+    from app.integrations.venues import VenueState
+    venue = VenueState("pushy")
+
+    async def scenario():
+        kitchen, bar = venue.events.subscribe(["kitchen"]), venue.events.subscribe(["bar"])
+        since = venue.versions.version
+        # What a Toast sync or a webhook batch does
+        venue.toast.orders.upsert_many([Order(id="o1", table_number=4, total_amount=14.0, items=[
+            OrderItem(item_id="i1", name="Spritz", quantity=1, price=14.0, station="bar")])])
+        venue.toast.orders.set_status("o1", "ready")
+        assert venue.versions.section_changed("kitchen", since)
+        return ([json.loads(kitchen.queue.get_nowait())["type"] for _ in range(kitchen.queue.qsize())],
+                bar.queue.qsize())
+
+    assert asyncio.run(scenario()) == (["order.updated", "order.ready"], 2)
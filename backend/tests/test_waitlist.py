@@ -0,0 +1,33 @@
+from app.integrations.models import GuestToSeat
+from app.integrations.waitlist import Waitlist
+
+def guest(guest_id: str, arrived: float, party: int = 2, vip: bool = False) -> GuestToSeat:
+    return GuestToSeat(id=guest_id, name=guest_id, party=party, isVip=vip, source="waitlist", arrivedAt=arrived)
+
+def test_priority_is_tier_then_arrival_then_party():
+    waitlist = Waitlist([guest("late", 3), guest("vip", 5, vip=True), guest("big", 1, party=6), guest("small", 1)])
+    assert [g.id for g in waitlist.ordered()] == ["vip", "small", "big", "late"]
+    assert waitlist.pop().id == "vip"
+    assert waitlist.peek().id == "small"
+
+def test_remove_by_id_is_lazy_but_invisible():
+    waitlist = Waitlist([guest("a", 1), guest("b", 2), guest("c", 3)])
+    assert waitlist.remove("a").id == "a"
+    assert waitlist.remove("a") is None
+    assert "a" not in waitlist and len(waitlist) == 2
+    assert waitlist.peek().id == "b"
+    assert [g.id for g in waitlist] == ["b", "c"]
+
+def test_add_stamps_arrival_and_replaces_same_id():
+    waitlist = Waitlist()
+    first = waitlist.add(GuestToSeat(id="a", name="A", party=2, isVip=False, source="walkin"))
+    assert first.arrivedAt is not None
+    waitlist.add(guest("a", 0, party=4))
+    assert len(waitlist) == 1 and waitlist.get("a").party == 4
+
+def test_heap_compacts_under_churn():
+    waitlist = Waitlist()
+    for i in range(1000):
+        waitlist.add(guest(f"g{i}", i))
+        waitlist.remove(f"g{i}")
+    assert len(waitlist._heap) <= 16
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from fastapi.testclient import TestClient
+from app.main import app
+from app.integrations.models import Order, OrderItem
+from app.integrations.venues import VenueState, venues
+from app.integrations.webhook_queue import WebhookIngest
+
+def make_order(order_id: str, total: float = 20.0) -> Order:
+    return Order(id=order_id, table_number=2, total_amount=total,
+                 items=[OrderItem(item_id="i1", name="Spritz", quantity=1, price=total)])
+
+def test_retries_and_repeated_versions_are_applied_once():
+    venue = VenueState("hooks")
+    added = []
+    venue.toast.orders.subscribe(lambda event, order: added.append(order.total_amount) if event == "added" else None)
+    ingest = WebhookIngest(lambda v, orders: v.toast.orders.upsert_many(orders), workers=2)
+
+    async def scenario():
+        worker = asyncio.create_task(ingest.run())
+        await asyncio.sleep(0)
+        for order in [make_order("o1"), make_order("o1"), make_order("o2"), make_order("o1", 35.0)]:
+            assert ingest.submit(venue, order)
+        await ingest.drain()
+        # A retry after the update was applied
+        assert ingest.submit(venue, make_order("o1", 35.0))
+        await ingest.drain()
+        worker.cancel()
+
+    asyncio.run(scenario())
+    assert sorted(added) == [20.0, 35.0]
+    assert venue.toast.orders.get("o1").total_amount == 35.0 and len(venue.toast.orders) == 2
+    metrics = ingest.metrics()
+    assert (metrics["received"], metrics["applied"], metrics["duplicates"], metrics["depth"]) == (5, 2, 3, 0)
+
+def test_full_queue_rejects_instead_of_growing():
+    venue = VenueState("hooks")
+    release = threading.Event()
+    ingest = WebhookIngest(lambda v, orders: release.wait(5), maxsize=2, workers=1, batch_size=1)
+
+    async def scenario():
+        worker = asyncio.create_task(ingest.run())
+        await asyncio.sleep(0)
+        assert ingest.submit(venue, make_order("o0"))
+        await asyncio.sleep(0.05)  # the worker is now stuck applying o0
+        accepted = [ingest.submit(venue, make_order(f"o{n}")) for n in range(1, 5)]
+        assert accepted == [True, True, False, False]
+        assert ingest.metrics()["depth"] == 2
+        await asyncio.sleep(0.02)
+        assert ingest.metrics()["oldest_seconds"] >= 0.02
+        release.set()
+        await ingest.drain()
+        assert ingest.metrics()["oldest_seconds"] == 0.0
+        worker.cancel()
+
+    asyncio.run(scenario())
+    assert ingest.metrics()["rejected"] == 2
+
+def test_webhook_endpoint_queues_and_exposes_metrics():
+    with TestClient(app) as client:
+        response = client.post("/api/v1/venues/delilah/integrations/webhook/toast",
+                               json=make_order("hook-1").model_dump(mode="json"))
+        assert response.status_code == 202 and response.json()["status"] == "queued"
+        metrics = client.get("/api/v1/integrations/webhook/toast/metrics").json()
+        assert metrics["received"] >= 1
+    # Shutdown drained the queue into the venue's registry
+    assert venues.get("delilah").toast.orders.get("hook-1") is not None
+    venues.get("delilah").toast.orders.remove("hook-1")
+
+def test_webhook_for_an_archived_order_stays_out_of_the_hot_set():
+    from app.integrations.router import apply_toast_orders
+    venue = VenueState("hooks")
+    venue.toast.archive_grace_seconds = 0
+    venue.toast.add_order(make_order("o1"))
+    venue.toast.orders.set_status("o1", "delivered")
+    assert venue.toast.archive_closed(now=float("inf")) == 1
+    # A late retry of the order, still open in Toast's payload
+    WebhookIngest(apply_toast_orders).apply_now(venue, [make_order("o1"), make_order("o2")])
+    assert venue.toast.orders.get("o1") is None and venue.toast.orders.get("o2") is not None
+    assert "o1" in venue.toast.archive